@@ -4,14 +4,25 @@ import glob
 import zipfile
 import sys
 import shutil
+import argparse
+import tempfile
 from multiprocessing import Pool, cpu_count
 
-# 获取脚本所在的绝对路径，并切换工作目录到脚本所在位置
+# 获取脚本所在的绝对路径
 script_dir = os.path.dirname(os.path.abspath(__file__))
-os.chdir(script_dir)
 
-def extract_ufoz(ufoz_path):
-    """从 ufoz 文件中仅提取.ufo目录"""
+# 分区规划、按字形提取与去除重叠使用 tools/ 中的模块，只在用到时才导入，
+# 单独复制出来的 build.py 仍然可以编译完整的 .ufoz
+sys.path.insert(0, os.path.join(script_dir, "..", "tools"))
+
+# fontmake 编译参数（tools/pipeline.py 也使用这组参数）
+FONTMAKE_OPTIONS = [
+    "--keep-overlaps", "--keep-direction",
+    "--no-generate-GDEF", "--no-production-names",
+]
+
+def extract_ufoz(ufoz_path, target_dir='.'):
+    """从 ufoz 文件中仅提取.ufo目录，返回解压后的 .ufo 路径"""
     with zipfile.ZipFile(ufoz_path, 'r') as zip_ref:
         # 在zip文件中查找所有.ufo目录
         ufo_dirs = [f for f in zip_ref.namelist() if f.endswith('.ufo/') or f.endswith('.ufo\\')]
@@ -28,8 +39,19 @@ def extract_ufoz(ufoz_path):
         # 仅提取所需文件（.ufo目录中的所有文件）
         for file in zip_ref.namelist():
             if file.startswith(ufo_dir):
-                zip_ref.extract(file, '.')
+                zip_ref.extract(file, target_dir)
+
+    return os.path.join(target_dir, ufo_dir) if target_dir != '.' else ufo_dir
 
+def extract_source(source_path, target_dir='.'):
+    """提取完整的 .ufo 目录；.pgs 二进制字形库（tools/glyph_store.py）需要把全部字形还原为 .glif 才能交给 fontmake"""
+    if not source_path.lower().endswith('.pgs'):
+        return extract_ufoz(source_path, target_dir)
+    from ufoz import open_source, extract_glyphs
+
+    with open_source(source_path) as source:
+        glyph_names = list(source.contents())
+    ufo_dir, _ = extract_glyphs(source_path, glyph_names, target_dir)
     return ufo_dir
 
 def process_ufoz_file(ufoz_file):
@@ -40,27 +62,25 @@ def process_ufoz_file(ufoz_file):
             os.makedirs(target_dir)
 
         # 提取 ufoz 文件
-        ufo_dir = extract_ufoz(ufoz_file)
+        ufo_dir = extract_source(ufoz_file)
 
         # 使用 fontmake 转换为 TTF
         fontname = os.path.basename(os.path.splitext(ufoz_file)[0])
-        cmd = [
-            "fontmake", "-u", ufo_dir, 
-            "--keep-overlaps", "--keep-direction",
-            "--no-generate-GDEF", "--no-production-names",
-            "-o", "ttf"
-        ]
+        cmd = ["fontmake", "-u", ufo_dir, *FONTMAKE_OPTIONS, "-o", "ttf"]
         subprocess.run(cmd, check=True)
 
         # 将 TTF 文件移动到目标目录
+        output_path = None
         ttf_file = f"master_ttf/{fontname}.ttf"
         if os.path.exists(ttf_file):
-            shutil.move(ttf_file, os.path.join(target_dir, f"{fontname}.ttf"))
+            output_path = os.path.join(target_dir, f"{fontname}.ttf")
+            shutil.move(ttf_file, output_path)
         else:
             # 备用方案：同时检查instance_ttf，以防万一
             ttf_file = f"instance_ttf/{fontname}.ttf"
             if os.path.exists(ttf_file):
-                shutil.move(ttf_file, os.path.join(target_dir, f"{fontname}.ttf"))
+                output_path = os.path.join(target_dir, f"{fontname}.ttf")
+                shutil.move(ttf_file, output_path)
 
         # 清理
         if os.path.exists(ufo_dir):
@@ -70,18 +90,116 @@ def process_ufoz_file(ufoz_file):
         if os.path.exists("master_ttf"):
             shutil.rmtree("master_ttf")
 
-        return f"成功处理 {ufoz_file}"
+        return output_path, f"成功处理 {ufoz_file}"
     except Exception as e:
-        return f"处理 {ufoz_file} 时出错: {str(e)}"
+        return None, f"处理 {ufoz_file} 时出错: {str(e)}"
 
-def main():
-    # 获取所有 ufoz 文件
-    ufoz_files = glob.glob("*.ufoz")
+def process_partition(partition):
+    """按分区规划只提取该分区的字形，编译为 TTF"""
+    try:
+        target_dir = os.path.abspath("../build")
+        if not os.path.exists(target_dir):
+            os.makedirs(target_dir)
 
-    if not ufoz_files:
-        print("当前目录中未找到.ufoz文件")
-        return
+        work_dir = tempfile.mkdtemp(prefix=f".{partition['name']}-", dir=".")
+        try:
+            if partition['complete']:
+                ufo_dir = extract_source(partition['source'], work_dir)
+            else:
+                from ufoz import extract_glyphs
+                ufo_dir, _ = extract_glyphs(partition['source'], partition['glyphs'], work_dir,
+                                            fontinfo=partition['fontinfo'],
+                                            drop_features=partition.get('drop_features', False))
+
+            output_path = os.path.join(target_dir, f"{partition['name']}.ttf")
+            cmd = ["fontmake", "-u", ufo_dir, *FONTMAKE_OPTIONS, "-o", "ttf", "--output-path", output_path]
+            subprocess.run(cmd, check=True)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        return output_path, f"成功处理 {partition['name']}"
+    except Exception as e:
+        return None, f"处理 {partition['name']} 时出错: {str(e)}"
+
+def physical_memory_mb():
+    """返回物理内存大小 (MB)，无法获取时返回 None"""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def build_plan(plan_path):
+    """按 tools/font_partition.py 生成的规划文件并行编译各分区"""
+    from font_partition import load_plan
+
+    plan = load_plan(plan_path)
+    partitions = plan['partitions']
+    if not partitions:
+        print("规划文件中没有分区")
+        return []
+
+    # 同时运行的分区估算内存之和不超过物理内存
+    num_processes = min(len(partitions), cpu_count(), 10)
+    memory = physical_memory_mb()
+    peak = max(partition['estimated_memory_mb'] for partition in partitions)
+    if memory and peak:
+        num_processes = max(1, min(num_processes, memory // peak))
+
+    print(f"规划文件中有 {len(partitions)} 个分区，使用 {num_processes} 个进程（单个分区估算内存最多 {peak} MB）")
 
+    with Pool(processes=num_processes) as pool:
+        results = pool.map(process_partition, partitions)
+
+    for _, message in results:
+        print(message)
+
+    return [output_path for output_path, _ in results if output_path]
+
+def build_selection(ufoz_files, unicodes, patterns):
+    """只编译选中的字形（及其引用的组件），生成 ../build/<名称>.partial.ttf 测试字体"""
+    from ufoz import open_source, parse_unicode_ranges, select_glyphs
+
+    ranges = parse_unicode_ranges(unicodes or "")
+    partitions = []
+    for ufoz_file in ufoz_files:
+        with open_source(ufoz_file) as source:
+            names = select_glyphs(source, ranges, patterns, cache_dir=".unicode_cache")
+        if names:
+            fontname = os.path.basename(os.path.splitext(ufoz_file)[0])
+            partitions.append({
+                'name': f"{fontname}.partial", 'source': os.path.abspath(ufoz_file),
+                'complete': False, 'fontinfo': {}, 'glyphs': names,
+                # 测试字体无法过滤 features.fea 时省略它，不影响编译
+                'drop_features': True,
+            })
+            print(f"{ufoz_file}: 选中 {len(names)} 个字形")
+
+    if not partitions:
+        print("没有匹配的字形")
+        return []
+
+    num_processes = min(len(partitions), cpu_count(), 10)
+    with Pool(processes=num_processes) as pool:
+        results = pool.map(process_partition, partitions)
+
+    for _, message in results:
+        print(message)
+
+    return [output_path for output_path, _ in results if output_path]
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='从 .ufoz 源文件生成 TTF 字体')
+    parser.add_argument('ufoz_files', nargs='*',
+                        help='要编译的 .ufoz 或 .pgs 文件（默认：脚本所在目录中的所有 .ufoz）')
+    parser.add_argument('--plan', help='按 tools/font_partition.py 生成的分区规划文件编译')
+    parser.add_argument('--unicodes', '-u', help='只编译码位范围内的字形，例如 "323B0-3347F,4E00"')
+    parser.add_argument('--glyphs', '-g', nargs='+', default=[], help='只编译名称匹配的字形（支持 * ? 通配符）')
+    parser.add_argument('--remove-overlaps', action='store_true', help='编译后使用 skia-pathops 并行去除轮廓重叠')
+
+    return parser.parse_args()
+
+def build_all(ufoz_files):
+    """并行编译所有 ufoz 文件，返回生成的 TTF 路径"""
     # 确定要使用的进程数（最多10个）
     num_processes = min(len(ufoz_files), cpu_count(), 10)
 
@@ -92,8 +210,44 @@ def main():
         results = pool.map(process_ufoz_file, ufoz_files)
 
     # 打印结果
-    for result in results:
-        print(result)
+    for _, message in results:
+        print(message)
+
+    return [output_path for output_path, _ in results if output_path]
+
+def remove_overlaps(output_paths):
+    """对编译生成的 TTF 去除轮廓重叠（字形级缓存位于 .overlap_cache）"""
+    from remove_overlaps import OverlapRemover
+
+    remover = OverlapRemover()
+    for output_path in output_paths:
+        if not remover.remove_overlaps(output_path, output_path):
+            print(f"去除 {output_path} 的重叠时出错")
+
+def main():
+    args = parse_arguments()
+    plan_path = os.path.abspath(args.plan) if args.plan else None
+    ufoz_files = [os.path.abspath(ufoz_file) for ufoz_file in args.ufoz_files]
+
+    # 切换工作目录到脚本所在位置
+    os.chdir(script_dir)
+
+    # 获取所有 ufoz 文件
+    ufoz_files = ufoz_files or glob.glob("*.ufoz")
+
+    if plan_path:
+        output_paths = build_plan(plan_path)
+    elif args.unicodes or args.glyphs:
+        output_paths = build_selection(ufoz_files, args.unicodes, args.glyphs)
+    elif ufoz_files:
+        output_paths = build_all(ufoz_files)
+    else:
+        print("当前目录中未找到.ufoz文件")
+        return
+
+    # 各字体编译完成后再去除重叠（每个字体内部按字形分片并行）
+    if args.remove_overlaps and output_paths:
+        remove_overlaps(output_paths)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+
+"""测试共用的路径设置与合成字体（tools/synthetic_font.py）"""
+
+import os
+import sys
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(REPO_DIR, 'tools'))
+sys.path.insert(0, os.path.join(REPO_DIR, 'sources'))
+
+from synthetic_font import build_ttf, build_ufoz  # noqa: E402
+
+GLYPH_COUNT = 64
+
+
+@pytest.fixture(scope='session')
+def synthetic_ufoz(tmp_path_factory):
+    """GLYPH_COUNT 个字形的合成 .ufoz"""
+    path = tmp_path_factory.mktemp('synthetic') / 'Synthetic.ufoz'
+    build_ufoz(str(path), GLYPH_COUNT)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def synthetic_ttf(tmp_path_factory):
+    """GLYPH_COUNT 个字形的合成 TTF"""
+    path = tmp_path_factory.mktemp('synthetic') / 'Synthetic.ttf'
+    build_ttf(str(path), GLYPH_COUNT)
+    return str(path)
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+
+from collections import Counter
+
+import pytest
+
+from corpus_scan import IGNORED_CODEPOINTS, plan_tasks, scan_corpus
+
+# 1 至 4 字节的 UTF-8 字符混排，任意字节区间的边界都会落在某些字符中间
+TEXT = '\ufeffA é 中文 😀\n' + ''.join(chr(0x4E00 + i % 300) + chr(0x20000 + i % 50) + 'ß' for i in range(2000)) + '\n'
+
+
+def expected_counts(text):
+    return Counter(ord(char) for char in text if ord(char) not in IGNORED_CODEPOINTS)
+
+
+@pytest.mark.parametrize('task_size', [1, 2, 3, 5, 7, 4096])
+def test_split_boundaries(tmp_path, task_size):
+    path = tmp_path / 'corpus.txt'
+    path.write_text(TEXT[:400] if task_size < 4 else TEXT, encoding='utf-8')
+    text = path.read_text(encoding='utf-8')
+
+    bitmap, counts = scan_corpus([str(path)], processes=1, with_counts=True, task_size=task_size)
+    assert counts == expected_counts(text)
+    assert set(bitmap) == set(expected_counts(text))
+
+
+def test_tasks_cover_file(tmp_path):
+    path = tmp_path / 'corpus.txt'
+    path.write_text(TEXT, encoding='utf-8')
+    size = path.stat().st_size
+
+    tasks = plan_tasks([str(path)], task_size=1000)
+    assert tasks[0][1] == 0 and tasks[-1][2] == size
+    assert all(previous[2] == task[1] for previous, task in zip(tasks, tasks[1:]))
+
+
+def test_parallel_matches_serial(tmp_path):
+    for index in range(3):
+        (tmp_path / f'{index}.txt').write_text(TEXT[index * 500:], encoding='utf-8')
+
+    serial = scan_corpus([str(tmp_path)], processes=1, with_counts=True, task_size=777)
+    parallel = scan_corpus([str(tmp_path)], processes=2, with_counts=True, task_size=777)
+    assert serial[1] == parallel[1]
+    assert set(serial[0]) == set(parallel[0])
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+from fontTools.ttLib import TTFont
+
+from coverage_index import CoverageIndex, build_index
+from synthetic_font import build_ttf
+
+
+def test_lookup_prefers_earlier_fonts(synthetic_ttf, tmp_path):
+    larger_path = str(tmp_path / 'Larger.ttf')
+    build_ttf(larger_path, 128)
+    index_path = str(tmp_path / 'fonts.pgci')
+    fonts = build_index([synthetic_ttf, larger_path], index_path)
+
+    small, large = TTFont(synthetic_ttf), TTFont(larger_path)
+    small_cmap, large_cmap = small.getBestCmap(), large.getBestCmap()
+    extra = sorted(set(large_cmap) - set(small_cmap))
+    assert extra
+    assert [font['codepoints'] for font in fonts] == [len(small_cmap), len(extra)]
+
+    with CoverageIndex(index_path) as index:
+        assert index.check_fonts() == []
+        for codepoint, name in small_cmap.items():
+            assert index.lookup(codepoint) == (0, small.getGlyphID(name))
+        for codepoint in extra:
+            assert index.lookup(codepoint) == (1, large.getGlyphID(large_cmap[codepoint]))
+        assert index.lookup(0x41) is None
+        assert index.lookup(0x110000) is None
+
+        routes, missing = index.route([extra[0], 0x4E00, 0x41, 0x4E00])
+        assert routes == {0: [0x4E00], 1: [extra[0]]}
+        assert missing == [0x41]
+
+
+def test_check_fonts_reports_changed_font(tmp_path):
+    font_path = str(tmp_path / 'Font.ttf')
+    build_ttf(font_path, 16)
+    index_path = str(tmp_path / 'fonts.pgci')
+    build_index([font_path], index_path)
+
+    build_ttf(font_path, 16, seed=1)
+    with CoverageIndex(index_path) as index:
+        assert index.check_fonts() == [font_path]
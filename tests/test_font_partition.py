@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+
+import re
+import zipfile
+
+import pytest
+
+from font_partition import Estimator, plan_source
+from ufoz import UfozSource
+
+
+def unencode(source_path, output_path, count):
+    """复制 .ufoz，去掉前 count 个汉字字形的码位，使其成为未被引用的未编码字形"""
+    with zipfile.ZipFile(source_path) as source, zipfile.ZipFile(output_path, 'w') as output:
+        glifs = sorted(name for name in source.namelist() if re.search(r'/uni[0-9A-F_]+\.glif$', name))
+        targets = set(glifs[:count])
+        for info in source.infolist():
+            data = source.read(info.filename)
+            if info.filename in targets:
+                data = re.sub(rb'\s*<unicode hex="[0-9A-F]+"\s*/>', b'', data)
+            output.writestr(info, data)
+
+
+def check_limits(partitions, max_glyphs):
+    assert all(partition['glyph_count'] <= max_glyphs for partition in partitions)
+
+
+def test_partitions_respect_limits(synthetic_ufoz):
+    # 估算内存等于点数（MB），使内存预算比字形数上限更先起作用
+    estimator = Estimator(base_memory=0, memory_per_point=1024 * 1024)
+    with UfozSource(synthetic_ufoz) as source:
+        partitions = plan_source(source, max_glyphs=20, memory_budget=600, estimator=estimator,
+                                 log=lambda message: None)
+        glyph_order = source.glyph_order
+        cmap = source.unicode_map()
+
+    check_limits(partitions, 20)
+    assert all(partition['points'] <= 600 for partition in partitions)
+    assert len(partitions) > len(glyph_order) // 20 + 1
+
+    # 每个已编码字形恰好属于一个分区（.notdef 等共享字形除外）
+    owners = {}
+    for index, partition in enumerate(partitions):
+        for name in partition['glyphs']:
+            if cmap.get(name):
+                assert owners.setdefault(name, index) == index
+    assert set(owners) == {name for name in glyph_order if cmap.get(name)}
+
+
+def test_orphans_respect_glyph_limit(synthetic_ufoz, tmp_path):
+    path = str(tmp_path / 'Orphans.ufoz')
+    unencode(synthetic_ufoz, path, 40)
+    with UfozSource(path) as source:
+        partitions = plan_source(source, max_glyphs=16, log=lambda message: None)
+        glyph_order = source.glyph_order
+
+    check_limits(partitions, 16)
+    planned = set().union(*(partition['glyphs'] for partition in partitions))
+    assert planned == set(glyph_order)
+    assert any(block.startswith('Unencoded') for partition in partitions for block in partition['blocks'])
+
+
+def test_unit_over_glyph_limit_is_rejected(synthetic_ufoz):
+    # 每个区块至少包含 .notdef 与一个字形，无法满足 1 个字形的上限
+    with UfozSource(synthetic_ufoz) as source:
+        with pytest.raises(ValueError):
+            plan_source(source, max_glyphs=1, log=lambda message: None)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+import io
+import json
+import sys
+
+import pytest
+from fontTools.ttLib import TTFont
+
+import font_patch
+import font_subset
+from font_patch import COMPRESSION_BROTLI, COMPRESSION_NAMES, PatchError, apply_patch, create_patch, state_digest
+
+
+@pytest.fixture
+def incremental(synthetic_ttf, tmp_path, monkeypatch):
+    """基础子集加 4 个补丁，返回 (输出目录, 清单)"""
+    monkeypatch.setattr(sys, 'argv', ['font_subset.py', synthetic_ttf, '--incremental', '-u', 'U+4E00-U+4E0F',
+                                      '--patch-size', '16', '-j', '1', '--output-dir', str(tmp_path)])
+    font_subset.main()
+    with open(tmp_path / 'Synthetic.incremental.json', encoding='utf-8') as f:
+        return tmp_path, json.load(f)
+
+
+def outlines(font):
+    """码位 -> 字形轮廓坐标"""
+    glyf = font['glyf']
+    return {codepoint: list(glyf[name].getCoordinates(glyf)[0])
+            for codepoint, name in font.getBestCmap().items()}
+
+
+def test_patch_chain_restores_full_font(synthetic_ttf, incremental):
+    output_dir, manifest = incremental
+    state = (output_dir / manifest['base']['file']).read_bytes()
+    assert state_digest(state).hex() == manifest['base']['digest']
+
+    for patch in manifest['patches']:
+        state = apply_patch(state, (output_dir / patch['file']).read_bytes())
+        assert state_digest(state).hex() == patch['to']
+
+    assert outlines(TTFont(io.BytesIO(state))) == outlines(TTFont(synthetic_ttf))
+
+
+def test_patch_rejects_wrong_base(incremental):
+    output_dir, manifest = incremental
+    base = (output_dir / manifest['base']['file']).read_bytes()
+    with pytest.raises(PatchError):
+        apply_patch(base, (output_dir / manifest['patches'][1]['file']).read_bytes())
+
+
+def test_create_patch_round_trip(synthetic_ttf):
+    subsetter = font_subset.FontSubsetter(synthetic_ttf)
+    codepoints = sorted(subsetter.cmap)
+    base = subsetter.subset_bytes(codepoints[:8], retain_gids=True)
+    target = subsetter.subset_bytes(codepoints[:40], retain_gids=True)
+
+    for compression in COMPRESSION_NAMES:
+        if compression == COMPRESSION_BROTLI and font_patch.brotli is None:
+            continue
+        patch = create_patch(base, target, compression)
+        assert state_digest(apply_patch(base, patch)) == state_digest(target)
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import sys
+
+import pytest
+from fontTools.ttLib.tables import _h_e_a_d
+
+import font_subset
+from font_subset import FontSubsetter
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """每次调用返回不同时间戳的 timestampNow，用于检查输出是否与保存时间无关"""
+    ticks = iter(range(3_000_000_000, 4_000_000_000, 3600))
+    monkeypatch.setattr(_h_e_a_d, 'timestampNow', lambda: next(ticks))
+
+
+def run_main(monkeypatch, *argv):
+    monkeypatch.setattr(sys, 'argv', ['font_subset.py', *argv])
+    font_subset.main()
+
+
+def test_subset_bytes_are_deterministic(synthetic_ttf, clock):
+    subsetter = FontSubsetter(synthetic_ttf)
+    unicodes = sorted(subsetter.cmap)[:10]
+    for flavor in (None, 'woff2'):
+        assert subsetter.subset_bytes(unicodes, flavor) == subsetter.subset_bytes(unicodes, flavor)
+
+
+def test_shard_names_are_stable(synthetic_ttf, tmp_path, monkeypatch, clock):
+    names = []
+    for run in ('a', 'b'):
+        output_dir = tmp_path / run
+        run_main(monkeypatch, synthetic_ttf, '--shard', '--shard-size', '16', '-j', '1',
+                 '--output-dir', str(output_dir))
+        names.append(sorted(os.listdir(output_dir)))
+
+    assert names[0] == names[1]
+    assert sum(name.endswith('.woff2') for name in names[0]) > 1
+
+
+def test_patch_chain_is_stable(synthetic_ttf, tmp_path, monkeypatch, clock):
+    outputs = []
+    for run in ('a', 'b'):
+        output_dir = tmp_path / run
+        run_main(monkeypatch, synthetic_ttf, '--incremental', '-u', 'U+4E00-U+4E0F', '--patch-size', '16',
+                 '-j', '1', '--output-dir', str(output_dir))
+        with open(output_dir / 'Synthetic.incremental.json', encoding='utf-8') as f:
+            outputs.append((sorted(os.listdir(output_dir)), json.load(f)))
+
+    assert outputs[0] == outputs[1]
+    assert outputs[0][1]['patches']
+
+
+def test_shard_css_escapes_strings(synthetic_ttf, tmp_path, monkeypatch):
+    run_main(monkeypatch, synthetic_ttf, '--shard', '--shard-size', '32', '-j', '1',
+             '--css-family', "Plan'gothic\\Test", '--url-prefix', "fonts/it's/",
+             '--output-dir', str(tmp_path))
+    css = (tmp_path / 'Synthetic.css').read_text(encoding='utf-8')
+
+    assert "font-family: 'Plan\\27 gothic\\5C Test';" in css
+    assert "src: url('fonts/it\\27 s/Synthetic." in css
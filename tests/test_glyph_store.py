@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+import re
+import zipfile
+
+import numpy as np
+
+from glyph_store import GlyphStore, build_store, verify_store
+
+
+def test_outline_view_outlives_store(synthetic_ufoz, tmp_path):
+    store_path = str(tmp_path / 'Synthetic.pgs')
+    build_store(synthetic_ufoz, store_path)
+
+    with GlyphStore(store_path) as store:
+        name = store.glyph_for_codepoint(0x4E00)
+        coordinates, types, ends = store.outline(name)
+        expected = coordinates.copy()
+
+    assert len(ends) and len(types) == len(coordinates)
+    assert np.array_equal(coordinates, expected)
+
+
+def test_analysis_tools_read_store(synthetic_ufoz, tmp_path):
+    from glyph_diff import compare_fonts
+    from glyph_stats import analyze_font
+
+    store_path = str(tmp_path / 'Synthetic.pgs')
+    build_store(synthetic_ufoz, store_path)
+
+    glyphs = analyze_font(store_path)
+    with GlyphStore(store_path) as store:
+        assert [glyph['name'] for glyph in glyphs] == store.glyph_order
+        assert [glyph['points'] for glyph in glyphs] == [int(count) for count in store.records['point_count']]
+
+    results, removed, added, rendered, _ = compare_fonts(store_path, store_path, size=16, processes=1)
+    assert not removed and not added and rendered == 0
+    assert not any(result['changed'] for result in results)
+
+
+def test_build_export_verify(synthetic_ufoz, tmp_path):
+    store_path = str(tmp_path / 'Synthetic.pgs')
+    exported_path = str(tmp_path / 'Exported.ufoz')
+    count = build_store(synthetic_ufoz, store_path)
+    assert verify_store(synthetic_ufoz, store_path) == []
+
+    with GlyphStore(store_path) as store:
+        assert count == len(store)
+        store.export_ufoz(exported_path)
+    assert verify_store(exported_path, store_path) == []
+
+    # 改动一个字形的坐标后校验应报告该字形
+    changed_path = str(tmp_path / 'Changed.ufoz')
+    with zipfile.ZipFile(exported_path) as source, zipfile.ZipFile(changed_path, 'w') as output:
+        for info in source.infolist():
+            data = source.read(info.filename)
+            if info.filename.endswith('/uni4E_00.glif'):
+                data = re.sub(rb'x="(-?\d+)"', lambda match: b'x="%d"' % (int(match.group(1)) + 1), data, count=1)
+            output.writestr(info, data)
+    assert verify_store(changed_path, store_path) == ['uni4E00']
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from pipeline import STAGE_SCRIPTS, ArtifactStore, Pipeline, file_digest, local_modules
+
+
+def test_export_does_not_share_artifacts(tmp_path):
+    store = ArtifactStore(str(tmp_path / 'store'))
+    pipeline = Pipeline(store, jobs=1)
+    task = pipeline.add('Font:compile', 'compile', [], {}, ['Font.ttf'])
+    task.key = 'ab' * 32
+
+    staging = store.staging_dir()
+    with open(os.path.join(staging, 'Font.ttf'), 'wb') as f:
+        f.write(b'artifact')
+    task.digests = {'Font.ttf': file_digest(os.path.join(staging, 'Font.ttf'))}
+    store.commit(task.key, staging, {'outputs': task.digests})
+
+    output_dir = str(tmp_path / 'build')
+    target, = pipeline.export(task, output_dir)
+    # 原地改写导出的文件不影响产物库
+    with open(target, 'r+b') as f:
+        f.write(b'hinted')
+    artifact = os.path.join(store.path(task.key), 'Font.ttf')
+    assert file_digest(artifact) == task.digests['Font.ttf']
+
+    pipeline.export(task, output_dir)
+    with open(target, 'rb') as f:
+        assert f.read() == b'artifact'
+
+
+def test_subset_key_covers_imported_modules():
+    names = {os.path.basename(path) for path in local_modules(STAGE_SCRIPTS['subset'])}
+    assert {'font_subset.py', 'corpus_scan.py', 'subset_cache.py', 'font_loader.py',
+            'coverage_index.py', 'font_patch.py', 'unicode_blocks.py'} <= names
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import pytest
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import TTFont
+
+pytest.importorskip('pathops')
+
+from remove_overlaps import OverlapRemover  # noqa: E402
+
+SQUARE = [(100, 100), (100, 500), (500, 500), (500, 100)]
+
+
+@pytest.fixture
+def cancelling_font(synthetic_ttf, tmp_path):
+    """uni4E00 由方向相反的两个相同轮廓组成，去除重叠后为空字形"""
+    font = TTFont(synthetic_ttf)
+    pen = TTGlyphPen(None)
+    for points in (SQUARE, SQUARE[::-1]):
+        pen.moveTo(points[0])
+        for point in points[1:]:
+            pen.lineTo(point)
+        pen.closePath()
+    font['glyf']['uni4E00'] = pen.glyph()
+    path = str(tmp_path / 'Cancelling.ttf')
+    font.save(path)
+    return path
+
+
+def test_empty_result_replaces_glyph(cancelling_font, tmp_path):
+    remover = OverlapRemover(processes=1, cache_dir=str(tmp_path / 'cache'))
+    # 第二次运行的结果全部来自缓存
+    for run in ('a', 'b'):
+        output_path = str(tmp_path / f'{run}.ttf')
+        assert remover.remove_overlaps(cancelling_font, output_path)
+
+        font = TTFont(output_path)
+        assert font['glyf']['uni4E00'].numberOfContours == 0
+        assert font['hmtx']['uni4E00'][1] == 0
+        assert font['glyf']['uni4E01'].numberOfContours > 0
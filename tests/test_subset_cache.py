@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+
+from subset_cache import SubsetCache, subset_cache_key
+
+
+def test_fetch_copies_entry(tmp_path):
+    cache = SubsetCache(str(tmp_path / 'cache'))
+    key = subset_cache_key('0' * 64, [0x4E00, 0x4E01], flavor='woff2')
+    cache.put(key, b'subset data')
+
+    output = tmp_path / 'out.woff2'
+    assert cache.fetch(key, str(output))
+    # 原地改写输出文件不影响缓存
+    with open(output, 'r+b') as f:
+        f.write(b'XXXXXX')
+
+    assert cache.get(key) == b'subset data'
+    assert cache.fetch(key, str(output))
+    assert output.read_bytes() == b'subset data'
@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+import os
+import signal
+import threading
+import urllib.request
+from urllib.error import HTTPError
+
+import pytest
+
+from subset_server import SubsetRequestHandler, SubsetService, ThreadingHTTPServer
+
+
+@pytest.fixture
+def service(synthetic_ttf):
+    service = SubsetService([synthetic_ttf], processes=1, memory_cache_bytes=0)
+    yield service
+    service.shutdown()
+
+
+def test_not_modified_skips_subset(service):
+    handler = type('Handler', (SubsetRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_port}/subset?unicodes=4E00-4E03'
+    try:
+        with urllib.request.urlopen(url) as response:
+            etag = response.headers['ETag']
+        request = urllib.request.Request(url, headers={'If-None-Match': etag})
+        with pytest.raises(HTTPError) as excinfo:
+            urllib.request.urlopen(request)
+        assert excinfo.value.code == 304
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    counts = service.metrics_snapshot()['requests']
+    assert counts['miss'] == 1
+    assert counts['not_modified'] == 1
+
+
+def test_recovers_from_broken_pool(service):
+    service.subset('Synthetic', [0x4E00], 'woff2')
+    for pid in list(service.executor._processes):
+        os.kill(pid, signal.SIGKILL)
+
+    # 进程池损坏时当前请求失败，之后的请求使用新的进程池
+    try:
+        service.subset('Synthetic', [0x4E01], 'woff2')
+    except Exception:
+        pass
+    data, _, source = service.subset('Synthetic', [0x4E02], 'woff2')
+    assert source == 'miss'
+    assert data
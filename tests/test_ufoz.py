@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import zipfile
+
+from glyph_store import GlyphStore, build_store
+from ufoz import UfozSource, parse_unicode_ranges, select_glyphs
+
+
+def add_codepoint(source_path, output_path, glif_suffix, codepoint):
+    """复制 .ufoz，为文件名以 glif_suffix 结尾的字形增加一个码位"""
+    with zipfile.ZipFile(source_path) as source, zipfile.ZipFile(output_path, 'w') as output:
+        for info in source.infolist():
+            data = source.read(info.filename)
+            if info.filename.endswith(glif_suffix):
+                data = data.replace(b'<unicode ', f'<unicode hex="{codepoint:04X}"/>\n  <unicode '.encode(), 1)
+            output.writestr(info, data)
+
+
+def test_select_glyphs_reads_every_codepoint(synthetic_ufoz, tmp_path, monkeypatch):
+    path = str(tmp_path / 'Extra.ufoz')
+    add_codepoint(synthetic_ufoz, path, '/uni4E_00.glif', 0x2F00)
+    ranges = parse_unicode_ranges('2F00-2FDF')
+    cache_dir = str(tmp_path / 'cache')
+
+    with UfozSource(path) as source:
+        assert select_glyphs(source, ranges, cache_dir=cache_dir) == ['uni4E00']
+
+    # 源文件未改变时直接使用缓存的码位映射
+    def fail(*args, **kwargs):
+        raise AssertionError('不应读取 .glif')
+    monkeypatch.setattr(UfozSource, 'read_unicodes', fail)
+    with UfozSource(path) as source:
+        assert select_glyphs(source, ranges, cache_dir=cache_dir) == ['uni4E00']
+
+    store_path = str(tmp_path / 'Extra.pgs')
+    monkeypatch.undo()
+    build_store(path, store_path)
+    with GlyphStore(store_path) as store:
+        assert select_glyphs(store, ranges) == ['uni4E00']
@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+benchmark.py - 构建与工具链基准测试
+Benchmark suite for the build and font tools
+
+使用 synthetic_font.py 生成不同规模的合成字体，分别测量各工具的主要耗时环节：
+
+    build     sources/build.py 解压 .ufoz 并用 fontmake 编译为 TTF（需要 fontmake）
+    optimize  optimize_glyph.py 逐字形优化（需要 fontforge）
+    convert   convert_font.py 转换为 WOFF2（需要 fontforge）
+    subset    font_subset.py 加载字体并创建 TTF / WOFF2 子集（需要 fontTools）
+
+缺少依赖的项目记为 skipped。结果保存为 JSON（包含当前提交、机器信息与每次
+测量的耗时），可用 --compare 与其他提交的结果对比。全部测试均离线运行。
+
+Usage 使用方法:
+    python benchmark.py -o bench.json
+    python benchmark.py --scales 1000,5000,20000 --only subset,build --repeat 3 -o bench.json
+    python benchmark.py --compare baseline.json -o bench.json
+    python benchmark.py --work-dir .bench --keep   # 保留并复用生成的合成字体
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+
+import synthetic_font
+from synthetic_font import DEFAULT_STROKES, build_ttf, build_ufoz, glyph_codepoints
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TOOLS_DIR)
+BUILD_SCRIPT = os.path.join(REPO_DIR, 'sources', 'build.py')
+
+BENCHMARKS = ('build', 'optimize', 'convert', 'subset')
+DEFAULT_SCALES = (500, 2000, 8000)
+# 子集化基准使用的字符数（常用文本的规模）
+SUBSET_SIZE = 3000
+
+RESULT_FORMAT = 'plangothic-benchmark'
+RESULT_VERSION = 1
+
+
+class Skipped(Exception):
+    """缺少依赖，跳过该项测试"""
+
+
+def git_revision():
+    """返回 (当前提交, 工作区是否有未提交的修改)，不在 git 仓库中时返回 (None, None)"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def host_info():
+    info = {
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': os.cpu_count(),
+    }
+    try:
+        import fontTools
+        info['fonttools'] = fontTools.version
+    except ModuleNotFoundError:
+        pass
+    return info
+
+
+def run_command(command, cwd=None):
+    """运行外部命令并返回耗时（秒），失败时抛出 RuntimeError"""
+    start = time.perf_counter()
+    result = subprocess.run(command, cwd=cwd, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        stderr = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise RuntimeError(stderr[-1] if stderr else f"退出码 {result.returncode}")
+    return elapsed
+
+
+def require_executable(name):
+    path = shutil.which(name)
+    if path is None:
+        raise Skipped(f"未找到 {name}")
+    return path
+
+
+class BenchmarkRunner:
+    """生成合成字体并执行各项基准测试"""
+
+    def __init__(self, work_dir, strokes=DEFAULT_STROKES, seed=0, repeat=1):
+        self.work_dir = work_dir
+        self.strokes = strokes
+        self.seed = seed
+        self.repeat = repeat
+
+    def font_path(self, glyphs, extension):
+        """返回合成字体路径，不存在时生成（相同参数的字体在工作目录中复用）"""
+        name = f"Synthetic-{glyphs}-{self.strokes}-{self.seed}"
+        path = os.path.join(self.work_dir, 'fonts', f"{name}.{extension}")
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            print(f"  生成合成字体 {os.path.basename(path)}...")
+            build = build_ufoz if extension == 'ufoz' else build_ttf
+            build(path, glyphs, self.strokes, self.seed)
+        return path
+
+    def scratch_dir(self, name):
+        path = os.path.join(self.work_dir, 'runs', name)
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+        return path
+
+    def bench_build(self, glyphs):
+        require_executable('fontmake')
+        ufoz = self.font_path(glyphs, 'ufoz')
+        samples = []
+        for _ in range(self.repeat):
+            # build.py 处理自身所在目录中的 .ufoz 并输出到 ../build
+            root = self.scratch_dir('build')
+            sources = os.path.join(root, 'sources')
+            os.makedirs(sources)
+            shutil.copy(BUILD_SCRIPT, sources)
+            shutil.copy(ufoz, sources)
+            samples.append({'total': run_command([sys.executable, os.path.join(sources, 'build.py')])})
+            if not os.listdir(os.path.join(root, 'build')):
+                raise RuntimeError("build.py 没有生成字体")
+        return samples
+
+    def bench_optimize(self, glyphs):
+        fontforge = require_executable('fontforge')
+        ttf = self.font_path(glyphs, 'ttf')
+        samples = []
+        for _ in range(self.repeat):
+            root = self.scratch_dir('optimize')
+            font = shutil.copy(ttf, root)
+            samples.append({'total': run_command(
+                [fontforge, '-script', os.path.join(TOOLS_DIR, 'optimize_glyph.py'), font])})
+        return samples
+
+    def bench_convert(self, glyphs):
+        fontforge = require_executable('fontforge')
+        ttf = self.font_path(glyphs, 'ttf')
+        samples = []
+        for _ in range(self.repeat):
+            root = self.scratch_dir('convert')
+            samples.append({'total': run_command(
+                [fontforge, '-script', os.path.join(TOOLS_DIR, 'convert_font.py'), ttf,
+                 '-f', 'woff2', '-o', os.path.join(root, 'out.woff2')])})
+        return samples
+
+    def bench_subset(self, glyphs):
+        import font_subset
+        if font_subset.subset is None:
+            raise Skipped("未安装 fontTools")
+        ttf = self.font_path(glyphs, 'ttf')
+        codepoints = glyph_codepoints(glyphs)
+        unicodes = random.Random(self.seed).sample(codepoints, min(SUBSET_SIZE, len(codepoints)))
+
+        samples = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            subsetter = font_subset.FontSubsetter(ttf)
+            loaded = time.perf_counter()
+            subsetter.subset_bytes(unicodes)
+            ttf_done = time.perf_counter()
+            subsetter.subset_bytes(unicodes, flavor='woff2')
+            woff2_done = time.perf_counter()
+            samples.append({
+                'total': woff2_done - start,
+                'load': loaded - start,
+                'ttf': ttf_done - loaded,
+                'woff2': woff2_done - ttf_done,
+            })
+        return samples
+
+    def run(self, benchmark, glyphs):
+        """执行一项测试，返回结果字典"""
+        result = {'benchmark': benchmark, 'glyphs': glyphs}
+        try:
+            samples = getattr(self, f"bench_{benchmark}")(glyphs)
+        except Skipped as e:
+            result.update(status='skipped', reason=str(e))
+            return result
+        except Exception as e:
+            result.update(status='failed', reason=str(e))
+            return result
+
+        totals = [sample['total'] for sample in samples]
+        result.update(
+            status='ok',
+            samples=samples,
+            best=min(totals),
+            median=statistics.median(totals),
+            per_glyph_ms=min(totals) / glyphs * 1000,
+        )
+        return result
+
+
+def load_results(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') != RESULT_FORMAT:
+        raise ValueError(f"不是基准测试结果文件: {path}")
+    return data
+
+
+def compare_results(baseline, current):
+    """输出两次结果中同一测试项的最佳耗时对比"""
+    previous = {(r['benchmark'], r['glyphs']): r for r in baseline['results'] if r['status'] == 'ok'}
+    print(f"\n与 {(baseline.get('commit') or '未知提交')[:10]} 对比：")
+    print(f"  {'测试项':<10}{'字形数':>8}{'基准 (s)':>12}{'当前 (s)':>12}{'变化':>10}")
+    for result in current['results']:
+        old = previous.get((result['benchmark'], result['glyphs']))
+        if result['status'] != 'ok' or old is None:
+            continue
+        change = (result['best'] / old['best'] - 1) * 100
+        print(f"  {result['benchmark']:<10}{result['glyphs']:>8}{old['best']:>12.3f}"
+              f"{result['best']:>12.3f}{change:>+9.1f}%")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='构建与工具链基准测试')
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)),
+                        help=f"合成字体的字形数，逗号分隔（默认：{','.join(map(str, DEFAULT_SCALES))}）")
+    parser.add_argument('--only', help=f"只运行指定的测试项，逗号分隔（可选：{','.join(BENCHMARKS)}）")
+    parser.add_argument('--strokes', type=int, default=DEFAULT_STROKES, help=f'每个字形的平均笔画数（默认：{DEFAULT_STROKES}）')
+    parser.add_argument('--seed', type=int, default=0, help='合成字体的随机种子（默认：0）')
+    parser.add_argument('--repeat', type=int, default=1, help='每项测试的重复次数（默认：1）')
+    parser.add_argument('--work-dir', help='工作目录，默认使用临时目录')
+    parser.add_argument('--keep', action='store_true', help='保留工作目录中生成的字体')
+    parser.add_argument('--output', '-o', help='结果 JSON 输出路径')
+    parser.add_argument('--compare', help='与之前的结果 JSON 对比')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if synthetic_font.FontBuilder is None:
+        print("错误: 未安装 fontTools，请先运行 pip3 install fonttools")
+        return 1
+
+    benchmarks = [name.strip() for name in args.only.split(',')] if args.only else list(BENCHMARKS)
+    unknown = [name for name in benchmarks if name not in BENCHMARKS]
+    if unknown:
+        print(f"错误: 未知的测试项: {', '.join(unknown)}")
+        return 1
+    scales = [int(scale) for scale in args.scales.split(',')]
+
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load_results(args.compare)
+        except (OSError, ValueError) as e:
+            print(f"错误: 无法读取对比结果: {e}")
+            return 1
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix='plangothic-bench-')
+    os.makedirs(work_dir, exist_ok=True)
+    runner = BenchmarkRunner(work_dir, args.strokes, args.seed, args.repeat)
+
+    commit, dirty = git_revision()
+    report = {
+        'format': RESULT_FORMAT,
+        'version': RESULT_VERSION,
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'host': host_info(),
+        'parameters': {'scales': scales, 'strokes': args.strokes, 'seed': args.seed, 'repeat': args.repeat},
+        'results': [],
+    }
+
+    try:
+        for glyphs in scales:
+            print(f"字形数 {glyphs}：")
+            for benchmark in benchmarks:
+                result = runner.run(benchmark, glyphs)
+                report['results'].append(result)
+                if result['status'] == 'ok':
+                    print(f"  ✓ {benchmark:<10} {result['best']:.3f} 秒 ({result['per_glyph_ms']:.3f} 毫秒/字形)")
+                else:
+                    print(f"  - {benchmark:<10} {result['status']}: {result['reason']}")
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        else:
+            shutil.rmtree(os.path.join(work_dir, 'runs'), ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已保存到 {args.output}")
+    if baseline:
+        compare_results(baseline, report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,6 +20,9 @@ Arguments 参数:
     -f, --format    Output format (default: woff2) 输出格式（默认：woff2）
     --family-name   Set font family name 设置字体族名称
     --version       Set font version number 设置字体版本号
+    --autohint      Run parallel ttfautohint on TTF output 对 TTF 输出执行并行自动 hinting
+    --hint-cache    Hinting cache directory hinting 缓存目录
+    --info          Show font info without loading glyphs 只显示字体信息（不加载字形，无需 FontForge）
 """
 
 import os
@@ -27,6 +30,7 @@ import sys
 import argparse
 import time
 import logging
+import subprocess
 from typing import Dict, Optional, Tuple, Any, List
 from pathlib import Path
 
@@ -55,6 +59,14 @@ FORMAT_FLAGS = {
     # 其他格式使用默认设置
 }
 
+# 自动 hinting 阶段在独立的 Python 进程中运行（FontForge 自带的 Python 环境通常没有 fontTools）
+AUTOHINT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ttf_autohint.py')
+AUTOHINT_PYTHON = os.environ.get('PYTHON', 'python3')
+
+# 字体信息只读取表目录与少数小表，不依赖 FontForge
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from font_loader import print_font_info
+
 try:
     import fontforge
 except ModuleNotFoundError:
@@ -67,7 +79,8 @@ class FontConverter:
     
     def __init__(self, input_path: str, output_path: Optional[str] = None, 
                  format_type: str = 'woff2', family_name: Optional[str] = None, 
-                 version: Optional[str] = None):
+                 version: Optional[str] = None, autohint: bool = False,
+                 hint_cache: Optional[str] = None):
         """
         初始化字体转换器
         
@@ -77,11 +90,15 @@ class FontConverter:
             format_type: 输出格式类型
             family_name: 字体族名称（可选）
             version: 字体版本号（可选）
+            autohint: 是否对 TTF 输出执行自动 hinting
+            hint_cache: hinting 缓存目录（可选）
         """
         self.input_path = input_path
         self.format_type = format_type
         self.family_name = family_name
         self.version = version
+        self.autohint = autohint
+        self.hint_cache = hint_cache
         
         # 如果未指定输出路径，根据输入文件名生成
         if not output_path:
@@ -172,6 +189,11 @@ class FontConverter:
             # 获取特定格式的标志，如果未定义则使用默认值
             flags = FORMAT_FLAGS.get(self.format_type, ())
             self.font.generate(self.output_path, flags=flags)
+
+            # 可选的自动 hinting 阶段
+            if self.autohint:
+                if not self._run_autohint():
+                    return False
     
             # 计算并显示统计信息
             self._show_conversion_stats(start_time)
@@ -189,6 +211,24 @@ class FontConverter:
                 except Exception:
                     pass
     
+    def _run_autohint(self) -> bool:
+        """对生成的 TTF 文件执行并行自动 hinting"""
+        if self.format_type != 'ttf':
+            logger.warning(f"自动 hinting 仅适用于 TTF 输出，已跳过 {self.format_type} 格式")
+            return True
+
+        logger.info("正在执行自动 hinting...")
+        cmd = [AUTOHINT_PYTHON, AUTOHINT_SCRIPT, self.output_path]
+        if self.hint_cache:
+            cmd.append(f'--cache-dir={self.hint_cache}')
+
+        try:
+            subprocess.run(cmd, check=True)
+            return True
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.error(f"自动 hinting 失败：{str(e)}")
+            return False
+
     def _show_conversion_stats(self, start_time: float) -> None:
         """显示转换统计信息"""
         end_time = time.time()
@@ -232,6 +272,9 @@ def parse_arguments() -> argparse.Namespace:
     )
     parser.add_argument('--family-name', help='设置字体族名称')
     parser.add_argument('--version', help='设置字体版本号')
+    parser.add_argument('--autohint', action='store_true', help='对 TTF 输出执行并行自动 hinting（需要 ttfautohint）')
+    parser.add_argument('--hint-cache', help='hinting 缓存目录（默认：.hint_cache）')
+    parser.add_argument('--info', action='store_true', help='只显示字体信息，不进行转换')
 
     return parser.parse_args()
 
@@ -242,13 +285,23 @@ def main() -> int:
     
     if not args.input_font:
         return 1
+
+    if args.info:
+        try:
+            print_font_info(args.input_font, logger.info)
+            return 0
+        except (OSError, ValueError, RuntimeError) as e:
+            logger.error(f"无法读取字体信息：{str(e)}")
+            return 1
         
     converter = FontConverter(
         args.input_font,
         args.output,
         args.format,
         args.family_name,
-        args.version
+        args.version,
+        args.autohint,
+        args.hint_cache
     )
     
     success = converter.convert()
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+corpus_scan.py - 语料字符扫描工具
+Streaming, parallel corpus scanning
+
+并行扫描目录、通配符或文件中的 UTF-8 文本，统计出现过的码位集合
+（位图形式）及可选的逐字频次。大文件按字节区间切分给多个进程，
+每个进程分块流式解码，内存占用与语料大小无关。
+
+Usage 使用方法:
+    python corpus_scan.py 语料目录/ "文章/**/*.txt" -o 字频.txt -j 8
+    python font_subset.py 原字体.ttf --text-file 语料目录/ "文章/**/*.md" -f woff2
+
+Library 库接口:
+    from corpus_scan import scan_corpus
+
+    codepoints, counts = scan_corpus(["语料目录/"], processes=8, with_counts=True)
+"""
+
+import argparse
+import codecs
+import glob
+import os
+from collections import Counter
+from multiprocessing import Pool, cpu_count
+
+# 每次读取的字节数
+READ_BLOCK_SIZE = 1 << 20
+# 单个任务处理的最大字节数，大文件会被切分为多个任务
+TASK_SIZE = 64 << 20
+# 不计入码位集合的字符（与 pyftsubset 一样忽略换行符，另忽略 BOM）
+IGNORED_CODEPOINTS = frozenset((0x0A, 0x0D, 0xFEFF))
+MAX_CODEPOINT = 0x10FFFF
+
+
+class CodepointBitmap:
+    """以位图表示的码位集合，每个码位占 1 bit（全部 Unicode 约 136 KB）"""
+
+    def __init__(self, data=None):
+        self.bits = bytearray(data) if data is not None else bytearray((MAX_CODEPOINT >> 3) + 1)
+
+    def update(self, codepoints):
+        bits = self.bits
+        for codepoint in codepoints:
+            bits[codepoint >> 3] |= 1 << (codepoint & 7)
+
+    def __ior__(self, other):
+        merged = int.from_bytes(self.bits, 'little') | int.from_bytes(other.bits, 'little')
+        self.bits = bytearray(merged.to_bytes(len(self.bits), 'little'))
+        return self
+
+    def __contains__(self, codepoint):
+        return 0 <= codepoint <= MAX_CODEPOINT and bool(self.bits[codepoint >> 3] & (1 << (codepoint & 7)))
+
+    def __iter__(self):
+        for index, byte in enumerate(self.bits):
+            if byte:
+                base = index << 3
+                for bit in range(8):
+                    if byte & (1 << bit):
+                        yield base + bit
+
+    def __len__(self):
+        return sum(bin(byte).count('1') for byte in self.bits if byte)
+
+
+def expand_inputs(patterns):
+    """将文件、目录与通配符展开为文件列表（去重并保持顺序）"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                files.extend(os.path.join(root, name) for name in sorted(names))
+        elif glob.has_magic(pattern):
+            files.extend(path for path in sorted(glob.glob(pattern, recursive=True)) if os.path.isfile(path))
+        elif os.path.isfile(pattern):
+            files.append(pattern)
+    return list(dict.fromkeys(files))
+
+
+def plan_tasks(files, task_size=TASK_SIZE):
+    """将文件按字节区间切分为扫描任务"""
+    tasks = []
+    for path in files:
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), task_size):
+            tasks.append((path, start, min(start + task_size, size)))
+    return tasks
+
+
+def _is_continuation(byte):
+    return 0x80 <= byte <= 0xBF
+
+
+def _scan_range(task):
+    """
+    扫描文件的一个字节区间，只统计起始字节位于 [start, end) 内的字符
+
+    Returns:
+        (码位位图字节, 频次字典或 None, 扫描字节数)
+    """
+    path, start, end, with_counts = task
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+    seen = set()
+    counts = Counter() if with_counts else None
+
+    with open(path, 'rb') as f:
+        f.seek(start)
+        position = start
+        # 跳过属于上一区间字符的延续字节
+        if start > 0:
+            head = f.read(4)
+            skip = 0
+            while skip < len(head) and _is_continuation(head[skip]):
+                skip += 1
+            position = start + skip
+            f.seek(position)
+
+        while position < end:
+            block = f.read(min(READ_BLOCK_SIZE, end - position))
+            if not block:
+                break
+            position += len(block)
+            if position >= end:
+                # 补全跨越区间末尾的字符
+                tail = f.read(4)
+                extra = 0
+                while extra < len(tail) and _is_continuation(tail[extra]):
+                    extra += 1
+                block += tail[:extra]
+            text = decoder.decode(block)
+            seen.update(text)
+            if counts is not None:
+                counts.update(text)
+        text = decoder.decode(b'', final=True)
+        seen.update(text)
+        if counts is not None:
+            counts.update(text)
+
+    bitmap = CodepointBitmap()
+    bitmap.update(cp for cp in map(ord, seen) if cp not in IGNORED_CODEPOINTS)
+    if counts is not None:
+        counts = {ord(char): count for char, count in counts.items() if ord(char) not in IGNORED_CODEPOINTS}
+    return bytes(bitmap.bits), counts, end - start
+
+
+def scan_corpus(patterns, processes=None, with_counts=False, task_size=TASK_SIZE):
+    """
+    扫描语料
+
+    Args:
+        patterns: 文件、目录或通配符列表
+        processes: 并行进程数（默认：CPU 核心数）
+        with_counts: 是否统计逐字频次
+        task_size: 单个任务处理的最大字节数
+
+    Returns:
+        (CodepointBitmap, Counter 或 None)
+
+    Raises:
+        FileNotFoundError: 未找到任何文件
+    """
+    files = expand_inputs(patterns)
+    if not files:
+        raise FileNotFoundError(f"未找到文本文件: {', '.join(patterns)}")
+
+    tasks = [(path, start, end, with_counts) for path, start, end in plan_tasks(files, task_size)]
+    bitmap = CodepointBitmap()
+    counts = Counter() if with_counts else None
+
+    def merge(result):
+        bits, task_counts, _ = result
+        nonlocal bitmap
+        bitmap |= CodepointBitmap(bits)
+        if counts is not None:
+            counts.update(task_counts)
+
+    num_processes = max(1, min(len(tasks), processes or cpu_count()))
+    if num_processes == 1:
+        for task in tasks:
+            merge(_scan_range(task))
+    else:
+        with Pool(processes=num_processes) as pool:
+            for result in pool.imap_unordered(_scan_range, tasks):
+                merge(result)
+
+    return bitmap, counts
+
+
+def write_frequency_file(counts, path):
+    """写出字频文件（每行：字符<TAB>次数，按次数从高到低；空白与控制字符写为 U+XXXX）"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for codepoint, count in sorted(counts.items(), key=lambda item: (-item[1], item[0])):
+            char = chr(codepoint)
+            token = char if char.isprintable() and not char.isspace() else f"U+{codepoint:04X}"
+            f.write(f"{token}\t{count}\n")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='语料字符扫描工具')
+    parser.add_argument('inputs', nargs='+', help='文本文件、目录或通配符（如 "语料/**/*.txt"）')
+    parser.add_argument('--output', '-o', help='字频输出文件路径（可用于 font_subset.py --frequency-file）')
+    parser.add_argument('--jobs', '-j', type=int, help='并行进程数，默认为CPU核心数', default=None)
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    try:
+        bitmap, counts = scan_corpus(args.inputs, args.jobs, with_counts=bool(args.output))
+    except FileNotFoundError as e:
+        print(f"错误: {e}")
+        return
+
+    print(f"扫描完成! 共 {len(bitmap)} 个不同的码位")
+    if args.output:
+        write_frequency_file(counts, args.output)
+        print(f"字频文件: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
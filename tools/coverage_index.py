@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+coverage_index.py - 多字体覆盖索引
+Precomputed codepoint -> font/glyph index for Plangothic P1/P2
+
+遍黑体分为 P1、P2 等多个字体文件。本工具在每次发布时为这些字体生成一个
+紧凑的覆盖索引文件，记录每个码位所在的字体与字形编号；查询时以 mmap 方式
+映射索引文件，单个码位的查询只需两次数组访问，不需要加载任何字体。
+
+索引文件格式 (.pgci，数值均为小端序):
+    头部: b'PGCI' | 版本 (u16) | 字体数 (u16) | 数据页数 (u16) | 保留 (u16)
+          | 字体表偏移 (u32) | 页表偏移 (u32) | 数据偏移 (u32)
+    字体表: 长度 (u32) | UTF-8 JSON 列表 [{file, size, digest, glyphs, codepoints}]
+    页表: 0x1100 个 u16，每页对应 256 个码位，0 表示该页没有任何字符
+    数据页: 每页 256 个 u32，高 8 位为字体序号加 1（0 表示缺字），低 24 位为字形编号
+
+同一码位出现在多个字体中时，以构建时先列出的字体为准。
+
+Usage 使用方法:
+    python coverage_index.py build PlangothicP1-Regular.ttf PlangothicP2-Regular.ttf -o Plangothic.pgci
+    python coverage_index.py query Plangothic.pgci -t "遍黑体𰻞"
+    python font_subset.py --index Plangothic.pgci -t "遍黑体𰻞" -f woff2 --output-dir web
+
+Library 库接口:
+    from coverage_index import CoverageIndex
+
+    with CoverageIndex("Plangothic.pgci") as index:
+        font, glyph_id = index.lookup(0x30EDE)
+        routes, missing = index.route(codepoints)
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+
+from font_loader import TTFont, MappedFont
+
+INDEX_MAGIC = b'PGCI'
+INDEX_VERSION = 1
+
+PAGE_BITS = 8
+PAGE_SIZE = 1 << PAGE_BITS
+NUM_PAGES = 0x110000 >> PAGE_BITS
+
+FONT_SHIFT = 24
+GLYPH_MASK = (1 << FONT_SHIFT) - 1
+MAX_FONTS = 0xFF
+
+HEADER = struct.Struct('<4sHHHHIII')
+
+
+def build_index(font_files, output_path):
+    """
+    为多个字体生成覆盖索引
+
+    Args:
+        font_files: 字体文件路径列表（靠前的字体优先）
+        output_path: 索引输出路径
+
+    Returns:
+        list: 每个字体的信息字典
+    """
+    if len(font_files) > MAX_FONTS:
+        raise ValueError(f"最多支持 {MAX_FONTS} 个字体")
+
+    index_dir = os.path.dirname(os.path.abspath(output_path))
+    entries = {}
+    fonts = []
+    for font_index, font_file in enumerate(font_files):
+        with MappedFont(font_file) as mapped:
+            # 只读取 cmap、post 等少数表，不加载字形数据
+            font = mapped.open()
+            cmap = font.getBestCmap() or {}
+            glyph_ids = font.getReverseGlyphMap()
+            added = 0
+            for codepoint, glyph_name in cmap.items():
+                if codepoint not in entries:
+                    entries[codepoint] = ((font_index + 1) << FONT_SHIFT) | glyph_ids[glyph_name]
+                    added += 1
+            fonts.append({
+                'file': os.path.relpath(os.path.abspath(font_file), index_dir),
+                'size': mapped.size,
+                'digest': mapped.digest,
+                'glyphs': len(font.getGlyphOrder()),
+                'codepoints': added,
+            })
+            font.close()
+
+    page_table = [0] * NUM_PAGES
+    pages = []
+    for codepoint in sorted(entries):
+        page = codepoint >> PAGE_BITS
+        if not page_table[page]:
+            pages.append([0] * PAGE_SIZE)
+            page_table[page] = len(pages)
+        pages[page_table[page] - 1][codepoint & (PAGE_SIZE - 1)] = entries[codepoint]
+
+    font_table = json.dumps(fonts, ensure_ascii=False).encode('utf-8')
+    fonts_offset = HEADER.size
+    pages_offset = fonts_offset + 4 + len(font_table)
+    pages_offset += -pages_offset % 4
+    data_offset = pages_offset + 2 * NUM_PAGES
+
+    tmp_path = f"{output_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, len(fonts), len(pages), 0,
+                            fonts_offset, pages_offset, data_offset))
+        f.write(struct.pack('<I', len(font_table)))
+        f.write(font_table)
+        f.write(b'\0' * (pages_offset - f.tell()))
+        f.write(struct.pack(f'<{NUM_PAGES}H', *page_table))
+        for page in pages:
+            f.write(struct.pack(f'<{PAGE_SIZE}I', *page))
+    os.replace(tmp_path, output_path)
+    return fonts
+
+
+class CoverageIndex:
+    """以 mmap 方式打开的覆盖索引"""
+
+    def __init__(self, index_path):
+        self.path = index_path
+        self.index_dir = os.path.dirname(os.path.abspath(index_path))
+        with open(index_path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, num_fonts, self.num_pages, _,
+         fonts_offset, self._pages_offset, self._data_offset) = HEADER.unpack_from(self._mmap, 0)
+        if magic != INDEX_MAGIC:
+            self.close()
+            raise ValueError(f"不是有效的覆盖索引文件: {index_path}")
+        if version != INDEX_VERSION:
+            self.close()
+            raise ValueError(f"不支持的覆盖索引版本: {version}")
+
+        length = struct.unpack_from('<I', self._mmap, fonts_offset)[0]
+        self.fonts = json.loads(self._mmap[fonts_offset + 4:fonts_offset + 4 + length].decode('utf-8'))
+        if len(self.fonts) != num_fonts:
+            self.close()
+            raise ValueError(f"覆盖索引文件已损坏: {index_path}")
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def font_path(self, font_index):
+        """返回字体文件的路径（相对于索引文件所在目录解析）"""
+        return os.path.join(self.index_dir, self.fonts[font_index]['file'])
+
+    def check_fonts(self):
+        """返回文件缺失或内容与构建时不一致的字体路径列表"""
+        stale = []
+        for font_index, font in enumerate(self.fonts):
+            path = self.font_path(font_index)
+            # 先比较大小，大小相同时再比较摘要（重新编译的字体可能大小不变）
+            if not os.path.exists(path) or os.path.getsize(path) != font['size']:
+                stale.append(path)
+                continue
+            with MappedFont(path) as mapped:
+                if mapped.digest != font['digest']:
+                    stale.append(path)
+        return stale
+
+    def _entry(self, codepoint):
+        if not 0 <= codepoint < NUM_PAGES << PAGE_BITS:
+            return 0
+        page = struct.unpack_from('<H', self._mmap, self._pages_offset + 2 * (codepoint >> PAGE_BITS))[0]
+        if not page:
+            return 0
+        offset = self._data_offset + 4 * ((page - 1) * PAGE_SIZE + (codepoint & (PAGE_SIZE - 1)))
+        return struct.unpack_from('<I', self._mmap, offset)[0]
+
+    def lookup(self, codepoint):
+        """
+        查询码位
+
+        Returns:
+            (字体序号, 字形编号)，缺字时返回 None
+        """
+        entry = self._entry(codepoint)
+        if not entry:
+            return None
+        return (entry >> FONT_SHIFT) - 1, entry & GLYPH_MASK
+
+    def __contains__(self, codepoint):
+        return bool(self._entry(codepoint))
+
+    def route(self, codepoints):
+        """
+        将码位按所在字体分组
+
+        Returns:
+            (dict: 字体序号 -> 排序后的码位列表, 缺字码位列表)
+        """
+        routes = {}
+        missing = []
+        for codepoint in sorted(set(codepoints)):
+            entry = self._entry(codepoint)
+            if entry:
+                routes.setdefault((entry >> FONT_SHIFT) - 1, []).append(codepoint)
+            else:
+                missing.append(codepoint)
+        return routes, missing
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='多字体覆盖索引工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='为字体生成覆盖索引')
+    build_parser.add_argument('fonts', nargs='+', help='字体文件（靠前的字体优先）')
+    build_parser.add_argument('--output', '-o', required=True, help='索引输出路径 (.pgci)')
+
+    query_parser = subparsers.add_parser('query', help='查询文本中各字符所在的字体')
+    query_parser.add_argument('index', help='覆盖索引文件')
+    query_parser.add_argument('--text', '-t', required=True, help='要查询的文本')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    if args.command == 'build':
+        if TTFont is None:
+            print("错误: 未安装 fontTools，请先运行 pip3 install fonttools")
+            sys.exit(1)
+        for font_file in args.fonts:
+            if not os.path.exists(font_file):
+                print(f"错误: 字体文件 '{font_file}' 不存在")
+                sys.exit(1)
+        fonts = build_index(args.fonts, args.output)
+        for font in fonts:
+            print(f"  {font['file']}: {font['codepoints']} 个码位, {font['glyphs']} 个字形")
+        print(f"覆盖索引生成完成! 输出文件: {args.output} ({os.path.getsize(args.output) / 1024:.2f} KB)")
+        return
+
+    with CoverageIndex(args.index) as index:
+        routes, missing = index.route(ord(char) for char in args.text)
+        for font_index, codepoints in sorted(routes.items()):
+            text = ''.join(chr(codepoint) for codepoint in codepoints)
+            print(f"{index.fonts[font_index]['file']}: {text}")
+        if missing:
+            print(f"缺字: {''.join(chr(codepoint) for codepoint in missing)}")
+
+
+if __name__ == "__main__":
+    main()
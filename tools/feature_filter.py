@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+feature_filter.py - 按字形过滤 OpenType 特性文件
+Filter a features.fea down to the glyphs kept in a partial font
+
+分区编译或只提取部分字形时，features.fea 中的规则可能引用不在当前字体中的
+字形。本模块用 feaLib 解析特性文件，逐条规则过滤：字形类只保留存在的字形，
+一一对应的替换（sub a by b、sub [a b] by [c d]、rsub）按字形对过滤，
+其余规则中某个位置的字形全部不存在时删除整条规则；字形类定义保留（可能为空），
+标记类的定义全部被删除时，引用它的锚点也一并删除。
+
+substitution_map 返回替换规则的输入字形到输出字形的映射，
+font_partition.py 用它把未编码的替换字形（vert、locl 等）分配到使用它们的分区。
+
+Library 库接口:
+    from feature_filter import parse_features, filter_features, substitution_map
+
+    doc = parse_features(text, glyph_names, include_dir="PlangothicP1-Regular.ufo")
+    alternates = substitution_map(doc)        # {"uni3001": {"uni3001.vert"}, ...}
+    text, dropped = filter_features(doc, {"uni3001", "uni3001.vert", ...})
+"""
+
+import io
+
+from fontTools.feaLib import ast
+from fontTools.feaLib.error import FeatureLibError
+from fontTools.feaLib.parser import Parser
+
+GLYPH_CONTAINERS = (ast.GlyphName, ast.GlyphClass, ast.GlyphClassName)
+# 不算作规则的语句：所有规则都被删除的 lookup 视为空 lookup
+NON_RULES = (ast.Comment, ast.LookupFlagStatement, ast.ScriptStatement,
+             ast.LanguageStatement, ast.SubtableStatement)
+# 一一对应的替换：输入与输出字形按顺序配对
+PAIRED_SUBSTITUTIONS = (ast.SingleSubstStatement, ast.ReverseChainSingleSubstStatement)
+
+
+class FeatureFilterError(ValueError):
+    """特性文件无法解析"""
+
+
+def parse_features(text, glyph_names=(), include_dir=None):
+    """
+    解析特性文件（include 的文件会被内联）
+
+    Args:
+        text: features.fea 的内容
+        glyph_names: 字体中的所有字形名称，用于区分含连字符的字形名称与字形范围
+        include_dir: include 语句的相对路径基准目录（通常是 .ufo 目录）
+    """
+    try:
+        return Parser(io.StringIO(text), glyphNames=glyph_names, includeDir=include_dir).parse()
+    except (FeatureLibError, OSError) as e:
+        raise FeatureFilterError(str(e)) from e
+
+
+def iter_statements(statements):
+    """按顺序遍历所有语句（包括 feature、lookup、table 块中的语句）"""
+    for statement in statements:
+        if isinstance(statement, ast.Block):
+            yield from iter_statements(statement.statements)
+        else:
+            yield statement
+
+
+def _pairs(statement):
+    """一一对应替换的 (输入, 输出) 字形对"""
+    glyphs = statement.glyphs[0].glyphSet()
+    replacements = statement.replacements[0].glyphSet()
+    if len(replacements) == 1:
+        replacements = replacements * len(glyphs)
+    return list(zip(glyphs, replacements))
+
+
+def substitution_map(doc):
+    """
+    替换规则的输入字形 -> 输出字形集合
+
+    只包括单个、多个、可选与反向链接替换；连字的输出字形需要所有组成字形同时存在，
+    不计入映射。
+    """
+    mapping = {}
+    for statement in iter_statements(doc.statements):
+        if isinstance(statement, PAIRED_SUBSTITUTIONS):
+            pairs = _pairs(statement)
+        elif isinstance(statement, ast.MultipleSubstStatement):
+            outputs = [name for replacement in statement.replacement for name in replacement.glyphSet()]
+            pairs = [(glyph, output) for glyph in statement.glyph.glyphSet() for output in outputs]
+        elif isinstance(statement, ast.AlternateSubstStatement):
+            pairs = [(glyph, output) for glyph in statement.glyph.glyphSet()
+                     for output in statement.replacement.glyphSet()]
+        else:
+            continue
+        for glyph, output in pairs:
+            if glyph != output:
+                mapping.setdefault(glyph, set()).add(output)
+    return mapping
+
+
+class _Filter:
+    """按保留的字形集合改写语法树"""
+
+    # 表示某个位置的字形全部不存在
+    EMPTY = object()
+
+    def __init__(self, glyphs):
+        self.glyphs = glyphs
+        self.mark_classes = set()
+        self.empty_mark_definitions = set()
+        self.class_definitions = []
+        self.empty_lookups = set()
+        self.dropped = 0
+
+    def container(self, container):
+        """过滤字形或字形类，全部不存在时返回 None；未改变时保留原对象（包括类名引用）"""
+        names = container.glyphSet()
+        kept = [name for name in names if name in self.glyphs]
+        if not kept:
+            return None
+        if len(kept) == len(names):
+            return container
+        return ast.GlyphClass(kept)
+
+    def value(self, value):
+        """过滤语句属性中的字形引用；任一位置为空时返回 EMPTY"""
+        if isinstance(value, GLYPH_CONTAINERS):
+            result = self.container(value)
+            return self.EMPTY if result is None else result
+        if isinstance(value, ast.MarkClass):
+            return value if value.name in self.mark_classes else self.EMPTY
+        if isinstance(value, (list, tuple)):
+            items = [self.value(item) for item in value]
+            if any(item is self.EMPTY for item in items):
+                return self.EMPTY
+            return type(value)(items)
+        return value
+
+    def marks(self, marks):
+        """删除引用空标记类的 (锚点, 标记类)"""
+        return [(anchor, mark_class) for anchor, mark_class in marks if mark_class.name in self.mark_classes]
+
+    def mark_class_definition(self, statement):
+        glyphs = self.container(statement.glyphs)
+        if glyphs is None:
+            self.empty_mark_definitions.add(id(statement))
+        else:
+            statement.glyphs = glyphs
+            self.mark_classes.add(statement.markClass.name)
+
+    def statement(self, statement):
+        """就地过滤一条语句，返回是否保留"""
+        if isinstance(statement, ast.GlyphClassDefinition):
+            # 规则按原来的类成员配对，所有语句处理完后再过滤类定义
+            self.class_definitions.append(statement)
+            return True
+        if isinstance(statement, ast.MarkClassDefinition):
+            return id(statement) not in self.empty_mark_definitions
+        if isinstance(statement, ast.LookupFlagStatement):
+            for attribute in ('markAttachment', 'markFilteringSet'):
+                value = getattr(statement, attribute)
+                if value is not None:
+                    setattr(statement, attribute, self.container(value) or ast.GlyphClass([]))
+            return True
+        if isinstance(statement, ast.GlyphClassDefStatement):
+            for attribute in ('baseGlyphs', 'markGlyphs', 'ligatureGlyphs', 'componentGlyphs'):
+                value = getattr(statement, attribute)
+                if value is not None:
+                    setattr(statement, attribute, self.container(value))
+            return True
+
+        if isinstance(statement, PAIRED_SUBSTITUTIONS):
+            pairs = [(glyph, replacement) for glyph, replacement in _pairs(statement)
+                     if glyph in self.glyphs and replacement in self.glyphs]
+            if not pairs:
+                return False
+            if len(pairs) < len(statement.glyphs[0].glyphSet()):
+                statement.glyphs = [ast.GlyphClass([glyph for glyph, _ in pairs])]
+                # sub [a b] by c 的输出只有一个字形，保持不变
+                if len(statement.replacements[0].glyphSet()) > 1:
+                    statement.replacements = [ast.GlyphClass([replacement for _, replacement in pairs])]
+        elif isinstance(statement, ast.LigatureSubstStatement):
+            if statement.replacement not in self.glyphs:
+                return False
+        elif isinstance(statement, (ast.MarkBasePosStatement, ast.MarkMarkPosStatement)):
+            statement.marks = self.marks(statement.marks)
+            if not statement.marks:
+                return False
+        elif isinstance(statement, ast.MarkLigPosStatement):
+            statement.marks = [self.marks(component) for component in statement.marks]
+            if not any(statement.marks):
+                return False
+        elif isinstance(statement, (ast.IgnoreSubstStatement, ast.IgnorePosStatement)):
+            contexts = [self.value(context) for context in statement.chainContexts]
+            statement.chainContexts = [context for context in contexts if context is not self.EMPTY]
+            return bool(statement.chainContexts)
+        elif isinstance(statement, (ast.ChainContextSubstStatement, ast.ChainContextPosStatement)):
+            statement.lookups = [
+                [lookup for lookup in lookups if lookup.name not in self.empty_lookups] or None
+                if lookups else lookups
+                for lookups in statement.lookups
+            ]
+            if not any(statement.lookups):
+                return False
+        elif isinstance(statement, ast.LookupReferenceStatement):
+            return statement.lookup.name not in self.empty_lookups
+
+        # 通用处理：语句属性中的字形与字形类
+        updates = {}
+        for attribute, value in vars(statement).items():
+            if attribute in ('location', 'lookups', 'marks', 'chainContexts'):
+                continue
+            result = self.value(value)
+            if result is self.EMPTY:
+                return False
+            updates[attribute] = result
+        for attribute, value in updates.items():
+            setattr(statement, attribute, value)
+        return True
+
+    def block(self, statements):
+        """过滤语句列表，返回 (保留的语句, 是否还有规则)"""
+        kept = []
+        has_rules = False
+        for statement in statements:
+            if isinstance(statement, ast.Block):
+                statement.statements, block_rules = self.block(statement.statements)
+                if isinstance(statement, ast.LookupBlock) and not block_rules:
+                    # 空 lookup 不能被上下文规则引用，删除 lookup 及对它的引用
+                    self.empty_lookups.add(statement.name)
+                    continue
+                has_rules = has_rules or block_rules
+                kept.append(statement)
+            elif self.statement(statement):
+                kept.append(statement)
+                has_rules = has_rules or not isinstance(statement, NON_RULES)
+            else:
+                self.dropped += 1
+        return kept, has_rules
+
+    def finish(self):
+        """过滤字形类定义（可能被其他语句按名称引用，为空时也保留）"""
+        filtered = [
+            [name for name in definition.glyphs.glyphSet() if name in self.glyphs]
+            for definition in self.class_definitions
+        ]
+        for definition, glyphs in zip(self.class_definitions, filtered):
+            definition.glyphs = ast.GlyphClass(glyphs)
+
+
+def filter_features(doc, glyphs):
+    """
+    只保留引用的字形都存在的规则
+
+    Args:
+        doc: parse_features 返回的语法树（会被就地修改）
+        glyphs: 保留的字形名称集合
+
+    Returns:
+        (过滤后的特性文件文本, 删除的语句数)
+    """
+    glyph_filter = _Filter(set(glyphs))
+
+    # 标记类可以分多条语句定义，先确定哪些标记类仍有字形
+    for statement in iter_statements(doc.statements):
+        if isinstance(statement, ast.MarkClassDefinition):
+            glyph_filter.mark_class_definition(statement)
+
+    doc.statements, _ = glyph_filter.block(doc.statements)
+    glyph_filter.finish()
+    return doc.asFea(), glyph_filter.dropped
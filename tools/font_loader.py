@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+font_loader.py - 按需加载的字体读取层
+Lazy, memory-mapped font loading
+
+以 mmap 方式映射字体文件，表数据在第一次访问时才读取和解码。
+多个进程映射同一文件时共享系统页缓存，不会各自复制一份完整字体；
+只需要少数几个表（大小统计、cmap 查询、名称与版本信息）的操作
+不会读取 glyf 等大表。
+
+font_info 只解析 sfnt 表目录与 name/head/maxp 表，不依赖 fontTools，
+可以在 FontForge 自带的 Python 环境中使用。
+
+Usage 使用方法:
+    python font_loader.py PlangothicP1-Regular.ttf PlangothicP2-Regular.ttf
+
+Library 库接口:
+    from font_loader import MappedFont, font_info
+
+    with MappedFont("PlangothicP1-Regular.ttf") as mapped:
+        cmap = mapped.open().getBestCmap()   # 只读取 cmap 及其依赖的表
+        glyf_size = len(mapped.table_data("glyf"))
+
+    info = font_info("PlangothicP1-Regular.ttf")
+"""
+
+import io
+import os
+import mmap
+import struct
+import hashlib
+import argparse
+
+try:
+    from fontTools.ttLib import TTFont
+except ModuleNotFoundError:
+    TTFont = None
+
+# sfnt 文件头中的版本标识
+SFNT_VERSIONS = (b'\x00\x01\x00\x00', b'OTTO', b'true')
+WOFF_SIGNATURES = {b'wOFF': 'woff', b'wOF2': 'woff2'}
+
+# name 表中读取的名称编号
+NAME_IDS = {1: 'family', 2: 'style', 4: 'full_name', 5: 'version', 6: 'postscript_name'}
+
+
+class MappedFile(io.RawIOBase):
+    """映射内存上的只读文件对象，各自维护读取位置，可由多个 TTFont 同时使用"""
+
+    def __init__(self, buffer, name=None):
+        super().__init__()
+        self._buffer = buffer
+        self._position = 0
+        # TTFont.save 以此判断是否在覆盖正在读取的文件
+        self.name = name
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._position = offset
+        elif whence == io.SEEK_CUR:
+            self._position += offset
+        else:
+            self._position = len(self._buffer) + offset
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def read(self, size=-1):
+        end = len(self._buffer) if size is None or size < 0 else self._position + size
+        data = self._buffer[self._position:end]
+        self._position += len(data)
+        return data
+
+    def readinto(self, target):
+        data = self.read(len(target))
+        target[:len(data)] = data
+        return len(data)
+
+
+class MappedFont:
+    """以 mmap 方式打开的字体文件"""
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._tables = None
+        self._digest = None
+
+    def close(self):
+        self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def flavor(self):
+        """woff、woff2 或 None（未压缩的 sfnt）"""
+        return WOFF_SIGNATURES.get(self._mmap[:4])
+
+    @property
+    def digest(self):
+        """字体文件内容的 SHA-256 摘要"""
+        if self._digest is None:
+            self._digest = hashlib.sha256(self._mmap).hexdigest()
+        return self._digest
+
+    @property
+    def tables(self):
+        """
+        sfnt 表目录
+
+        Returns:
+            dict: 表标签 -> (偏移, 长度)
+        """
+        if self._tables is None:
+            self._tables = read_table_directory(self._mmap)
+        return self._tables
+
+    def table_data(self, tag):
+        """返回表的原始数据（memoryview，不复制）"""
+        offset, length = self.tables[tag]
+        return memoryview(self._mmap)[offset:offset + length]
+
+    def open(self, lazy=True):
+        """
+        基于映射数据打开一个新的 TTFont 对象
+
+        Args:
+            lazy: 为 True 时表与字形在访问时才解码，为 None 时表在访问时整体解码
+        """
+        if TTFont is None:
+            raise RuntimeError("未安装 fontTools，请先运行 pip3 install fonttools")
+        return TTFont(MappedFile(self._mmap, self.path), lazy=lazy)
+
+
+def load_font(path, lazy=True):
+    """
+    以 mmap 方式打开字体并返回 TTFont 对象（映射在 TTFont 释放后随之释放）
+
+    Args:
+        lazy: 传给 TTFont；需要保存回原文件时使用 None（表在访问时整体解码）
+    """
+    if TTFont is None:
+        raise RuntimeError("未安装 fontTools，请先运行 pip3 install fonttools")
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return TTFont(MappedFile(buffer, path), lazy=lazy)
+
+
+def read_table_directory(data):
+    """解析 sfnt 表目录，返回 表标签 -> (偏移, 长度)"""
+    if data[:4] not in SFNT_VERSIONS:
+        if data[:4] in WOFF_SIGNATURES:
+            raise ValueError("WOFF/WOFF2 字体的表数据经过压缩，无法直接映射")
+        if data[:4] == b'ttcf':
+            raise ValueError("暂不支持字体集合 (TTC)")
+        raise ValueError("不是有效的 sfnt 字体文件")
+
+    num_tables = struct.unpack_from('>H', data, 4)[0]
+    tables = {}
+    for index in range(num_tables):
+        tag, _, offset, length = struct.unpack_from('>4sIII', data, 12 + 16 * index)
+        tables[tag.decode('latin-1')] = (offset, length)
+    return tables
+
+
+def _decode_name(platform_id, data):
+    if platform_id in (0, 3):
+        return data.decode('utf-16-be', 'replace')
+    return data.decode('latin-1')
+
+
+def read_names(name_data):
+    """从 name 表中读取常用名称，优先使用英文 Windows 记录"""
+    count, string_offset = struct.unpack_from('>2xHH', name_data, 0)
+    candidates = {}
+    for index in range(count):
+        platform_id, encoding_id, language_id, name_id, length, offset = \
+            struct.unpack_from('>6H', name_data, 6 + 12 * index)
+        if name_id not in NAME_IDS:
+            continue
+        rank = (platform_id != 3, language_id != 0x409, platform_id != 1)
+        if name_id not in candidates or rank < candidates[name_id][0]:
+            start = string_offset + offset
+            candidates[name_id] = (rank, _decode_name(platform_id, bytes(name_data[start:start + length])))
+    return {NAME_IDS[name_id]: value for name_id, (_, value) in candidates.items()}
+
+
+def font_info(path):
+    """
+    读取字体的基本信息，只访问表目录与 name、head、maxp 表
+
+    Returns:
+        dict: size、flavor、tables（表标签 -> 长度）、num_glyphs、revision 及名称信息
+    """
+    with MappedFont(path) as mapped:
+        info = {'size': mapped.size, 'flavor': mapped.flavor}
+        if mapped.flavor:
+            # 压缩格式需解压后才能读取表，交给 fontTools 处理
+            font = mapped.open()
+            try:
+                info['tables'] = {tag: len(font.reader[tag]) for tag in sorted(font.reader.keys())}
+                info['num_glyphs'] = font['maxp'].numGlyphs
+                info['revision'] = round(font['head'].fontRevision, 3)
+                info.update(read_names(font.getTableData('name')))
+            finally:
+                font.close()
+            return info
+
+        info['tables'] = {tag: length for tag, (_, length) in sorted(mapped.tables.items())}
+        info['num_glyphs'] = struct.unpack_from('>H', mapped.table_data('maxp'), 4)[0]
+        info['revision'] = round(struct.unpack_from('>i', mapped.table_data('head'), 4)[0] / 65536, 3)
+        if 'name' in mapped.tables:
+            info.update(read_names(mapped.table_data('name')))
+        return info
+
+
+def print_font_info(path, log=print):
+    """输出字体基本信息"""
+    info = font_info(path)
+    log(f"{path}")
+    for key, label in (('family', '字体族'), ('style', '样式')):
+        if key in info:
+            log(f"  {label}：{info[key]}")
+    log(f"  版本：{info.get('version', info['revision'])}")
+    log(f"  字形数：{info['num_glyphs']}")
+    log(f"  文件大小：{info['size'] / 1024:.2f} KB")
+    log("  表大小：")
+    for tag, length in sorted(info['tables'].items(), key=lambda item: -item[1]):
+        log(f"    {tag:<4} {length / 1024:>12.2f} KB")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='字体信息查看工具（按需读取，不加载字形数据）')
+    parser.add_argument('fonts', nargs='+', help='字体文件路径')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    for path in args.fonts:
+        try:
+            print_font_info(path)
+        except (OSError, ValueError, RuntimeError) as e:
+            print(f"错误: 无法读取 '{path}': {e}")
+
+
+if __name__ == "__main__":
+    main()
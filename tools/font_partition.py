@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+font_partition.py - 字体分区规划工具
+Font partition planner for the glyph limit and compile memory budgets
+
+读取 .ufoz 源文件（或 glyph_store.py 生成的 .pgs 二进制字形库），
+把每个源文件的字形划分为若干个输出字体：
+每个分区的字形数不超过 65535（TrueType 字形编号上限），估算的 fontmake 编译内存
+不超过给定预算，同一 Unicode 区块的字形尽量放在同一分区（区块本身超出限制时
+才按码位顺序切开），并在满足限制的前提下使各分区的估算文件大小尽量均衡。
+
+不需要拆分的源文件整体作为一个分区（保留 features.fea）。
+分区按码位顺序连续划分；复合字形引用的组件、features.fea 中替换规则输出的
+未编码字形（vert、locl 等）会复制到每个用到它们的分区，其余未编码且未被引用的
+字形放在第一个分区，.notdef 出现在每个分区中。各分区的 features.fea 只保留
+引用的字形都在该分区中的规则；特性文件无法解析时需要指定 --drop-features 才会拆分。
+
+输出的规划文件 (JSON) 记录每个分区的字形列表与资源估算，由 sources/build.py --plan
+读取后并行编译各分区；也可以用 --write-ufoz 直接写出拆分后的 .ufoz。
+
+内存与大小估算按轮廓点数线性计算，默认系数在合成 CJK 源文件上用 fontmake
+实测得到，可以用 --memory-per-point 等参数按实际机器重新校准。
+
+Usage 使用方法:
+    python font_partition.py PlangothicP1-Regular.ufoz PlangothicP2-Regular.ufoz -o partition.json
+    python font_partition.py PlangothicP1-Regular.ufoz --memory-budget 4096 -o partition.json
+    python font_partition.py PlangothicP1-Regular.ufoz -o partition.json --write-ufoz split/
+"""
+
+import os
+import json
+import shutil
+import zipfile
+import argparse
+import tempfile
+
+from ufoz import open_source, UfozError, component_closure, extract_glyphs
+from feature_filter import FeatureFilterError, parse_features, substitution_map
+from unicode_blocks import block_of
+
+PLAN_FORMAT = 'plangothic-partition-plan'
+PLAN_VERSION = 1
+
+# TrueType 字形编号为 16 位，numGlyphs 最大 65535
+MAX_GLYPHS = 65535
+DEFAULT_MEMORY_BUDGET = 8192  # MB
+
+# fontmake 编译内存 ≈ 基础内存 + 每个轮廓点的内存（合成源文件实测：
+# 2000 字 / 14.8 万点约 144 MB，8000 字 / 59.7 万点约 291 MB）
+BASE_MEMORY = 96  # MB
+MEMORY_PER_POINT = 340  # 字节
+# 编译后的 TTF 中每个源文件轮廓点与每个字形大约占用的字节数
+SIZE_PER_POINT = 4.3
+SIZE_PER_GLYPH = 16
+
+# 分区名称后缀：PlangothicP1-Regular -> PlangothicP1A-Regular、PlangothicP1B-Regular ...
+PARTITION_SUFFIXES = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+
+
+class Estimator:
+    """按点数与字形数估算编译内存 (MB) 与文件大小（字节）"""
+
+    def __init__(self, base_memory=BASE_MEMORY, memory_per_point=MEMORY_PER_POINT,
+                 size_per_point=SIZE_PER_POINT, size_per_glyph=SIZE_PER_GLYPH):
+        self.base_memory = base_memory
+        self.memory_per_point = memory_per_point
+        self.size_per_point = size_per_point
+        self.size_per_glyph = size_per_glyph
+
+    def memory(self, glyphs, points):
+        return self.base_memory + points * self.memory_per_point / (1024 * 1024)
+
+    def size(self, glyphs, points):
+        return points * self.size_per_point + glyphs * self.size_per_glyph
+
+
+class Unit:
+    """分区的最小单位：一个 Unicode 区块（或超出限制的区块的一段）"""
+
+    def __init__(self, block, entries):
+        self.block = block
+        self.entries = entries  # [(码位, 字形名称)]，按码位排序；未编码字形的码位为 None
+        self.glyphs = set()     # 包含组件在内的所有字形
+
+    @property
+    def first(self):
+        return self.entries[0][0]
+
+
+def read_source(source):
+    """读取源文件中所有字形的码位、点数与组件引用"""
+    return {info.name: info for info in source.iter_glyph_info()}
+
+
+def read_alternates(source, infos, drop_features=False, log=print):
+    """
+    features.fea 中替换规则的输入字形 -> 未编码的输出字形
+
+    输出字形已编码时由它自己的码位决定所在分区，引用它的规则在其他分区中被删除。
+    """
+    if not source.exists('features.fea'):
+        return {}
+    try:
+        doc = parse_features(source.read('features.fea').decode('utf-8'), set(infos))
+    except FeatureFilterError as e:
+        if not drop_features:
+            raise ValueError(f"无法解析 {source.path} 中的 features.fea: {e}"
+                             f"（指定 --drop-features 可在拆分时省略特性文件）") from e
+        log(f"警告: 无法解析 {source.path} 中的 features.fea，拆分后的分区将不包含 OpenType 特性")
+        return {}
+    return {
+        glyph: [output for output in outputs if output in infos and not infos[output].unicodes]
+        for glyph, outputs in substitution_map(doc).items()
+    }
+
+
+def make_units(infos, log=print):
+    """
+    将已编码字形按 Unicode 区块分组
+
+    Returns:
+        (按首个码位排序的 Unit 列表, 未编码字形名称列表)
+    """
+    blocks = {}
+    owners = {}
+    unencoded = []
+    for name, info in infos.items():
+        codepoints = [codepoint for codepoint in info.unicodes if codepoint not in owners]
+        for codepoint in codepoints:
+            owners[codepoint] = name
+        if not info.unicodes:
+            unencoded.append(name)
+        elif codepoints:
+            blocks.setdefault(block_of(min(codepoints)), []).append((min(codepoints), name))
+    duplicates = sum(1 for info in infos.values() if info.unicodes and
+                     all(owners[codepoint] != info.name for codepoint in info.unicodes))
+    if duplicates:
+        log(f"警告: {duplicates} 个字形的码位已被其他字形占用，按第一个字形分配")
+
+    units = [Unit(block, sorted(entries)) for block, entries in blocks.items()]
+    units.sort(key=lambda unit: unit.first)
+    return units, unencoded
+
+
+def unit_cost(glyphs, infos):
+    return len(glyphs), sum(infos[name].points for name in glyphs)
+
+
+def split_unit(unit, closure_of, infos, shared, max_glyphs, memory_budget, estimator):
+    """区块超出字形数或内存限制时，按码位顺序均分为若干段，每段连同共享字形都不超出限制"""
+    def fits(glyphs):
+        count, points = unit_cost(glyphs | shared, infos)
+        return count <= max_glyphs and estimator.memory(count, points) <= memory_budget
+
+    def split(parts):
+        pieces = []
+        size = -(-len(unit.entries) // parts)
+        for index in range(0, len(unit.entries), size):
+            block = unit.block if parts == 1 else f"{unit.block} ({index // size + 1}/{parts})"
+            piece = Unit(block, unit.entries[index:index + size])
+            for _, name in piece.entries:
+                piece.glyphs |= closure_of(name)
+            pieces.append(piece)
+        return pieces
+
+    glyphs = set()
+    for _, name in unit.entries:
+        glyphs |= closure_of(name)
+    count, points = unit_cost(glyphs, infos)
+    # 先按平均值估算段数，再逐段检查：各段的组件与点数并不均匀
+    parts = 1
+    while (count / parts > max_glyphs or
+           estimator.memory(count / parts, points / parts) > memory_budget) and parts < len(unit.entries):
+        parts += 1
+    pieces = split(parts)
+    while not all(fits(piece.glyphs) for piece in pieces) and parts < len(unit.entries):
+        parts += 1
+        pieces = split(parts)
+
+    if not all(fits(piece.glyphs) for piece in pieces):
+        raise ValueError(f"区块 {unit.block} 中单个字形（连同组件与共享字形）已超出分区限制")
+    return pieces
+
+
+def pack(units, shared, infos, max_glyphs, memory_budget, size_limit, estimator):
+    """
+    按顺序把区块连续装入分区，超出任一限制时开始新分区；
+    单个区块超出字形数或内存限制时抛出 ValueError
+
+    Returns:
+        [[Unit, ...], ...]
+    """
+    partitions = []
+    current, glyphs = [], set(shared)
+    for unit in units:
+        merged = glyphs | unit.glyphs
+        count, points = unit_cost(merged, infos)
+        fits = (count <= max_glyphs and estimator.memory(count, points) <= memory_budget and
+                estimator.size(count, points) <= size_limit)
+        if current and not fits:
+            partitions.append(current)
+            current, merged = [], set(shared) | unit.glyphs
+            count, points = unit_cost(merged, infos)
+        if count > max_glyphs or estimator.memory(count, points) > memory_budget:
+            # 单个区块（已由 split_unit 拆分到单个字形的闭包）本身就超出限制
+            raise ValueError(f"区块 {unit.block} 有 {count} 个字形，估算编译内存 "
+                             f"{estimator.memory(count, points):.0f} MB，超出了分区限制")
+        current.append(unit)
+        glyphs = merged
+    if current:
+        partitions.append(current)
+    return partitions
+
+
+def plan_source(source, max_glyphs=MAX_GLYPHS, memory_budget=DEFAULT_MEMORY_BUDGET,
+                estimator=None, drop_features=False, log=print):
+    """
+    规划一个源文件的分区
+
+    分区数取满足限制的最小值；在该分区数下二分查找最小的单分区大小上限，
+    使最大分区尽量小，从而均衡各分区的文件大小。
+
+    Returns:
+        list: 分区字典（不含名称），每个包含 blocks、ranges、glyphs 及估算值
+    """
+    estimator = estimator or Estimator()
+    infos = read_source(source)
+    alternates = read_alternates(source, infos, drop_features, log)
+
+    closures = {}
+
+    def components_of(name):
+        if name not in infos:
+            return []
+        return [component for component in infos[name].components if component in infos] + alternates.get(name, [])
+
+    def closure_of(name):
+        if name not in closures:
+            closures[name] = component_closure([name], components_of)
+        return closures[name]
+
+    units, unencoded = make_units(infos, log)
+    shared = {'.notdef'} & set(infos)
+    pieces = []
+    for unit in units:
+        pieces.extend(split_unit(unit, closure_of, infos, shared, max_glyphs, memory_budget, estimator))
+
+    # 未编码且未被任何已编码字形引用的字形作为单独的区块，同样按限制拆分后参与装箱
+    referenced = set()
+    for piece in pieces:
+        referenced |= piece.glyphs
+    orphans = [name for name in unencoded if name not in referenced and name not in shared]
+    if orphans:
+        unit = Unit('Unencoded', [(None, name) for name in orphans])
+        pieces.extend(split_unit(unit, closure_of, infos, shared, max_glyphs, memory_budget, estimator))
+
+    unlimited = float('inf')
+    partitions = pack(pieces, shared, infos, max_glyphs, memory_budget, unlimited, estimator)
+
+    # 二分查找均衡分区大小的上限
+    if len(partitions) > 1:
+        low = max(estimator.size(*unit_cost(piece.glyphs | shared, infos)) for piece in pieces)
+        high = estimator.size(*unit_cost(set().union(shared, *(piece.glyphs for piece in pieces)), infos))
+        target = len(partitions)
+        while high - low > 1024:
+            middle = (low + high) / 2
+            if len(pack(pieces, shared, infos, max_glyphs, memory_budget, middle, estimator)) <= target:
+                high = middle
+            else:
+                low = middle
+        partitions = pack(pieces, shared, infos, max_glyphs, memory_budget, high, estimator)
+
+    order = {name: index for index, name in enumerate(source.glyph_order)}
+    results = []
+    for partition in partitions:
+        glyphs = set(shared).union(*(unit.glyphs for unit in partition))
+        count, points = unit_cost(glyphs, infos)
+        codepoints = [codepoint for unit in partition for codepoint, _ in unit.entries if codepoint is not None]
+        results.append({
+            'blocks': [unit.block for unit in partition],
+            'ranges': format_ranges(codepoints),
+            'glyph_count': count,
+            'encoded_glyphs': len(codepoints),
+            'points': points,
+            'estimated_memory_mb': round(estimator.memory(count, points)),
+            'estimated_size_kb': round(estimator.size(count, points) / 1024),
+            'glyphs': sorted(glyphs, key=lambda name: order.get(name, len(order))),
+        })
+    return results
+
+
+def format_ranges(codepoints):
+    """将码位列表压缩为 "4E00-9FFF" 形式的连续范围"""
+    ranges = []
+    for codepoint in sorted(codepoints):
+        if ranges and ranges[-1][1] == codepoint - 1:
+            ranges[-1][1] = codepoint
+        else:
+            ranges.append([codepoint, codepoint])
+    return [f"{start:04X}-{end:04X}" if start != end else f"{start:04X}" for start, end in ranges]
+
+
+def partition_fontinfo(source, suffix):
+    """
+    分区字体的 fontinfo 字段：在家族名与 PostScript 名称的家族部分后加上后缀
+
+    Returns:
+        (分区名称, 需要覆盖的 fontinfo 字段)
+    """
+    info = source.read_plist('fontinfo.plist', {})
+    stem = os.path.splitext(os.path.basename(source.path))[0]
+    family, _, style = stem.partition('-')
+    name = f"{family}{suffix}-{style}" if style else f"{family}{suffix}"
+
+    overrides = {}
+    for key in ('familyName', 'styleMapFamilyName', 'openTypeNamePreferredFamilyName'):
+        if key in info:
+            overrides[key] = f"{info[key]}{suffix}"
+    if 'postscriptFontName' in info:
+        ps_family, _, ps_style = info['postscriptFontName'].partition('-')
+        overrides['postscriptFontName'] = f"{ps_family}{suffix}-{ps_style}" if ps_style else f"{ps_family}{suffix}"
+    if 'postscriptFullName' in info and 'familyName' in info:
+        overrides['postscriptFullName'] = info['postscriptFullName'].replace(info['familyName'], overrides['familyName'], 1)
+    return name, overrides
+
+
+def make_plan(ufoz_files, max_glyphs=MAX_GLYPHS, memory_budget=DEFAULT_MEMORY_BUDGET, estimator=None,
+              drop_features=False, log=print):
+    """规划所有源文件的分区，返回规划字典"""
+    estimator = estimator or Estimator()
+    partitions = []
+    for ufoz_file in ufoz_files:
+        with open_source(ufoz_file) as source:
+            results = plan_source(source, max_glyphs, memory_budget, estimator, drop_features, log)
+            if len(results) > len(PARTITION_SUFFIXES):
+                raise ValueError(f"{ufoz_file} 需要 {len(results)} 个分区，超过了命名上限")
+            for index, result in enumerate(results):
+                if len(results) == 1:
+                    name, overrides = os.path.splitext(os.path.basename(ufoz_file))[0], {}
+                else:
+                    name, overrides = partition_fontinfo(source, PARTITION_SUFFIXES[index])
+                partitions.append(dict({'name': name, 'source': os.path.abspath(ufoz_file),
+                                        'complete': len(results) == 1, 'fontinfo': overrides,
+                                        'drop_features': drop_features}, **result))
+
+    return {
+        'format': PLAN_FORMAT,
+        'version': PLAN_VERSION,
+        'limits': {'max_glyphs': max_glyphs, 'memory_budget_mb': memory_budget},
+        'estimator': vars(estimator),
+        'partitions': partitions,
+    }
+
+
+def load_plan(path):
+    """读取规划文件"""
+    with open(path, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    if plan.get('format') != PLAN_FORMAT or plan.get('version') != PLAN_VERSION:
+        raise ValueError(f"{path} 不是有效的分区规划文件")
+    return plan
+
+
+def write_partition_ufoz(partition, output_dir, log=print):
+    """将一个分区提取并打包为 .ufoz（不需要拆分的 .ufoz 源文件直接复制）"""
+    output_path = os.path.join(output_dir, f"{partition['name']}.ufoz")
+    if partition['complete']:
+        if partition['source'].lower().endswith('.pgs'):
+            with open_source(partition['source']) as source:
+                source.export_ufoz(output_path)
+        else:
+            shutil.copyfile(partition['source'], output_path)
+        return output_path
+    work_dir = tempfile.mkdtemp(dir=output_dir)
+    try:
+        ufo_dir, _ = extract_glyphs(partition['source'], partition['glyphs'], work_dir,
+                                    fontinfo=partition['fontinfo'],
+                                    drop_features=partition.get('drop_features', False), log=log)
+        root = f"{partition['name']}.ufo"
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for directory, _, files in os.walk(ufo_dir):
+                for filename in sorted(files):
+                    path = os.path.join(directory, filename)
+                    archive.write(path, '/'.join([root, os.path.relpath(path, ufo_dir).replace(os.sep, '/')]))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return output_path
+
+
+def print_plan(plan):
+    limits = plan['limits']
+    print(f"分区规划：字形数上限 {limits['max_glyphs']}，内存预算 {limits['memory_budget_mb']} MB")
+    for partition in plan['partitions']:
+        print(f"  {partition['name']}: {partition['glyph_count']} 个字形"
+              f"（已编码 {partition['encoded_glyphs']}），估算内存 {partition['estimated_memory_mb']} MB，"
+              f"估算大小 {partition['estimated_size_kb'] / 1024:.1f} MB")
+        blocks = partition['blocks']
+        shown = ', '.join(blocks[:4]) + (f" 等 {len(blocks)} 个区块" if len(blocks) > 4 else '')
+        print(f"    {os.path.basename(partition['source'])}: {shown}")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='字体分区规划工具')
+    parser.add_argument('ufoz_files', nargs='+', help='.ufoz 源文件或 .pgs 二进制字形库路径')
+    parser.add_argument('--output', '-o', required=True, help='规划文件 (JSON) 输出路径')
+    parser.add_argument('--max-glyphs', type=int, default=MAX_GLYPHS, help=f'每个分区的字形数上限（默认：{MAX_GLYPHS}）')
+    parser.add_argument('--memory-budget', type=int, default=DEFAULT_MEMORY_BUDGET,
+                        help=f'每个分区的编译内存预算，单位 MB（默认：{DEFAULT_MEMORY_BUDGET}）')
+    parser.add_argument('--base-memory', type=float, default=BASE_MEMORY, help=f'fontmake 基础内存，单位 MB（默认：{BASE_MEMORY}）')
+    parser.add_argument('--memory-per-point', type=float, default=MEMORY_PER_POINT,
+                        help=f'每个轮廓点的编译内存，单位字节（默认：{MEMORY_PER_POINT}）')
+    parser.add_argument('--write-ufoz', metavar='DIR', help='同时将各分区写出为 .ufoz')
+    parser.add_argument('--drop-features', action='store_true',
+                        help='features.fea 无法解析时仍然拆分，拆分后的分区不包含 OpenType 特性')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if args.max_glyphs > MAX_GLYPHS:
+        print(f"错误: 字形数上限不能超过 {MAX_GLYPHS}")
+        return
+
+    estimator = Estimator(args.base_memory, args.memory_per_point)
+    try:
+        plan = make_plan(args.ufoz_files, args.max_glyphs, args.memory_budget, estimator, args.drop_features)
+    except (OSError, zipfile.BadZipFile, UfozError, ValueError) as e:
+        print(f"错误: {e}")
+        return
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, ensure_ascii=False, indent=2)
+    print_plan(plan)
+    print(f"规划文件: {args.output}")
+
+    if args.write_ufoz:
+        os.makedirs(args.write_ufoz, exist_ok=True)
+        for partition in plan['partitions']:
+            print(f"已写出: {write_partition_ufoz(partition, args.write_ufoz)}")
+
+
+if __name__ == "__main__":
+    main()
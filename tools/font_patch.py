@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+font_patch.py - 字体增量补丁工具
+Base-plus-patch font states for progressive loading
+
+在保留字形编号（retain-gids）的子集状态之间生成增量补丁：
+glyf 表只记录新增或改变的字形数据，其他表只在内容改变时整表替换。
+客户端先加载基础子集，再按顺序应用补丁即可扩展字符覆盖范围，
+不会重复下载已有的字形。
+
+补丁文件格式:
+    b'PGFP' | 压缩方式 (u8: 0=无, 1=zlib, 2=brotli) | 压缩后的补丁正文
+    正文: 版本 (u16) | 条目数 (u16) | 源状态摘要 (32B) | 目标状态摘要 (32B)
+          | 目标 sfnt 版本 (u32) | 条目...
+    条目: 表标签 (4B) | 类型 (u8: 0=替换整表, 1=glyf 增量, 2=删除表) | 长度 (u32) | 数据
+    glyf 增量数据: 目标字形数 (u32) | 记录数 (u32) | 记录: 字形编号 (u32) | 长度 (u32) | 字形数据
+
+Usage 使用方法:
+    python font_patch.py 基础子集.ttf 补丁1.bin 补丁2.bin -o 扩展后.ttf
+
+Library 库接口:
+    from font_patch import create_patch, apply_patch, state_digest
+
+    patch = create_patch(base_bytes, target_bytes)
+    assert state_digest(apply_patch(base_bytes, patch)) == state_digest(target_bytes)
+"""
+
+import argparse
+import hashlib
+import struct
+import zlib
+from collections import OrderedDict
+
+try:
+    import brotli
+except ModuleNotFoundError:
+    brotli = None
+
+PATCH_MAGIC = b'PGFP'
+PATCH_VERSION = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_BROTLI = 2
+COMPRESSION_NAMES = {COMPRESSION_NONE: 'none', COMPRESSION_ZLIB: 'zlib', COMPRESSION_BROTLI: 'brotli'}
+
+ENTRY_REPLACE = 0
+ENTRY_GLYF_DELTA = 1
+ENTRY_REMOVE = 2
+
+
+class PatchError(Exception):
+    """补丁无法应用（源状态不匹配或数据损坏）"""
+
+
+def read_tables(font_bytes):
+    """
+    解析 sfnt 表目录
+
+    Returns:
+        (sfnt 版本, OrderedDict: 表标签 -> 表数据)
+    """
+    sfnt_version, num_tables = struct.unpack('>IH', font_bytes[:6])
+    tables = OrderedDict()
+    for index in range(num_tables):
+        record = font_bytes[12 + 16 * index:28 + 16 * index]
+        tag, _, offset, length = struct.unpack('>4sIII', record)
+        tables[tag.decode('latin-1')] = bytes(font_bytes[offset:offset + length])
+    return sfnt_version, tables
+
+
+def _table_checksum(data):
+    padded = data + b'\0' * (-len(data) % 4)
+    return sum(struct.unpack(f'>{len(padded) // 4}I', padded)) & 0xFFFFFFFF
+
+
+def build_sfnt(sfnt_version, tables):
+    """按表标签顺序组装 sfnt 字体文件"""
+    tags = sorted(tables)
+    num_tables = len(tags)
+    entry_selector = max(0, num_tables.bit_length() - 1)
+    search_range = (1 << entry_selector) * 16
+    range_shift = num_tables * 16 - search_range
+
+    header = struct.pack('>IHHHH', sfnt_version, num_tables, search_range, entry_selector, range_shift)
+    offset = 12 + 16 * num_tables
+    records = []
+    body = []
+    for tag in tags:
+        data = tables[tag]
+        records.append(struct.pack('>4sIII', tag.encode('latin-1'), _table_checksum(data), offset, len(data)))
+        padded = data + b'\0' * (-len(data) % 4)
+        body.append(padded)
+        offset += len(padded)
+    return header + b''.join(records) + b''.join(body)
+
+
+def state_digest(font_or_tables):
+    """计算字体状态摘要（对各表数据按标签排序后哈希，与表在文件中的排列无关）"""
+    tables = read_tables(font_or_tables)[1] if isinstance(font_or_tables, (bytes, bytearray)) else font_or_tables
+    h = hashlib.sha256()
+    for tag in sorted(tables):
+        h.update(tag.encode('latin-1'))
+        h.update(struct.pack('>I', len(tables[tag])))
+        h.update(tables[tag])
+    return h.digest()
+
+
+def split_glyphs(tables):
+    """按 loca 表将 glyf 表拆分为每个字形的原始数据（含填充）"""
+    num_glyphs = struct.unpack('>H', tables['maxp'][4:6])[0]
+    long_format = struct.unpack('>h', tables['head'][50:52])[0] == 1
+    loca = tables['loca']
+    if long_format:
+        offsets = struct.unpack(f'>{num_glyphs + 1}I', loca[:4 * (num_glyphs + 1)])
+    else:
+        offsets = [v * 2 for v in struct.unpack(f'>{num_glyphs + 1}H', loca[:2 * (num_glyphs + 1)])]
+    glyf = tables['glyf']
+    return [glyf[offsets[i]:offsets[i + 1]] for i in range(num_glyphs)]
+
+
+def join_glyphs(glyphs, long_format):
+    """将字形数据拼接为 glyf 表并生成对应的 loca 表"""
+    offsets = [0]
+    for data in glyphs:
+        offsets.append(offsets[-1] + len(data))
+    glyf = b''.join(glyphs)
+    if long_format:
+        loca = struct.pack(f'>{len(offsets)}I', *offsets)
+    else:
+        loca = struct.pack(f'>{len(offsets)}H', *(v // 2 for v in offsets))
+    return glyf, loca
+
+
+def _compress(data, compression):
+    if compression == COMPRESSION_BROTLI:
+        return brotli.compress(data, quality=11)
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compress(data, 9)
+    return data
+
+
+def _decompress(data, compression):
+    if compression == COMPRESSION_BROTLI:
+        if brotli is None:
+            raise PatchError("补丁使用 brotli 压缩，请先安装 brotli")
+        return brotli.decompress(data)
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(data)
+    if compression == COMPRESSION_NONE:
+        return data
+    raise PatchError(f"未知的压缩方式: {compression}")
+
+
+def default_compression():
+    """有 brotli 时使用 brotli，否则使用 zlib"""
+    return COMPRESSION_BROTLI if brotli is not None else COMPRESSION_ZLIB
+
+
+def create_patch(base_bytes, target_bytes, compression=None):
+    """
+    生成从基础状态到目标状态的补丁
+
+    两个状态必须由同一字体以保留字形编号的方式子集化得到。
+
+    Returns:
+        bytes: 补丁文件数据
+    """
+    if compression is None:
+        compression = default_compression()
+
+    _, base_tables = read_tables(base_bytes)
+    target_version, target_tables = read_tables(target_bytes)
+
+    entries = []
+    if 'glyf' in target_tables:
+        base_glyphs = split_glyphs(base_tables) if 'glyf' in base_tables else []
+        target_glyphs = split_glyphs(target_tables)
+        records = [
+            struct.pack('>II', gid, len(data)) + data
+            for gid, data in enumerate(target_glyphs)
+            if gid >= len(base_glyphs) or base_glyphs[gid] != data
+        ]
+        delta = struct.pack('>II', len(target_glyphs), len(records)) + b''.join(records)
+        entries.append(('glyf', ENTRY_GLYF_DELTA, delta))
+
+    for tag, data in target_tables.items():
+        if tag in ('glyf', 'loca'):
+            continue
+        if base_tables.get(tag) != data:
+            entries.append((tag, ENTRY_REPLACE, data))
+
+    for tag in base_tables:
+        if tag not in target_tables:
+            entries.append((tag, ENTRY_REMOVE, b''))
+
+    body = [
+        struct.pack('>HH', PATCH_VERSION, len(entries)),
+        state_digest(base_tables),
+        state_digest(target_tables),
+        struct.pack('>I', target_version),
+    ]
+    for tag, kind, data in entries:
+        body.append(struct.pack('>4sBI', tag.encode('latin-1'), kind, len(data)))
+        body.append(data)
+
+    return PATCH_MAGIC + bytes([compression]) + _compress(b''.join(body), compression)
+
+
+def read_patch_header(patch_bytes):
+    """
+    读取补丁头部信息
+
+    Returns:
+        dict: version、compression、base_digest、target_digest
+    """
+    if patch_bytes[:4] != PATCH_MAGIC:
+        raise PatchError("不是有效的字体补丁文件")
+    compression = patch_bytes[4]
+    body = _decompress(patch_bytes[5:], compression)
+    version, _ = struct.unpack('>HH', body[:4])
+    return {
+        'version': version,
+        'compression': COMPRESSION_NAMES.get(compression, str(compression)),
+        'base_digest': body[4:36].hex(),
+        'target_digest': body[36:68].hex(),
+    }
+
+
+def apply_patch(base_bytes, patch_bytes):
+    """
+    将补丁应用到基础状态
+
+    Returns:
+        bytes: 目标状态的字体数据
+
+    Raises:
+        PatchError: 基础状态与补丁不匹配或结果校验失败
+    """
+    if patch_bytes[:4] != PATCH_MAGIC:
+        raise PatchError("不是有效的字体补丁文件")
+    body = _decompress(patch_bytes[5:], patch_bytes[4])
+
+    version, num_entries = struct.unpack('>HH', body[:4])
+    if version != PATCH_VERSION:
+        raise PatchError(f"不支持的补丁版本: {version}")
+    base_digest = body[4:36]
+    target_digest = body[36:68]
+    target_version = struct.unpack('>I', body[68:72])[0]
+
+    _, tables = read_tables(base_bytes)
+    if state_digest(tables) != base_digest:
+        raise PatchError("基础状态与补丁不匹配")
+
+    glyf_delta = None
+    position = 72
+    for _ in range(num_entries):
+        tag, kind, length = struct.unpack('>4sBI', body[position:position + 9])
+        tag = tag.decode('latin-1')
+        position += 9
+        data = body[position:position + length]
+        position += length
+
+        if kind == ENTRY_REPLACE:
+            tables[tag] = data
+        elif kind == ENTRY_REMOVE:
+            tables.pop(tag, None)
+        elif kind == ENTRY_GLYF_DELTA:
+            glyf_delta = data
+        else:
+            raise PatchError(f"未知的补丁条目类型: {kind}")
+
+    if glyf_delta is not None:
+        # head 与 maxp 已替换为目标状态，拆分字形时需使用基础状态的 loca 格式与字形数
+        _, base_tables = read_tables(base_bytes)
+        glyphs = split_glyphs(base_tables) if 'glyf' in base_tables else []
+
+        num_glyphs, num_records = struct.unpack('>II', glyf_delta[:8])
+        glyphs = (glyphs + [b''] * num_glyphs)[:num_glyphs]
+        offset = 8
+        for _ in range(num_records):
+            gid, length = struct.unpack('>II', glyf_delta[offset:offset + 8])
+            offset += 8
+            glyphs[gid] = glyf_delta[offset:offset + length]
+            offset += length
+
+        long_format = struct.unpack('>h', tables['head'][50:52])[0] == 1
+        tables['glyf'], tables['loca'] = join_glyphs(glyphs, long_format)
+
+    if state_digest(tables) != target_digest:
+        raise PatchError("应用补丁后的字体校验失败")
+    return build_sfnt(target_version, tables)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='字体增量补丁工具：将补丁依次应用到基础子集')
+    parser.add_argument('base', help='基础子集字体文件')
+    parser.add_argument('patches', nargs='+', help='按顺序应用的补丁文件')
+    parser.add_argument('--output', '-o', required=True, help='输出字体文件路径')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    with open(args.base, 'rb') as f:
+        font_bytes = f.read()
+
+    for patch_path in args.patches:
+        with open(patch_path, 'rb') as f:
+            patch_bytes = f.read()
+        try:
+            font_bytes = apply_patch(font_bytes, patch_bytes)
+        except PatchError as e:
+            print(f"错误: 无法应用补丁 '{patch_path}': {e}")
+            return
+        print(f"✓ 已应用补丁: {patch_path}")
+
+    with open(args.output, 'wb') as f:
+        f.write(font_bytes)
+    print(f"输出文件: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
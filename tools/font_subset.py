@@ -3,37 +3,738 @@
 
 """
 font_subset.py - 字体子集化工具
-使用 fonttools 中的 pyftsubset 功能创建字体子集
+使用 fonttools 中的 fontTools.subset 在进程内创建字体子集
 
 Usage 使用方法:
     python font_subset.py 原字体.ttf -u 4E00-9FFF,3000-303F -f woff2
     python font_subset.py 原字体.ttf -t "这是要包含的中文文本" -f woff2
     python font_subset.py 原字体.ttf --text-file 文本内容.txt -f woff2
+    python font_subset.py 原字体.ttf --text-file 语料目录/ "文章/**/*.md" -f woff2 -j 8
+    python font_subset.py 原字体.ttf --manifest 子集清单.json --output-dir 输出目录 -j 8
+    python font_subset.py 原字体.ttf --shard --frequency-file 字频.txt --output-dir web
+    python font_subset.py 原字体.ttf --text-file 文本内容.txt -f woff2 --cache-dir .subset_cache
+    python font_subset.py 原字体.ttf --incremental -t "基础文本" --patch-size 2000 --output-dir web
+    python font_subset.py --index Plangothic.pgci --text-file 文章/ -f woff2 --output-dir web
+
+Library 库接口:
+    from font_subset import FontSubsetter, parse_unicodes, text_to_unicodes
+
+    subsetter = FontSubsetter("原字体.ttf")   # 只映射一次源字体
+    subsetter.subset(text_to_unicodes("文本"), "a.woff2", flavor="woff2")
+    subsetter.subset(parse_unicodes("4E00-4EFF"), "b.woff2", flavor="woff2")
+
+Manifest 清单格式:
+    JSON: {"名称": {"text": "...", "unicodes": "4E00-4EFF", "flavor": "woff2"}, ...}
+          或 [{"name": "名称", "text": "...", "text_file": "...", "flavor": "woff2"}, ...]
+    CSV:  带表头 name,text,unicodes,text_file,flavor,layout_features 的表格
+
+Shard 分片模式:
+    按 Unicode 区块（以及可选的字频数据）将字体拆分为多个小 WOFF2 文件，
+    文件名包含内容哈希，并生成带 unicode-range 的 @font-face CSS，
+    浏览器只会下载页面实际用到的分片。
+    字频文件每行一个字符（或 U+XXXX），可选第二列为出现次数；
+    没有次数时按行序视为频率从高到低。
+
+Incremental 增量模式:
+    生成一个基础子集（-u/-t/--text-file 指定的字符）和一串增量补丁，
+    每个补丁在前一状态的基础上加入一组字形（--patch-unicodes、--patch-text-file
+    或按 --patch-size 将字体剩余字符按字频/区块切分），并生成码位到补丁的清单。
+    客户端只需下载新增字形的数据即可扩展覆盖范围，补丁格式见 font_patch.py。
+
+Index 多字体模式:
+    使用 coverage_index.py 生成的覆盖索引，将文本中的字符分配到 P1、P2 等
+    各自所在的字体，一次运行并行生成所有需要的子集，索引中没有的字符会被列出。
+
+Cache 缓存:
+    指定 --cache-dir 后，子集结果按源字体哈希、码位集合、OpenType 特性、
+    输出格式与 notdef 选项缓存在磁盘上，重复请求直接复制已有结果。
 """
 
 import argparse
+import csv
+import hashlib
+import io
+import json
 import os
-import subprocess
+from multiprocessing import Pool, cpu_count
 from pathlib import Path
 
+from corpus_scan import expand_inputs, scan_corpus, write_frequency_file
+from coverage_index import CoverageIndex
+from font_loader import MappedFont
+from font_patch import COMPRESSION_NAMES, create_patch, default_compression, state_digest
+from subset_cache import SubsetCache, subset_cache_key
+from unicode_blocks import block_slug, group_by_block
+
+try:
+    from fontTools import subset
+except ModuleNotFoundError:
+    subset = None
+
+# 批量模式下每个工作进程持有的子集化器与缓存
+_worker_font_file = None
+_worker_subsetter = None
+_worker_cache = None
+_worker_digest = None
+
+# 分片模式的默认参数
+DEFAULT_SHARD_SIZE = 500
+DEFAULT_COMMON_COUNT = 3000
+
+# 子集缓存的默认容量（MB）
+DEFAULT_CACHE_SIZE = 2048
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description='字体子集化工具')
-    parser.add_argument('font_file', help='原始字体文件路径')
+    parser.add_argument('font_file', nargs='?', help='原始字体文件路径（使用 --index 时可省略）')
     parser.add_argument('--output', '-o', help='输出文件路径，默认为原文件名加上"_subset"后缀', default=None)
     parser.add_argument('--flavor', '-f', help='输出格式 (woff, woff2)', default=None)
     parser.add_argument('--unicodes', '-u', help='Unicode范围，例如：U+4E00-U+9FFF,U+3000-U+303F')
     parser.add_argument('--text', '-t', help='要包含的文本')
-    parser.add_argument('--text-file', help='包含要子集化文本的文件路径')
+    parser.add_argument('--text-file', nargs='+', help='包含要子集化文本的文件、目录或通配符（可指定多个，并行流式扫描）')
+    parser.add_argument('--frequency-output', help='将 --text-file 语料的字频写入此文件')
     parser.add_argument('--layout-features', help='要保留的OpenType特性，例如：kern,liga')
-    
+    parser.add_argument('--manifest', help='批量子集化清单文件 (JSON 或 CSV)')
+    parser.add_argument('--output-dir', help='批量模式的输出目录，默认为原字体所在目录', default=None)
+    parser.add_argument('--jobs', '-j', type=int, help='批量模式的并行进程数，默认为CPU核心数', default=None)
+    parser.add_argument('--shard', action='store_true', help='分片模式：按 Unicode 区块拆分字体并生成 CSS')
+    parser.add_argument('--shard-size', type=int, help=f'每个分片的最大码位数，默认为{DEFAULT_SHARD_SIZE}', default=DEFAULT_SHARD_SIZE)
+    parser.add_argument('--frequency-file', help='字频文件，高频字符会被优先放入公共分片')
+    parser.add_argument('--common-count', type=int, help=f'放入公共分片的高频字符数，默认为{DEFAULT_COMMON_COUNT}', default=DEFAULT_COMMON_COUNT)
+    parser.add_argument('--css-family', help='CSS 中的 font-family 名称，默认为字体的族名称')
+    parser.add_argument('--url-prefix', help='CSS 中分片文件 URL 的前缀', default='')
+    parser.add_argument('--incremental', action='store_true', help='增量模式：生成基础子集与增量补丁链')
+    parser.add_argument('--patch-unicodes', action='append', help='增量模式：一个补丁包含的 Unicode 范围（可多次指定，按顺序生成补丁）')
+    parser.add_argument('--patch-text-file', action='append', help='增量模式：一个补丁包含的文本文件（可多次指定）')
+    parser.add_argument('--patch-size', type=int, help='增量模式：将字体其余字符按每个补丁的码位数切分', default=None)
+    parser.add_argument('--index', help='多字体覆盖索引 (.pgci)：按索引将字符分配到各字体并分别子集化')
+    parser.add_argument('--cache-dir', help='子集结果缓存目录，不指定时不使用缓存', default=None)
+    parser.add_argument('--cache-size', type=int, help=f'子集结果缓存容量 (MB)，默认为{DEFAULT_CACHE_SIZE}', default=DEFAULT_CACHE_SIZE)
+
     return parser.parse_args()
 
+def parse_unicodes(spec):
+    """解析 Unicode 范围字符串（如 U+4E00-U+9FFF,3000-303F），返回码位集合"""
+    if isinstance(spec, (list, tuple, set, frozenset)):
+        return {int(u, 16) if isinstance(u, str) else int(u) for u in spec}
+    cleaned = spec.replace("U+", "").replace("u+", "")
+    return set(subset.parse_unicodes(cleaned))
+
+def text_to_unicodes(text):
+    """将文本转换为码位集合（与 pyftsubset 一样忽略换行符）"""
+    return {ord(c) for c in text if c not in '\r\n'}
+
+def font_digest(path):
+    """计算字体文件内容的 SHA-256 摘要"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def open_cache(args):
+    """根据命令行参数创建子集缓存，未指定缓存目录时返回 None"""
+    if not args.cache_dir:
+        return None
+    return SubsetCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+def read_text_file(path):
+    """读取文本文件并返回其中的码位集合"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return text_to_unicodes(f.read())
+
+class FontSubsetter:
+    """
+    在进程内创建字体子集，源字体只映射一次并可重复使用
+
+    复用的是映射后的文件数据与 cmap：fontTools 的子集化会原地修改字体对象，
+    每个任务仍需重新打开字体，并重新解码用到的 cmap、hmtx、GSUB/GPOS 等表
+    （只有 glyf 按字形延迟解码）。多码位的大字体上这部分解码占单个任务耗时的
+    相当一部分，批量模式省下的主要是进程启动与读取文件的开销。
+    """
+
+    def __init__(self, font_file):
+        """
+        Args:
+            font_file: 原始字体文件路径
+        """
+        if subset is None:
+            raise RuntimeError("未安装 fontTools，请先运行 pip3 install fonttools brotli")
+
+        self.font_file = font_file
+        # 以 mmap 方式映射源字体：多个工作进程共享页缓存，表与字形按需读取和解码
+        self.mapped = MappedFont(font_file)
+        font = self.open_font()
+        self.cmap = font.getBestCmap()
+        font.close()
+
+    @property
+    def digest(self):
+        """源字体内容的 SHA-256 摘要"""
+        return self.mapped.digest
+
+    def open_font(self):
+        """基于映射的字体数据打开一个新的 TTFont 对象"""
+        return self.mapped.open()
+
+    @staticmethod
+    def make_options(flavor=None, layout_features=None, retain_gids=False):
+        """构建与原 pyftsubset 命令行参数一致的子集化选项"""
+        options = subset.Options()
+        options.notdef_outline = True
+        options.notdef_glyph = True
+        options.retain_gids = retain_gids
+        if flavor:
+            options.flavor = flavor
+        if layout_features:
+            if isinstance(layout_features, str):
+                layout_features = [f.strip() for f in layout_features.split(',') if f.strip()]
+            options.layout_features = list(layout_features)
+        return options
+
+    def subset(self, unicodes, output_path, flavor=None, layout_features=None, retain_gids=False):
+        """
+        创建字体子集并保存
+
+        Args:
+            unicodes: 要保留的码位集合
+            output_path: 输出文件路径
+            flavor: 输出格式 (woff, woff2)，None 表示与原字体一致
+            layout_features: 要保留的 OpenType 特性
+            retain_gids: 是否保留原字体的字形编号
+
+        Returns:
+            int: 输出文件大小（字节）
+        """
+        data = self.subset_bytes(unicodes, flavor, layout_features, retain_gids)
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        # 先写临时文件再替换：输出文件可能是其他进程正在读取的旧结果，不能原地改写
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, output_path)
+        return len(data)
+
+    def subset_bytes(self, unicodes, flavor=None, layout_features=None, retain_gids=False):
+        """创建字体子集并以字节串形式返回"""
+        options = self.make_options(flavor, layout_features, retain_gids)
+        font = self.open_font()
+        # 保留源字体的 head.modified：相同的字体与参数总是生成相同的字节，
+        # 分片文件名与增量补丁链中的内容哈希才能跨多次运行保持不变
+        font.recalcTimestamp = False
+        subsetter = subset.Subsetter(options=options)
+        subsetter.populate(unicodes=unicodes)
+        subsetter.subset(font)
+
+        buffer = io.BytesIO()
+        subset.save_font(font, buffer, options)
+        font.close()
+        return buffer.getvalue()
+
+def load_manifest(manifest_path):
+    """读取批量子集化清单，返回任务列表"""
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+
+    if manifest_path.lower().endswith('.csv'):
+        with open(manifest_path, 'r', encoding='utf-8', newline='') as f:
+            entries = [dict(row) for row in csv.DictReader(f)]
+    else:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            entries = [dict(spec, name=name) for name, spec in data.items()]
+        else:
+            entries = list(data)
+
+    jobs = []
+    for entry in entries:
+        name = entry.get('name')
+        if not name:
+            raise ValueError(f"清单条目缺少名称: {entry}")
+
+        unicodes = set()
+        if entry.get('unicodes'):
+            unicodes |= parse_unicodes(entry['unicodes'])
+        if entry.get('text'):
+            unicodes |= text_to_unicodes(entry['text'])
+        if entry.get('text_file'):
+            unicodes |= read_text_file(os.path.join(base_dir, entry['text_file']))
+        if not unicodes:
+            raise ValueError(f"清单条目 '{name}' 未指定任何字符 (text, unicodes 或 text_file)")
+
+        jobs.append({
+            'name': name,
+            'unicodes': sorted(unicodes),
+            'flavor': entry.get('flavor') or None,
+            'layout_features': entry.get('layout_features') or None,
+        })
+    return jobs
+
+def _init_worker(font_file, cache_dir=None, cache_bytes=None, digest=None):
+    """工作进程初始化：源字体在第一次未命中缓存时加载，之后一直复用"""
+    global _worker_font_file, _worker_subsetter, _worker_cache, _worker_digest
+    _worker_font_file = font_file
+    _worker_subsetter = None
+    _worker_cache = SubsetCache(cache_dir, cache_bytes) if cache_dir else None
+    _worker_digest = digest
+
+def _run_job(job):
+    """在工作进程中执行单个子集化任务"""
+    global _worker_subsetter
+    try:
+        key = None
+        if _worker_cache:
+            key = subset_cache_key(job.get('digest', _worker_digest), job['unicodes'], job['flavor'], job['layout_features'],
+                                   retain_gids=job.get('retain_gids', False))
+            if _worker_cache.fetch(key, job['output']):
+                return job['name'], job['output'], os.path.getsize(job['output']), None
+
+        if 'font_file' in job:
+            # 多字体任务：每个字体只处理一次，不在进程中保留
+            subsetter = FontSubsetter(job['font_file'])
+        else:
+            if _worker_subsetter is None:
+                _worker_subsetter = FontSubsetter(_worker_font_file)
+            subsetter = _worker_subsetter
+        size = subsetter.subset(job['unicodes'], job['output'], job['flavor'],
+                                job['layout_features'], job.get('retain_gids', False))
+        if key:
+            _worker_cache.store_file(key, job['output'])
+        return job['name'], job['output'], size, None
+    except Exception as e:
+        return job['name'], job['output'], 0, str(e)
+
+def run_batch(font_file, jobs, output_dir, processes=None, cache=None):
+    """
+    使用进程池批量创建子集
+
+    Args:
+        font_file: 原始字体文件路径（为 None 时每个任务以 font_file 与 digest 指定各自的字体）
+        jobs: load_manifest 返回的任务列表
+        output_dir: 输出目录
+        processes: 并行进程数
+        cache: 子集缓存（可选）
+
+    Returns:
+        list: (名称, 输出路径, 大小, 错误信息) 元组列表
+    """
+    for job in jobs:
+        extension = f".{job['flavor']}" if job['flavor'] else Path(job.get('font_file', font_file)).suffix
+        job.setdefault('output', os.path.join(output_dir, f"{job['name']}{extension}"))
+
+    initargs = (font_file,)
+    if cache:
+        initargs = (font_file, cache.cache_dir, cache.max_bytes, font_digest(font_file) if font_file else None)
+
+    num_processes = max(1, min(len(jobs), processes or cpu_count()))
+    if num_processes == 1:
+        _init_worker(*initargs)
+        return [_run_job(job) for job in jobs]
+
+    with Pool(processes=num_processes, initializer=_init_worker, initargs=initargs) as pool:
+        results = pool.map(_run_job, jobs)
+    if cache:
+        # 多个进程同时写入后重新检查缓存容量
+        cache.trim()
+    return results
+
+def create_batch_subsets(args):
+    if not os.path.exists(args.font_file):
+        print(f"错误: 字体文件 '{args.font_file}' 不存在")
+        return False
+    if subset is None:
+        print("错误: 未安装 fontTools，请先运行 pip3 install fonttools brotli")
+        return False
+
+    try:
+        jobs = load_manifest(args.manifest)
+    except (OSError, ValueError) as e:
+        print(f"错误: 无法读取清单文件 '{args.manifest}': {e}")
+        return False
+
+    output_dir = args.output_dir or str(Path(args.font_file).parent)
+    print(f"共 {len(jobs)} 个子集任务")
+    results = run_batch(args.font_file, jobs, output_dir, args.jobs, open_cache(args))
+
+    failed = 0
+    for name, output, size, error in results:
+        if error:
+            failed += 1
+            print(f"子集 '{name}' 生成失败: {error}")
+        else:
+            print(f"✓ {name}: {output} ({size / 1024:.2f} KB)")
+    print(f"批量子集化完成! 成功 {len(results) - failed} 个，失败 {failed} 个")
+    return failed == 0
+
+def load_frequency_file(path):
+    """读取字频文件，返回按频率从高到低排序的码位列表"""
+    entries = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for rank, line in enumerate(f):
+            fields = line.rstrip('\r\n').split('\t') if '\t' in line else line.split()
+            if not fields or not fields[0]:
+                continue
+            token = fields[0]
+            if len(token) > 1 and token.upper().startswith('U+'):
+                codepoint = int(token[2:], 16)
+            else:
+                codepoint = ord(token[0])
+            count = float(fields[1]) if len(fields) > 1 and fields[1].strip() else -rank
+            entries.append((count, codepoint))
+
+    seen = set()
+    order = []
+    for _, codepoint in sorted(entries, key=lambda e: -e[0]):
+        if codepoint not in seen:
+            seen.add(codepoint)
+            order.append(codepoint)
+    return order
+
+def plan_shards(codepoints, shard_size=DEFAULT_SHARD_SIZE, frequency_order=None,
+                common_count=DEFAULT_COMMON_COUNT):
+    """
+    规划分片
+
+    Args:
+        codepoints: 字体中需要分片的码位
+        shard_size: 每个分片的最大码位数
+        frequency_order: 按频率从高到低排序的码位列表（可选）
+        common_count: 放入公共分片的高频字符数
+
+    Returns:
+        list: (分片标签, 码位列表) 元组列表
+    """
+    shard_size = max(1, shard_size)
+    remaining = set(codepoints)
+    shards = []
+
+    # 高频字符按频率顺序放入公共分片
+    if frequency_order:
+        common = [cp for cp in frequency_order if cp in remaining][:common_count]
+        remaining.difference_update(common)
+        for index in range(0, len(common), shard_size):
+            shards.append((f"common-{index // shard_size + 1:02d}", common[index:index + shard_size]))
+
+    # 其余字符按区块划分，区块内按码位顺序切分
+    for block, block_codepoints in group_by_block(remaining).items():
+        slug = block_slug(block)
+        for index in range(0, len(block_codepoints), shard_size):
+            shards.append((f"{slug}-{index // shard_size + 1:02d}", block_codepoints[index:index + shard_size]))
+
+    return shards
+
+def format_unicode_range(codepoints):
+    """将码位列表压缩为 CSS unicode-range 描述符的值"""
+    ranges = []
+    for codepoint in sorted(codepoints):
+        if ranges and codepoint == ranges[-1][1] + 1:
+            ranges[-1][1] = codepoint
+        else:
+            ranges.append([codepoint, codepoint])
+    return ', '.join(
+        f"U+{start:X}" if start == end else f"U+{start:X}-{end:X}"
+        for start, end in ranges
+    )
+
+def css_string(value):
+    """将字符串转为单引号 CSS 字符串，转义反斜杠、引号与换行等控制字符"""
+    escaped = []
+    for char in value:
+        if char in '\\\'' or ord(char) < 0x20 or ord(char) == 0x7F:
+            # 十六进制转义后加空格，避免与后面的十六进制字符连在一起
+            escaped.append(f"\\{ord(char):X} ")
+        else:
+            escaped.append(char)
+    return "'" + ''.join(escaped) + "'"
+
+def file_digest(path, length=10):
+    """计算文件内容的 SHA-256 摘要（截断）"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()[:length]
+
+def collect_unicodes(args):
+    """根据 --unicodes、--text 与 --text-file 参数收集码位"""
+    unicodes = set()
+    # 添加Unicode范围参数
+    if args.unicodes:
+        unicodes |= parse_unicodes(args.unicodes)
+    # 添加文本参数
+    if args.text:
+        unicodes |= text_to_unicodes(args.text)
+    # 流式并行扫描语料，只把得到的码位集合交给子集化器
+    if args.text_file:
+        corpus_codepoints, counts = scan_corpus(args.text_file, args.jobs,
+                                                with_counts=bool(args.frequency_output))
+        unicodes.update(corpus_codepoints)
+        if args.frequency_output:
+            write_frequency_file(counts, args.frequency_output)
+            print(f"字频文件: {args.frequency_output}")
+    return unicodes
+
+def check_text_files(args):
+    """检查 --text-file 是否至少匹配到一个文件"""
+    if args.text_file and not expand_inputs(args.text_file):
+        print(f"错误: 文本文件 '{' '.join(args.text_file)}' 不存在")
+        return False
+    return True
+
+def create_font_shards(args):
+    if not os.path.exists(args.font_file):
+        print(f"错误: 字体文件 '{args.font_file}' 不存在")
+        return False
+    if not check_text_files(args):
+        return False
+    if subset is None:
+        print("错误: 未安装 fontTools，请先运行 pip3 install fonttools brotli")
+        return False
+
+    font_path = Path(args.font_file)
+    output_dir = args.output_dir or str(font_path.parent)
+    flavor = args.flavor or 'woff2'
+
+    try:
+        subsetter = FontSubsetter(args.font_file)
+        codepoints = set(subsetter.cmap)
+        # 指定了字符范围时只对这些字符分片
+        if args.unicodes or args.text or args.text_file:
+            codepoints &= collect_unicodes(args)
+
+        family = args.css_family
+        if not family:
+            font = subsetter.open_font()
+            family = font['name'].getDebugName(16) or font['name'].getDebugName(1) or font_path.stem
+            font.close()
+
+        frequency_order = load_frequency_file(args.frequency_file) if args.frequency_file else None
+    except Exception as e:
+        print(f"读取字体或字频数据时出现错误: {e}")
+        return False
+
+    shards = plan_shards(codepoints, args.shard_size, frequency_order, args.common_count)
+    print(f"共 {len(codepoints)} 个码位，划分为 {len(shards)} 个分片")
+
+    jobs = [{
+        'name': f"{font_path.stem}.{label}",
+        'unicodes': shard_codepoints,
+        'flavor': flavor,
+        'layout_features': args.layout_features,
+    } for label, shard_codepoints in shards]
+    results = run_batch(args.font_file, jobs, output_dir, args.jobs, open_cache(args))
+
+    # 将内容哈希写入文件名，便于长期缓存
+    rules = []
+    total_size = 0
+    for (name, output, size, error), (_, shard_codepoints) in zip(results, shards):
+        if error:
+            print(f"分片 '{name}' 生成失败: {error}")
+            return False
+        hashed_name = f"{name}.{file_digest(output)}.{flavor}"
+        os.replace(output, os.path.join(output_dir, hashed_name))
+        total_size += size
+        rules.append(
+            "@font-face {\n"
+            f"  font-family: {css_string(family)};\n"
+            "  font-style: normal;\n"
+            "  font-weight: 400;\n"
+            "  font-display: swap;\n"
+            f"  src: url({css_string(args.url_prefix + hashed_name)}) format('{flavor}');\n"
+            f"  unicode-range: {format_unicode_range(shard_codepoints)};\n"
+            "}\n"
+        )
+
+    css_path = os.path.join(output_dir, f"{font_path.stem}.css")
+    with open(css_path, 'w', encoding='utf-8') as f:
+        f.write(f"/* {font_path.name} 的分片字体，由 font_subset.py 生成 */\n\n")
+        f.write('\n'.join(rules))
+
+    print(f"分片完成! 共 {len(shards)} 个分片，总大小: {total_size / 1024:.2f} KB")
+    print(f"CSS 文件: {css_path}")
+    return True
+
+def create_incremental_subsets(args):
+    if not os.path.exists(args.font_file):
+        print(f"错误: 字体文件 '{args.font_file}' 不存在")
+        return False
+    if not (args.unicodes or args.text or args.text_file):
+        print("错误: 请用 --unicodes, --text 或 --text-file 指定基础子集的字符")
+        return False
+    if not (args.patch_unicodes or args.patch_text_file or args.patch_size):
+        print("错误: 请至少指定一种补丁划分方式 (--patch-unicodes, --patch-text-file 或 --patch-size)")
+        return False
+    if not check_text_files(args):
+        return False
+    if subset is None:
+        print("错误: 未安装 fontTools，请先运行 pip3 install fonttools brotli")
+        return False
+
+    font_path = Path(args.font_file)
+    output_dir = args.output_dir or str(font_path.parent)
+
+    try:
+        font_codepoints = set(FontSubsetter(args.font_file).cmap)
+        base = collect_unicodes(args) & font_codepoints
+
+        increments = [parse_unicodes(spec) for spec in args.patch_unicodes or []]
+        for path in args.patch_text_file or []:
+            increments.append(set(scan_corpus([path], args.jobs)[0]))
+        if args.patch_size:
+            remaining = font_codepoints - base - set().union(*increments)
+            frequency_order = load_frequency_file(args.frequency_file) if args.frequency_file else None
+            increments.extend(set(codepoints) for _, codepoints in
+                              plan_shards(remaining, args.patch_size, frequency_order, args.common_count))
+    except Exception as e:
+        print(f"读取字体或字符数据时出现错误: {e}")
+        return False
+
+    # 每个补丁只包含之前状态中没有的码位
+    covered = set(base)
+    patch_codepoints = []
+    for increment in increments:
+        new_codepoints = (increment & font_codepoints) - covered
+        if new_codepoints:
+            covered |= new_codepoints
+            patch_codepoints.append(sorted(new_codepoints))
+
+    # 各状态的子集相互独立，保留字形编号后并行生成
+    states = [set(base)]
+    for codepoints in patch_codepoints:
+        states.append(states[-1] | set(codepoints))
+    print(f"基础子集 {len(base)} 个码位，{len(patch_codepoints)} 个补丁")
+
+    jobs = [{
+        'name': f"{font_path.stem}.state-{index:02d}",
+        'unicodes': sorted(state),
+        'flavor': None,
+        'layout_features': args.layout_features,
+        'retain_gids': True,
+    } for index, state in enumerate(states)]
+    results = run_batch(args.font_file, jobs, output_dir, args.jobs, open_cache(args))
+    for name, _, _, error in results:
+        if error:
+            print(f"状态 '{name}' 生成失败: {error}")
+            return False
+
+    state_data = []
+    for _, output, _, _ in results:
+        with open(output, 'rb') as f:
+            state_data.append(f.read())
+        os.remove(output)
+
+    compression = default_compression()
+    base_name = f"{font_path.stem}.base.{hashlib.sha256(state_data[0]).hexdigest()[:10]}{font_path.suffix}"
+    with open(os.path.join(output_dir, base_name), 'wb') as f:
+        f.write(state_data[0])
+
+    manifest = {
+        'format': 'plangothic-incremental',
+        'version': 1,
+        'compression': COMPRESSION_NAMES[compression],
+        'base': {
+            'file': base_name,
+            'digest': state_digest(state_data[0]).hex(),
+            'size': len(state_data[0]),
+            'unicode_range': format_unicode_range(base),
+        },
+        'patches': [],
+        # [起始码位, 结束码位, 补丁序号]：需要依次应用到该序号为止的全部补丁
+        'codepoint_map': [],
+    }
+
+    for index, codepoints in enumerate(patch_codepoints, start=1):
+        patch = create_patch(state_data[index - 1], state_data[index], compression)
+        patch_name = f"{font_path.stem}.patch-{index:02d}.{hashlib.sha256(patch).hexdigest()[:10]}.bin"
+        with open(os.path.join(output_dir, patch_name), 'wb') as f:
+            f.write(patch)
+        manifest['patches'].append({
+            'file': patch_name,
+            'from': state_digest(state_data[index - 1]).hex(),
+            'to': state_digest(state_data[index]).hex(),
+            'size': len(patch),
+            'unicode_range': format_unicode_range(codepoints),
+        })
+        for codepoint in codepoints:
+            ranges = manifest['codepoint_map']
+            if ranges and ranges[-1][2] == index and ranges[-1][1] == codepoint - 1:
+                ranges[-1][1] = codepoint
+            else:
+                ranges.append([codepoint, codepoint, index])
+        print(f"✓ 补丁 {index}: {len(codepoints)} 个码位, {len(patch) / 1024:.2f} KB "
+              f"(完整状态 {len(state_data[index]) / 1024:.2f} KB)")
+
+    manifest_path = os.path.join(output_dir, f"{font_path.stem}.incremental.json")
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    print(f"增量子集生成完成! 基础子集: {base_name} ({len(state_data[0]) / 1024:.2f} KB)")
+    print(f"清单文件: {manifest_path}")
+    return True
+
+def create_routed_subsets(args):
+    if not (args.unicodes or args.text or args.text_file):
+        print("错误: 请至少指定一种子集化方法 (--unicodes, --text 或 --text-file)")
+        return False
+    if not check_text_files(args):
+        return False
+    if subset is None:
+        print("错误: 未安装 fontTools，请先运行 pip3 install fonttools brotli")
+        return False
+
+    try:
+        index = CoverageIndex(args.index)
+    except (OSError, ValueError) as e:
+        print(f"错误: 无法打开覆盖索引: {e}")
+        return False
+
+    with index:
+        stale = index.check_fonts()
+        if stale:
+            print(f"错误: 以下字体不存在或与索引不一致，请重新生成索引: {', '.join(stale)}")
+            return False
+
+        routes, missing = index.route(collect_unicodes(args))
+        jobs = []
+        for font_index, codepoints in sorted(routes.items()):
+            font_file = index.font_path(font_index)
+            jobs.append({
+                'name': f"{Path(font_file).stem}_subset",
+                'font_file': font_file,
+                'digest': index.fonts[font_index]['digest'],
+                'unicodes': codepoints,
+                'flavor': args.flavor,
+                'layout_features': args.layout_features,
+            })
+        output_dir = args.output_dir or index.index_dir
+
+    if missing:
+        preview = ''.join(chr(codepoint) for codepoint in missing[:50])
+        print(f"警告: {len(missing)} 个字符不在任何字体中: {preview}{'...' if len(missing) > 50 else ''}")
+    if not jobs:
+        print("错误: 没有可以子集化的字符")
+        return False
+
+    os.makedirs(output_dir, exist_ok=True)
+    success = True
+    for name, output, size, error in run_batch(None, jobs, output_dir, args.jobs, open_cache(args)):
+        if error:
+            success = False
+            print(f"✗ {name}: {error}")
+        else:
+            print(f"✓ {output} ({size / 1024:.2f} KB)")
+    print(f"多字体子集化完成! 共 {len(jobs)} 个字体")
+    return success
+
 def create_font_subset(args):
     # 检查字体文件是否存在
     if not os.path.exists(args.font_file):
         print(f"错误: 字体文件 '{args.font_file}' 不存在")
         return False
-    
+
     # 构建输出文件路径
     if args.output is None:
         font_path = Path(args.font_file)
@@ -43,46 +744,37 @@ def create_font_subset(args):
             output_name = f"{font_path.stem}_subset.{args.flavor}"
         output_path = output_dir / output_name
         args.output = str(output_path)
-    
-    # 构建命令
-    cmd = ['pyftsubset', args.font_file, f'--output-file={args.output}']
-    
-    # 添加Unicode范围参数
-    if args.unicodes:
-        cleaned_unicodes = args.unicodes.replace("U+", "")
-        cmd.append(f'--unicodes={cleaned_unicodes}')
-    
-    # 添加文本参数
-    if args.text:
-        cmd.append(f'--text={args.text}')
-    
-    # 添加文本文件参数
-    if args.text_file:
-        if not os.path.exists(args.text_file):
-            print(f"错误: 文本文件 '{args.text_file}' 不存在")
-            return False
-        cmd.append(f'--text-file={args.text_file}')
-    
-    # 添加输出格式参数
-    if args.flavor:
-        cmd.append(f'--flavor={args.flavor}')
-    
-    # 添加布局特性参数
-    if args.layout_features:
-        cmd.append(f'--layout-features={args.layout_features}')
-
-    cmd.append('--notdef-outline')
-    cmd.append('--notdef-glyph')
 
     # 检查是否至少指定了一种子集化方法
     if not (args.unicodes or args.text or args.text_file):
         print("错误: 请至少指定一种子集化方法 (--unicodes, --text 或 --text-file)")
         return False
-    
-    # 执行命令
+
+    # 检查文本文件是否存在
+    if not check_text_files(args):
+        return False
+
+    if subset is None:
+        print("错误: 未安装 fontTools，请先运行 pip3 install fonttools brotli")
+        return False
+
+    # 执行子集化
     try:
-        print(f"执行命令: {' '.join(cmd)}")
-        subprocess.run(cmd, check=True)
+        unicodes = collect_unicodes(args)
+
+        cache = open_cache(args)
+        key = None
+        if cache:
+            key = subset_cache_key(font_digest(args.font_file), unicodes, args.flavor, args.layout_features)
+
+        if key and cache.fetch(key, args.output):
+            print(f"命中子集缓存: {args.font_file} ({len(unicodes)} 个码位)")
+        else:
+            print(f"正在子集化: {args.font_file} ({len(unicodes)} 个码位)")
+            subsetter = FontSubsetter(args.font_file)
+            subsetter.subset(unicodes, args.output, args.flavor, args.layout_features)
+            if key:
+                cache.store_file(key, args.output)
         print(f"子集化完成! 输出文件: {args.output}")
         original_size = os.path.getsize(args.font_file) / 1024
         subset_size = os.path.getsize(args.output) / 1024
@@ -90,16 +782,26 @@ def create_font_subset(args):
         print(f"子集大小: {subset_size:.2f} KB")
         print(f"压缩率: {(1 - subset_size/original_size) * 100:.2f}%")
         return True
-    except subprocess.CalledProcessError as e:
-        print(f"子集化过程中出现错误: {e}")
-        return False
     except Exception as e:
-        print(f"发生未知错误: {e}")
+        print(f"子集化过程中出现错误: {e}")
         return False
 
 def main():
     args = parse_arguments()
-    create_font_subset(args)
+    if args.index:
+        create_routed_subsets(args)
+        return
+    if args.font_file is None:
+        print("错误: 请指定原始字体文件，或使用 --index 指定覆盖索引")
+        return
+    if args.manifest:
+        create_batch_subsets(args)
+    elif args.shard:
+        create_font_shards(args)
+    elif args.incremental:
+        create_incremental_subsets(args)
+    else:
+        create_font_subset(args)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
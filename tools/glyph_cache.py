@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+glyph_cache.py - 字形级缓存工具
+Per-glyph cache keyed by outline hash
+
+按字形轮廓哈希缓存单个字形的处理结果（如 hinting 程序、去重叠后的轮廓），
+字形轮廓未改变时可直接复用上次的结果，只需重新处理改动过的字形。
+
+Usage 使用方法:
+    from glyph_cache import GlyphCache, glyph_outline_hash
+
+    cache = GlyphCache(".cache", "ttfautohint-xxxx")
+    key = glyph_outline_hash(font["glyf"], "uni4E00", font["hmtx"]["uni4E00"])
+    data = cache.get(key)
+"""
+
+import os
+import json
+import shutil
+import struct
+import hashlib
+import tempfile
+from typing import Dict, Optional, Tuple, Any
+
+
+def glyph_outline_hash(glyf_table, glyph_name: str,
+                       metrics: Optional[Tuple[int, int]] = None,
+                       _memo: Optional[Dict[str, str]] = None) -> str:
+    """
+    计算字形轮廓的哈希值
+
+    Args:
+        glyf_table: fontTools 的 glyf 表
+        glyph_name: 字形名称
+        metrics: (advanceWidth, lsb)，影响 hinting 时一并计入哈希（可选）
+        _memo: 复合字形递归计算时使用的缓存
+
+    Returns:
+        str: 十六进制 SHA-256 摘要
+    """
+    if _memo is None:
+        _memo = {}
+    if glyph_name in _memo and metrics is None:
+        return _memo[glyph_name]
+
+    glyph = glyf_table[glyph_name]
+    h = hashlib.sha256()
+
+    if glyph.isComposite():
+        h.update(b"C")
+        for component in glyph.components:
+            base_name, transform = component.getComponentInfo()
+            h.update(base_name.encode("utf-8"))
+            h.update(struct.pack("<6d", *transform))
+            h.update(struct.pack("<H", component.flags & 0x0E06))
+            # 复合字形的结果依赖其组件的轮廓
+            h.update(glyph_outline_hash(glyf_table, base_name, None, _memo).encode("ascii"))
+    elif glyph.numberOfContours > 0:
+        h.update(b"S")
+        h.update(struct.pack(f"<{len(glyph.endPtsOfContours)}H", *glyph.endPtsOfContours))
+        h.update(bytes(flag & 0x01 for flag in glyph.flags))
+        coords = [int(v) for point in glyph.coordinates for v in point]
+        h.update(struct.pack(f"<{len(coords)}i", *coords))
+    else:
+        h.update(b"E")
+
+    digest = h.hexdigest()
+    if metrics is None:
+        _memo[glyph_name] = digest
+        return digest
+
+    # 度量信息只参与当前字形的哈希，不影响复合字形对组件的引用
+    h.update(struct.pack("<2i", *(int(v) for v in metrics)))
+    return h.hexdigest()
+
+
+class GlyphCache:
+    """以内容哈希为键的字形缓存，按命名空间隔离不同的处理参数"""
+
+    META_FILE = "meta.json"
+
+    def __init__(self, cache_dir: str, namespace: str):
+        """
+        初始化缓存
+
+        Args:
+            cache_dir: 缓存根目录
+            namespace: 命名空间（通常为工具版本与参数的摘要）
+        """
+        self.root = os.path.join(cache_dir, namespace)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key: str) -> Optional[bytes]:
+        """读取缓存，不存在时返回 None"""
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes) -> None:
+        """写入缓存（先写临时文件再原子替换，支持多进程并发写入）"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def read_meta(self) -> Dict[str, Any]:
+        """读取命名空间的元数据"""
+        try:
+            with open(os.path.join(self.root, self.META_FILE), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def write_meta(self, meta: Dict[str, Any]) -> None:
+        """写入命名空间的元数据"""
+        self.put_file(self.META_FILE, json.dumps(meta, ensure_ascii=False).encode("utf-8"))
+
+    def put_file(self, filename: str, data: bytes) -> None:
+        """在命名空间根目录下原子写入文件"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.root)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, os.path.join(self.root, filename))
+
+    def clear(self) -> None:
+        """清空命名空间下的所有缓存"""
+        shutil.rmtree(self.root, ignore_errors=True)
+        os.makedirs(self.root, exist_ok=True)
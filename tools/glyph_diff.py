@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+glyph_diff.py - 字形视觉回归检查工具
+Incremental visual regression renderer for glyph outlines
+
+将两个字体（如 optimize_glyph.py 处理前后）中的同名字形栅格化并比较像素差异，
+按差异从大到小输出报告，并生成差异最大的字形的对比图（PNG）。
+
+- 轮廓未改变的字形不需要渲染，差异直接记为 0；
+- 渲染结果按轮廓哈希缓存，再次检查时只渲染轮廓改变过的字形；
+- 栅格化与差异计算均使用 NumPy 向量化，多进程并行渲染；
+- 字形分块渲染与评分，只保留差异最大的字形的图像，内存占用与字形数无关；
+- 任一侧可以是 glyph_store.py 生成的 .pgs 字形库，直接按字形读取源文件的轮廓，
+  例如比较源文件与编译结果，或比较两个版本的源文件，不需要先编译。
+
+对比图中每个字形占一行中的三格：处理前 | 处理后 | 差异
+（红色为只在处理前有墨迹的区域，蓝色为只在处理后有墨迹的区域）。
+
+Usage 使用方法:
+    python glyph_diff.py 原字体.ttf 原字体_merge_glyphs.ttf --sheet 差异.png --report 差异.json
+    python glyph_diff.py 原字体.ttf 优化后.ttf -j 8 --size 96 --top 200 --cache-dir .render_cache
+    python glyph_diff.py PlangothicP1-Regular.pgs ../build/PlangothicP1-Regular.ttf --sheet 差异.png
+"""
+
+import os
+import csv
+import json
+import zlib
+import struct
+import hashlib
+import argparse
+import plistlib
+from types import SimpleNamespace
+from multiprocessing import Pool, cpu_count
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+from font_loader import load_font
+from glyph_cache import GlyphCache, glyph_outline_hash
+
+try:
+    from fontTools.pens.basePen import BasePen
+    from fontTools.pens.recordingPen import DecomposingRecordingPen
+except ModuleNotFoundError:
+    BasePen = object
+
+# 渲染结果格式版本，栅格化方式改变时递增
+RENDER_VERSION = 1
+DEFAULT_SIZE = 64
+DEFAULT_SUPERSAMPLE = 4
+DEFAULT_TOP = 100
+DEFAULT_CACHE_DIR = '.render_cache'
+# 每条曲线展开为折线的段数
+CURVE_STEPS = 8
+# 每个渲染任务包含的字形数
+BATCH_SIZE = 256
+# 每次渲染并评分的字形数
+CHUNK_SIZE = 4096
+
+# 工作进程中打开的字体
+_worker_fonts = None
+_worker_size = None
+_worker_supersample = None
+
+
+class FlattenPen(BasePen):
+    """将轮廓展开为线段 (x0, y0, x1, y1) 列表"""
+
+    def __init__(self, glyph_set):
+        super().__init__(glyph_set)
+        self.segments = []
+        self._start = None
+
+    def _moveTo(self, point):
+        self._start = point
+
+    def _lineTo(self, point):
+        current = self._getCurrentPoint()
+        self.segments.append((*current, *point))
+
+    def _curveToOne(self, p1, p2, p3):
+        x0, y0 = self._getCurrentPoint()
+        previous = (x0, y0)
+        for step in range(1, CURVE_STEPS + 1):
+            t = step / CURVE_STEPS
+            u = 1 - t
+            point = (u * u * u * x0 + 3 * u * u * t * p1[0] + 3 * u * t * t * p2[0] + t * t * t * p3[0],
+                     u * u * u * y0 + 3 * u * u * t * p1[1] + 3 * u * t * t * p2[1] + t * t * t * p3[1])
+            self.segments.append((*previous, *point))
+            previous = point
+
+    def _qCurveToOne(self, p1, p2):
+        x0, y0 = self._getCurrentPoint()
+        previous = (x0, y0)
+        for step in range(1, CURVE_STEPS + 1):
+            t = step / CURVE_STEPS
+            u = 1 - t
+            point = (u * u * x0 + 2 * u * t * p1[0] + t * t * p2[0],
+                     u * u * y0 + 2 * u * t * p1[1] + t * t * p2[1])
+            self.segments.append((*previous, *point))
+            previous = point
+
+    def _closePath(self):
+        current = self._getCurrentPoint()
+        if current is not None and self._start is not None and current != self._start:
+            self.segments.append((*current, *self._start))
+
+    _endPath = _closePath
+
+
+def rasterize(segments, frame, size=DEFAULT_SIZE, supersample=DEFAULT_SUPERSAMPLE):
+    """
+    按非零环绕规则栅格化轮廓
+
+    Args:
+        segments: 线段列表 (x0, y0, x1, y1)，字体单位
+        frame: 渲染区域 (x_min, y_min, 边长)，字体单位
+        size: 输出图像边长（像素）
+        supersample: 每个像素在每个方向上的采样数
+
+    Returns:
+        np.ndarray: (size, size) 的 uint8 灰度图，255 为墨迹，第 0 行在上
+    """
+    n = size * supersample
+    if not segments:
+        return np.zeros((size, size), dtype=np.uint8)
+
+    x_min, y_min, side = frame
+    edges = np.asarray(segments, dtype=np.float64)
+    scale = n / side
+    x0 = (edges[:, 0] - x_min) * scale
+    y0 = (edges[:, 1] - y_min) * scale
+    x1 = (edges[:, 2] - x_min) * scale
+    y1 = (edges[:, 3] - y_min) * scale
+
+    keep = y0 != y1
+    x0, y0, x1, y1 = x0[keep], y0[keep], x1[keep], y1[keep]
+    direction = np.where(y1 > y0, 1, -1)
+
+    # 每个采样行中心与每条边的交点
+    centers = np.arange(n)[:, None] + 0.5
+    low = np.minimum(y0, y1)
+    high = np.maximum(y0, y1)
+    crossing = (centers >= low) & (centers < high)
+    rows, columns = np.nonzero(crossing)
+    t = (centers[rows, 0] - y0[columns]) / (y1[columns] - y0[columns])
+    x = x0[columns] + t * (x1[columns] - x0[columns])
+
+    # 在交点右侧的第一个采样点处累加环绕数，再按行前缀求和
+    start = np.clip(np.ceil(x - 0.5), 0, n).astype(np.int64)
+    accumulator = np.zeros((n, n + 1), dtype=np.int32)
+    np.add.at(accumulator, (rows, start), direction[columns])
+    inside = np.cumsum(accumulator[:, :n], axis=1) != 0
+
+    coverage = inside.reshape(size, supersample, size, supersample).mean(axis=(1, 3))
+    return np.round(coverage[::-1] * 255).astype(np.uint8)
+
+
+class StoreFont:
+    """以 TTFont 的接口读取 .pgs 字形库（只包括本工具用到的 head、hhea、hmtx 与字形集）"""
+
+    def __init__(self, path):
+        from glyph_store import GlyphStore
+
+        self.store = GlyphStore(path)
+        info = plistlib.loads(self.store.read('fontinfo.plist')) if self.store.exists('fontinfo.plist') else {}
+        upem = info.get('unitsPerEm', 1000)
+        # 与 ufo2ft 编译 hhea 时的取值相同
+        ascent = info.get('openTypeHheaAscender', info.get('ascender', round(upem * 0.8)))
+        descent = info.get('openTypeHheaDescender', info.get('descender', -round(upem * 0.2)))
+        widths = self.store.records['width']
+        self.tables = {
+            'head': SimpleNamespace(unitsPerEm=upem),
+            'hhea': SimpleNamespace(ascent=ascent, descent=descent),
+            'hmtx': {name: (round(float(width)), 0) for name, width in zip(self.store.glyph_names, widths)},
+        }
+
+    def __contains__(self, tag):
+        return tag in self.tables
+
+    def __getitem__(self, tag):
+        return self.tables[tag]
+
+    def getGlyphOrder(self):
+        return self.store.glyph_order
+
+    def getBestCmap(self):
+        cmap = {}
+        for name in self.store.glyph_names:
+            for codepoint in self.store.unicodes(name):
+                cmap.setdefault(codepoint, name)
+        return cmap
+
+    def getGlyphSet(self):
+        return self.store.glyph_set()
+
+    def outline_hashes(self):
+        """直接哈希字形库中的轮廓数组与组件（组件按其轮廓哈希递归计入）"""
+        store = self.store
+        hashes = {}
+
+        def outline_hash(name, depth=0):
+            if name in hashes:
+                return hashes[name]
+            h = hashlib.sha256()
+            if name in store:
+                for array in store.outline(name):
+                    h.update(array.tobytes())
+                exact = store.extra(name).get('coordinates') if store.records[store.index(name)]['extra_length'] else None
+                if exact:
+                    h.update(struct.pack(f"<{len(exact)}d", *exact))
+                for base, transformation in store.components(name):
+                    h.update(base.encode('utf-8'))
+                    h.update(struct.pack("<6d", *transformation))
+                    if depth < 32:
+                        h.update(outline_hash(base, depth + 1).encode('ascii'))
+            hashes[name] = h.hexdigest()
+            return hashes[name]
+
+        return {name: outline_hash(name) for name in store.glyph_names}
+
+    def close(self):
+        self.store.close()
+
+
+def open_font(path):
+    """打开字体文件或 .pgs 字形库"""
+    if path.lower().endswith('.pgs'):
+        return StoreFont(path)
+    return load_font(path)
+
+
+def _init_worker(font_paths, size, supersample):
+    global _worker_fonts, _worker_size, _worker_supersample
+    _worker_fonts = [open_font(path) for path in font_paths]
+    _worker_size = size
+    _worker_supersample = supersample
+
+
+def render_glyph(glyph_set, name, frame, size, supersample):
+    pen = FlattenPen(glyph_set)
+    glyph_set[name].draw(pen)
+    return rasterize(pen.segments, frame, size, supersample)
+
+
+def _render_batch(task):
+    """在工作进程中渲染一批字形，返回 (字体序号, 字形名, 图像字节) 列表"""
+    font_index, items = task
+    glyph_set = _worker_fonts[font_index].getGlyphSet()
+    return [
+        (font_index, name, render_glyph(glyph_set, name, frame, _worker_size, _worker_supersample).tobytes())
+        for name, frame in items
+    ]
+
+
+def outline_hashes(font):
+    """
+    计算字体中每个字形的轮廓哈希（glyf 字体使用 glyph_outline_hash，.pgs 字形库哈希轮廓数组，
+    其他字体哈希展开后的绘制指令）
+    """
+    if isinstance(font, StoreFont):
+        return font.outline_hashes()
+    if 'glyf' in font:
+        glyf = font['glyf']
+        memo = {}
+        return {name: glyph_outline_hash(glyf, name, None, memo) for name in font.getGlyphOrder()}
+
+    glyph_set = font.getGlyphSet()
+    hashes = {}
+    for name in font.getGlyphOrder():
+        pen = DecomposingRecordingPen(glyph_set)
+        glyph_set[name].draw(pen)
+        hashes[name] = hashlib.sha256(repr(pen.value).encode('utf-8')).hexdigest()
+    return hashes
+
+
+def glyph_frame(font, name):
+    """渲染区域：以字形的前进宽度为中心、覆盖上伸部到下伸部的正方形"""
+    hhea = font['hhea']
+    upem = font['head'].unitsPerEm
+    side = max(upem, hhea.ascent - hhea.descent)
+    advance = font['hmtx'][name][0]
+    return ((advance - side) / 2, hhea.descent, side)
+
+
+def render_key(outline_hash, frame):
+    return hashlib.sha256(f"{outline_hash}:{frame}".encode('ascii')).hexdigest()
+
+
+def compare_fonts(before_path, after_path, size=DEFAULT_SIZE, supersample=DEFAULT_SUPERSAMPLE,
+                  processes=None, cache_dir=None, keep_images=DEFAULT_TOP):
+    """
+    比较两个字体中的同名字形
+
+    Args:
+        keep_images: 保留图像的字形数（按差异从大到小）
+
+    Returns:
+        (结果列表, 只在处理前存在的字形, 只在处理后存在的字形, 渲染数, 缓存命中数)
+        结果按差异从大到小排序，每项包含 name、unicode、changed、diff、relative，
+        以及用于生成对比图的 before、after 图像（只有差异最大的 keep_images 个字形有图像，其余为 None）
+    """
+    fonts = [open_font(before_path), open_font(after_path)]
+    orders = [font.getGlyphOrder() for font in fonts]
+    names = [set(order) for order in orders]
+    common = [name for name in orders[0] if name in names[1]]
+    removed = [name for name in orders[0] if name not in names[1]]
+    added = [name for name in orders[1] if name not in names[0]]
+
+    hashes = [outline_hashes(font) for font in fonts]
+    reverse_cmap = {}
+    for codepoint, name in sorted((fonts[0].getBestCmap() or {}).items()):
+        reverse_cmap.setdefault(name, codepoint)
+
+    # 两个字体使用相同的渲染区域，字形的位移也会体现在差异中
+    frames = {name: glyph_frame(fonts[0], name) for name in common}
+    changed = [name for name in common if hashes[0][name] != hashes[1][name] or
+               fonts[0]['hmtx'][name][0] != fonts[1]['hmtx'][name][0]]
+    for font in fonts:
+        font.close()
+
+    cache = GlyphCache(cache_dir, f"render-v{RENDER_VERSION}-{size}x{supersample}") if cache_dir else None
+    renderer = _Renderer([before_path, after_path], size, supersample, processes)
+    results = []
+    kept = {}  # 字形名称 -> (处理前图像, 处理后图像)
+    rendered = cached = 0
+    try:
+        for start in range(0, len(changed), CHUNK_SIZE):
+            chunk = changed[start:start + CHUNK_SIZE]
+            positions = {name: index for index, name in enumerate(chunk)}
+            stacks = np.empty((2, len(chunk), size, size), dtype=np.uint8)
+            missing = [[], []]
+            for font_index in (0, 1):
+                for index, name in enumerate(chunk):
+                    data = cache.get(render_key(hashes[font_index][name], frames[name])) if cache else None
+                    if data is not None:
+                        stacks[font_index, index] = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(size, size)
+                        cached += 1
+                    else:
+                        missing[font_index].append(name)
+
+            tasks = [
+                (font_index, [(name, frames[name]) for name in names[i:i + BATCH_SIZE]])
+                for font_index, names in enumerate(missing)
+                for i in range(0, len(names), BATCH_SIZE)
+            ]
+            for font_index, name, data in renderer.render(tasks):
+                stacks[font_index, positions[name]] = np.frombuffer(data, dtype=np.uint8).reshape(size, size)
+                rendered += 1
+                if cache:
+                    cache.put(render_key(hashes[font_index][name], frames[name]), zlib.compress(data))
+
+            # 整数运算：差异与墨迹面积以 0~255 的灰度累加
+            difference = np.abs(stacks[0].astype(np.int16) - stacks[1]).sum(axis=(1, 2), dtype=np.int64)
+            ink = np.maximum(stacks[0], stacks[1]).sum(axis=(1, 2), dtype=np.int64)
+            diff_scores = difference / (255 * size * size)
+            relative_scores = np.where(ink > 0, difference / np.maximum(ink, 1), 0)
+            chunk_results = [{
+                'name': name,
+                'unicode': reverse_cmap.get(name),
+                'changed': True,
+                'diff': float(diff_scores[index]),
+                'relative': float(relative_scores[index]),
+                'before': None,
+                'after': None,
+            } for index, name in enumerate(chunk)]
+            results.extend(chunk_results)
+
+            # 只保留目前差异最大的 keep_images 个字形的图像
+            candidates = sorted([result for result in results if result['name'] in kept] + chunk_results,
+                                key=_result_order)[:keep_images]
+            kept = {
+                result['name']: kept.get(result['name']) or
+                (stacks[0, positions[result['name']]].copy(), stacks[1, positions[result['name']]].copy())
+                for result in candidates
+            }
+    finally:
+        renderer.close()
+
+    for result in results:
+        if result['name'] in kept:
+            result['before'], result['after'] = kept[result['name']]
+    changed_set = set(changed)
+    for name in common:
+        if name not in changed_set:
+            results.append({'name': name, 'unicode': reverse_cmap.get(name), 'changed': False,
+                            'diff': 0.0, 'relative': 0.0, 'before': None, 'after': None})
+
+    results.sort(key=_result_order)
+    return results, removed, added, rendered, cached
+
+
+def _result_order(result):
+    return -result['relative'], -result['diff'], result['name']
+
+
+class _Renderer:
+    """按需创建的渲染进程池，跨分块复用"""
+
+    def __init__(self, font_paths, size, supersample, processes=None):
+        self.initargs = (font_paths, size, supersample)
+        self.processes = max(1, processes or cpu_count())
+        self.pool = None
+        self.initialized = False
+
+    def render(self, tasks):
+        """渲染一批任务，逐个返回 (字体序号, 字形名, 图像字节)"""
+        if not tasks:
+            return
+        if self.processes == 1:
+            if not self.initialized:
+                _init_worker(*self.initargs)
+                self.initialized = True
+            batches = map(_render_batch, tasks)
+        else:
+            if self.pool is None:
+                self.pool = Pool(processes=self.processes, initializer=_init_worker, initargs=self.initargs)
+            batches = self.pool.imap_unordered(_render_batch, tasks)
+        for batch in batches:
+            yield from batch
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+
+
+def write_png(path, rgb):
+    """将 (高, 宽, 3) 的 uint8 数组写为 PNG"""
+    height, width, _ = rgb.shape
+    raw = np.concatenate([np.zeros((height, 1), dtype=np.uint8), rgb.reshape(height, width * 3)], axis=1)
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), 9)))
+        f.write(chunk(b'IEND', b''))
+
+
+def contact_sheet(results, size, columns=4, gap=4):
+    """
+    生成对比图：每个字形三格（处理前、处理后、差异），按 results 的顺序从左到右、从上到下排列
+
+    Returns:
+        np.ndarray: (高, 宽, 3) 的 uint8 RGB 图像
+    """
+    cell = size * 3 + gap * 2
+    rows = (len(results) + columns - 1) // columns
+    # 灰色背景作为格子之间的分隔
+    sheet = np.full((rows * (size + gap) + gap, columns * (cell + gap * 3) + gap, 3), 224, dtype=np.uint8)
+
+    for index, result in enumerate(results):
+        row, column = divmod(index, columns)
+        top = gap + row * (size + gap)
+        left = gap + column * (cell + gap * 3)
+        before = result['before'].astype(np.int16)
+        after = result['after'].astype(np.int16)
+
+        for offset, image in ((0, before), (size + gap, after)):
+            sheet[top:top + size, left + offset:left + offset + size] = (255 - image)[..., None]
+
+        common = np.minimum(before, after)
+        removed = before - common
+        added = after - common
+        overlay = np.stack([255 - common - added, 255 - common - removed - added, 255 - common - removed], axis=-1)
+        left += 2 * (size + gap)
+        sheet[top:top + size, left:left + size] = np.clip(overlay, 0, 255).astype(np.uint8)
+    return sheet
+
+
+def write_report(path, results, removed, added):
+    """写出差异报告（.csv 或 .json）"""
+    rows = [{
+        'rank': rank,
+        'name': result['name'],
+        'unicode': f"U+{result['unicode']:04X}" if result['unicode'] is not None else '',
+        'changed': result['changed'],
+        'diff': round(result['diff'], 6),
+        'relative': round(result['relative'], 6),
+    } for rank, result in enumerate(results, start=1)]
+
+    if path.lower().endswith('.csv'):
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else ['rank'])
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'glyphs': rows, 'removed': removed, 'added': added}, f, ensure_ascii=False, indent=2)
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='字形视觉回归检查工具')
+    parser.add_argument('before', help='处理前的字体或 .pgs 字形库')
+    parser.add_argument('after', help='处理后的字体或 .pgs 字形库')
+    parser.add_argument('--size', type=int, default=DEFAULT_SIZE, help=f'渲染尺寸（像素，默认：{DEFAULT_SIZE}）')
+    parser.add_argument('--supersample', type=int, default=DEFAULT_SUPERSAMPLE,
+                        help=f'每个像素每个方向的采样数（默认：{DEFAULT_SUPERSAMPLE}）')
+    parser.add_argument('--jobs', '-j', type=int, help='并行进程数，默认为CPU核心数', default=None)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'渲染缓存目录（默认：{DEFAULT_CACHE_DIR}）')
+    parser.add_argument('--no-cache', action='store_true', help='不使用渲染缓存')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help=f'输出与绘制差异最大的字形数（默认：{DEFAULT_TOP}）')
+    parser.add_argument('--threshold', type=float, default=0.0, help='只列出相对差异大于此值的字形（0~1）')
+    parser.add_argument('--report', help='差异报告输出路径（.json 或 .csv，包含全部字形）')
+    parser.add_argument('--sheet', help='对比图输出路径（PNG）')
+    parser.add_argument('--columns', type=int, default=4, help='对比图每行的字形数（默认：4）')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if np is None:
+        print("错误: 未安装 NumPy，请先运行 pip3 install numpy")
+        return
+    for path in (args.before, args.after):
+        if not os.path.exists(path):
+            print(f"错误: 字体文件 '{path}' 不存在")
+            return
+
+    results, removed, added, rendered, cached = compare_fonts(
+        args.before, args.after, args.size, args.supersample, args.jobs,
+        None if args.no_cache else args.cache_dir, args.top)
+
+    changed = sum(1 for result in results if result['changed'])
+    print(f"共比较 {len(results)} 个字形，轮廓改变 {changed} 个（渲染 {rendered} 次，缓存命中 {cached} 次）")
+    if removed:
+        print(f"只在处理前存在 {len(removed)} 个字形: {', '.join(removed[:10])}{' ...' if len(removed) > 10 else ''}")
+    if added:
+        print(f"只在处理后存在 {len(added)} 个字形: {', '.join(added[:10])}{' ...' if len(added) > 10 else ''}")
+
+    worst = [result for result in results if result['changed'] and result['relative'] > args.threshold][:args.top]
+    if worst:
+        print(f"\n差异最大的 {len(worst)} 个字形：")
+        print(f"  {'排名':<6}{'字形':<20}{'码位':<10}{'相对差异':>10}{'面积差异':>10}")
+        for rank, result in enumerate(worst, start=1):
+            unicode = f"U+{result['unicode']:04X}" if result['unicode'] is not None else ''
+            print(f"  {rank:<6}{result['name']:<20}{unicode:<10}{result['relative']:>10.4f}{result['diff']:>10.4f}")
+
+    if args.report:
+        write_report(args.report, results, removed, added)
+        print(f"\n差异报告: {args.report}")
+    if args.sheet:
+        if worst:
+            write_png(args.sheet, contact_sheet(worst, args.size, args.columns))
+            print(f"对比图: {args.sheet}")
+        else:
+            print("没有需要绘制的字形，未生成对比图")
+
+
+if __name__ == "__main__":
+    main()
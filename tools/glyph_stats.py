@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+glyph_stats.py - 字形复杂度与体积分析工具
+Glyph complexity and size attribution analyzer
+
+直接解析 glyf/loca 表（NumPy 向量化），统计每个字形的轮廓数、点数、
+组件数、指令长度与原始字节数，并估算每个字形在压缩后的 glyf 数据中所占的字节：
+按字形顺序流式压缩，每个字形之后同步刷新一次，以输出增量作为该字形的压缩体积
+（即在前面所有字形已作为上下文的情况下，该字形额外需要的字节），
+再按整体压缩结果校准。估算使用 zlib，WOFF2 的 brotli 结果通常更小，但各字形
+所占的比例接近。
+
+按 Unicode 区块汇总，并列出点数或压缩体积在所在区块中异常偏大的字形，
+这些字形通常最值得重新绘制或简化。
+
+也可以直接分析 glyph_store.py 生成的 .pgs 字形库，不需要先编译：轮廓数与点数
+来自源文件的轮廓（三次曲线，没有指令），原始字节数为字形库中该字形的
+坐标、点类型与轮廓数组的大小，压缩体积按同样的方法估算。
+
+Usage 使用方法:
+    python glyph_stats.py PlangothicP1-Regular.ttf
+    python glyph_stats.py PlangothicP1-Regular.pgs
+    python glyph_stats.py PlangothicP1-Regular.ttf --csv 字形.csv --json 统计.json --top 50
+"""
+
+import csv
+import json
+import zlib
+import argparse
+from collections import OrderedDict
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+from font_loader import MappedFont
+from unicode_blocks import block_of
+
+UNENCODED_BLOCK = 'Unencoded'
+# 同步刷新时 deflate 写入的空存储块的大小
+SYNC_FLUSH_OVERHEAD = 4
+# 在所在区块中超过此分位数的字形视为异常
+OUTLIER_PERCENTILE = 99
+DEFAULT_TOP = 30
+
+# 复合字形组件标志
+ARG_1_AND_2_ARE_WORDS = 0x0001
+WE_HAVE_A_SCALE = 0x0008
+MORE_COMPONENTS = 0x0020
+WE_HAVE_AN_X_AND_Y_SCALE = 0x0040
+WE_HAVE_A_TWO_BY_TWO = 0x0080
+WE_HAVE_INSTRUCTIONS = 0x0100
+
+
+def _read_u16(data, positions):
+    return (data[positions].astype(np.int64) << 8) | data[positions + 1]
+
+
+def parse_components(data, start):
+    """
+    解析复合字形的组件
+
+    Returns:
+        (组件字形编号列表, 指令长度)
+    """
+    position = start + 10
+    components = []
+    flags = MORE_COMPONENTS
+    while flags & MORE_COMPONENTS:
+        flags = (int(data[position]) << 8) | int(data[position + 1])
+        components.append((int(data[position + 2]) << 8) | int(data[position + 3]))
+        position += 4
+        position += 4 if flags & ARG_1_AND_2_ARE_WORDS else 2
+        if flags & WE_HAVE_A_SCALE:
+            position += 2
+        elif flags & WE_HAVE_AN_X_AND_Y_SCALE:
+            position += 4
+        elif flags & WE_HAVE_A_TWO_BY_TWO:
+            position += 8
+    instructions = 0
+    if flags & WE_HAVE_INSTRUCTIONS:
+        instructions = (int(data[position]) << 8) | int(data[position + 1])
+    return components, instructions
+
+
+def _expand_components(contours, points, children):
+    """把组件的轮廓数与点数累加到复合字形上（children: 字形编号 -> 组件的字形编号列表）"""
+    def expand(glyph_id, depth=0):
+        if glyph_id not in children or depth > 32:
+            return contours[glyph_id], points[glyph_id]
+        total_contours, total_points = contours[glyph_id], points[glyph_id]
+        for child in children.pop(glyph_id):
+            child_contours, child_points = expand(child, depth + 1)
+            total_contours += child_contours
+            total_points += child_points
+        contours[glyph_id], points[glyph_id] = total_contours, total_points
+        return total_contours, total_points
+
+    for glyph_id in list(children):
+        expand(glyph_id)
+
+
+def glyph_table_stats(glyf, loca, num_glyphs, long_format):
+    """
+    从原始 glyf/loca 数据计算每个字形的统计数据
+
+    Returns:
+        dict: 字段名 -> 长度为 num_glyphs 的数组
+              (offset, size, contours, points, components, instructions)
+              复合字形的 contours 与 points 为展开所有组件后的总数
+    """
+    data = np.frombuffer(glyf, dtype=np.uint8)
+    if long_format:
+        offsets = np.frombuffer(loca, dtype='>u4', count=num_glyphs + 1).astype(np.int64)
+    else:
+        offsets = np.frombuffer(loca, dtype='>u2', count=num_glyphs + 1).astype(np.int64) * 2
+    starts = offsets[:-1]
+    sizes = np.diff(offsets)
+
+    contours = np.zeros(num_glyphs, dtype=np.int64)
+    points = np.zeros(num_glyphs, dtype=np.int64)
+    instructions = np.zeros(num_glyphs, dtype=np.int64)
+    components = np.zeros(num_glyphs, dtype=np.int64)
+
+    nonempty = np.nonzero(sizes >= 10)[0]
+    header = _read_u16(data, starts[nonempty])
+    header = np.where(header >= 0x8000, header - 0x10000, header)
+    contours[nonempty] = header
+
+    simple = nonempty[header > 0]
+    end_points = starts[simple] + 10 + 2 * (contours[simple] - 1)
+    points[simple] = _read_u16(data, end_points) + 1
+    instructions[simple] = _read_u16(data, end_points + 2)
+
+    # 复合字形数量通常很少，逐个解析后按组件累加轮廓数与点数
+    composite = nonempty[header < 0]
+    children = {}
+    for glyph_id in composite:
+        children[glyph_id], instructions[glyph_id] = parse_components(data, starts[glyph_id])
+        components[glyph_id] = len(children[glyph_id])
+    contours[composite] = 0
+
+    _expand_components(contours, points, children)
+
+    return {
+        'offset': starts,
+        'size': sizes,
+        'contours': contours,
+        'points': points,
+        'components': components,
+        'instructions': instructions,
+    }
+
+
+def compressed_costs(glyf, offsets, sizes, level=9):
+    """
+    估算每个字形的压缩体积（字节）
+
+    按字形顺序流式压缩，每个字形后同步刷新，输出增量即该字形的边际压缩体积；
+    去掉刷新的固定开销后按不刷新时的整体压缩大小校准。
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    costs = np.zeros(len(sizes), dtype=np.float64)
+    view = memoryview(glyf)
+    for glyph_id in np.nonzero(sizes)[0]:
+        start = int(offsets[glyph_id])
+        chunk = compressor.compress(view[start:start + int(sizes[glyph_id])])
+        chunk += compressor.flush(zlib.Z_SYNC_FLUSH)
+        costs[glyph_id] = max(len(chunk) - SYNC_FLUSH_OVERHEAD, 0)
+
+    total = len(zlib.compress(glyf, level))
+    if costs.sum() > 0:
+        costs *= total / costs.sum()
+    return costs
+
+
+def store_stats(store):
+    """
+    从 .pgs 字形库计算每个字形的统计数据，字段与 glyph_table_stats 相同
+
+    Returns:
+        (dict, bytes): 统计数组与按字形顺序拼接的轮廓数据（用于估算压缩体积）
+    """
+    records = store.records
+    contours = records['contour_count'].astype(np.int64)
+    points = records['point_count'].astype(np.int64)
+    components = records['component_count'].astype(np.int64)
+
+    children = {}
+    for glyph_id in np.nonzero(components)[0]:
+        bases = store.components(store.glyph_names[glyph_id])
+        children[int(glyph_id)] = [store.index(base) for base, _ in bases if base in store]
+    _expand_components(contours, points, children)
+
+    chunks = [b''.join(array.tobytes() for array in store.outline(name)) for name in store.glyph_names]
+    sizes = np.array([len(chunk) for chunk in chunks], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int64)
+
+    stats = {
+        'offset': offsets,
+        'size': sizes,
+        'contours': contours,
+        'points': points,
+        'components': components,
+        'instructions': np.zeros(len(records), dtype=np.int64),
+    }
+    return stats, b''.join(chunks)
+
+
+def analyze_store(store_file, level=9):
+    """分析 .pgs 字形库中每个字形的复杂度与体积，返回值与 analyze_font 相同"""
+    from glyph_store import GlyphStore
+
+    with GlyphStore(store_file) as store:
+        glyph_order = store.glyph_order
+        stats, data = store_stats(store)
+        cmap = {}
+        for name in glyph_order:
+            for codepoint in store.unicodes(name):
+                cmap.setdefault(codepoint, name)
+    return _glyph_rows(glyph_order, cmap, stats, compressed_costs(data, stats['offset'], stats['size'], level))
+
+
+def analyze_font(font_file, level=9):
+    """
+    分析字体（或 .pgs 字形库）中每个字形的复杂度与体积
+
+    Returns:
+        list: 每个字形的统计字典（按字形编号排列）
+    """
+    if font_file.lower().endswith('.pgs'):
+        return analyze_store(font_file, level)
+
+    with MappedFont(font_file) as mapped:
+        font = mapped.open()
+        try:
+            if 'glyf' not in font:
+                raise ValueError("只支持 TrueType 轮廓（glyf）字体")
+            glyph_order = font.getGlyphOrder()
+            cmap = font.getBestCmap() or {}
+            long_format = font['head'].indexToLocFormat == 1
+            if mapped.flavor:
+                # WOFF/WOFF2 的表经过压缩（WOFF2 的 glyf 还经过变换），由 fontTools 还原为 sfnt 中的原始数据
+                glyf = font.reader['glyf']
+                loca = font.reader['loca']
+            else:
+                glyf = bytes(mapped.table_data('glyf'))
+                loca = bytes(mapped.table_data('loca'))
+        finally:
+            font.close()
+
+    stats = glyph_table_stats(glyf, loca, len(glyph_order), long_format)
+    return _glyph_rows(glyph_order, cmap, stats, compressed_costs(glyf, stats['offset'], stats['size'], level))
+
+
+def _glyph_rows(glyph_order, cmap, stats, costs):
+    """每个字形的统计字典；有多个码位的字形按最小的码位归入区块"""
+    unicodes = {}
+    for codepoint, name in sorted(cmap.items()):
+        unicodes.setdefault(name, codepoint)
+
+    glyphs = []
+    for glyph_id, name in enumerate(glyph_order):
+        codepoint = unicodes.get(name)
+        glyphs.append({
+            'gid': glyph_id,
+            'name': name,
+            'unicode': codepoint,
+            'block': block_of(codepoint) if codepoint is not None else UNENCODED_BLOCK,
+            'contours': int(stats['contours'][glyph_id]),
+            'points': int(stats['points'][glyph_id]),
+            'components': int(stats['components'][glyph_id]),
+            'instructions': int(stats['instructions'][glyph_id]),
+            'raw_bytes': int(stats['size'][glyph_id]),
+            'compressed_bytes': round(float(costs[glyph_id]), 1),
+        })
+    return glyphs
+
+
+def block_summary(glyphs):
+    """
+    按 Unicode 区块汇总，并标记区块内点数或压缩体积超过 99 分位数的字形
+
+    Returns:
+        OrderedDict: 区块名称 -> 汇总字典，按压缩体积从大到小排序
+    """
+    total_compressed = sum(glyph['compressed_bytes'] for glyph in glyphs) or 1
+    groups = {}
+    for glyph in glyphs:
+        groups.setdefault(glyph['block'], []).append(glyph)
+
+    summary = {}
+    for block, members in groups.items():
+        points = np.array([glyph['points'] for glyph in members])
+        compressed = np.array([glyph['compressed_bytes'] for glyph in members])
+        point_limit = np.percentile(points, OUTLIER_PERCENTILE)
+        size_limit = np.percentile(compressed, OUTLIER_PERCENTILE)
+        for glyph, glyph_points, glyph_size in zip(members, points, compressed):
+            glyph['outlier'] = bool(len(members) >= 100 and (glyph_points > point_limit or glyph_size > size_limit))
+
+        heaviest = members[int(np.argmax(points))]
+        summary[block] = {
+            'glyphs': len(members),
+            'raw_bytes': int(sum(glyph['raw_bytes'] for glyph in members)),
+            'compressed_bytes': round(float(compressed.sum()), 1),
+            'share': round(float(compressed.sum()) / total_compressed * 100, 2),
+            'points_mean': round(float(points.mean()), 1),
+            'points_median': float(np.median(points)),
+            'points_p95': float(np.percentile(points, 95)),
+            'points_max': int(points.max()),
+            'points_max_glyph': heaviest['name'],
+            'outliers': sum(1 for glyph in members if glyph['outlier']),
+        }
+    return OrderedDict(sorted(summary.items(), key=lambda item: -item[1]['compressed_bytes']))
+
+
+def format_unicode(codepoint):
+    return f"U+{codepoint:04X}" if codepoint is not None else ''
+
+
+def write_csv(path, glyphs):
+    fields = ['gid', 'name', 'unicode', 'block', 'contours', 'points', 'components',
+              'instructions', 'raw_bytes', 'compressed_bytes', 'outlier']
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for glyph in glyphs:
+            writer.writerow(dict(glyph, unicode=format_unicode(glyph['unicode'])))
+
+
+def write_json(path, font_file, glyphs, blocks):
+    report = {
+        'font': font_file,
+        'glyphs': len(glyphs),
+        'raw_bytes': sum(glyph['raw_bytes'] for glyph in glyphs),
+        'compressed_bytes': round(sum(glyph['compressed_bytes'] for glyph in glyphs), 1),
+        'blocks': blocks,
+        'outliers': [dict(glyph, unicode=format_unicode(glyph['unicode'])) for glyph in glyphs if glyph['outlier']],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def print_report(glyphs, blocks, top):
+    total_raw = sum(glyph['raw_bytes'] for glyph in glyphs)
+    total_compressed = sum(glyph['compressed_bytes'] for glyph in glyphs)
+    print(f"共 {len(glyphs)} 个字形，glyf 原始 {total_raw / 1024:.1f} KB，估算压缩后 {total_compressed / 1024:.1f} KB")
+
+    print("\n按区块汇总：")
+    print(f"  {'区块':<42}{'字形数':>8}{'压缩 (KB)':>12}{'占比':>8}{'平均点数':>10}{'最多点数':>10}{'异常':>6}")
+    for block, summary in blocks.items():
+        print(f"  {block:<42}{summary['glyphs']:>8}{summary['compressed_bytes'] / 1024:>12.1f}"
+              f"{summary['share']:>7.1f}%{summary['points_mean']:>10.1f}{summary['points_max']:>10}"
+              f"{summary['outliers']:>6}")
+
+    for title, key in (('压缩体积最大', 'compressed_bytes'), ('点数最多', 'points')):
+        print(f"\n{title}的 {top} 个字形：")
+        print(f"  {'字形':<20}{'码位':<10}{'轮廓数':>8}{'点数':>8}{'原始 (B)':>10}{'压缩 (B)':>10}")
+        for glyph in sorted(glyphs, key=lambda glyph: -glyph[key])[:top]:
+            mark = ' *' if glyph['outlier'] else ''
+            print(f"  {glyph['name']:<20}{format_unicode(glyph['unicode']):<10}{glyph['contours']:>8}"
+                  f"{glyph['points']:>8}{glyph['raw_bytes']:>10}{glyph['compressed_bytes']:>10.0f}{mark}")
+    print(f"\n* 表示在所在区块中点数或压缩体积超过 {OUTLIER_PERCENTILE} 分位数的字形")
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='字形复杂度与体积分析工具')
+    parser.add_argument('font_file', help='TrueType 字体文件或 .pgs 字形库路径')
+    parser.add_argument('--csv', help='逐字形统计的 CSV 输出路径')
+    parser.add_argument('--json', help='区块汇总与异常字形的 JSON 输出路径')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help=f'列出的字形数（默认：{DEFAULT_TOP}）')
+    parser.add_argument('--level', type=int, default=9, help='估算压缩体积时使用的 zlib 压缩级别（默认：9）')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if np is None:
+        print("错误: 未安装 NumPy，请先运行 pip3 install numpy")
+        return
+
+    try:
+        glyphs = analyze_font(args.font_file, args.level)
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"错误: 无法分析 '{args.font_file}': {e}")
+        return
+
+    blocks = block_summary(glyphs)
+    print_report(glyphs, blocks, args.top)
+    if args.csv:
+        write_csv(args.csv, glyphs)
+        print(f"\n逐字形统计: {args.csv}")
+    if args.json:
+        write_json(args.json, args.font_file, glyphs, blocks)
+        print(f"区块汇总: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,673 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+glyph_store.py - 二进制字形库
+Compact, memory-mapped glyph store (.pgs)
+
+将 .ufoz 源文件转换为可以 mmap 的二进制字形库：默认图层中所有字形的坐标、
+点类型、轮廓与组件保存在连续的数组中，附带按字形名称与码位的索引，
+读取任意字形只需按下标定位，不需要解析 XML；打开整个字形库只读取文件头与名称表。
+其余内容（fontinfo、lib、groups、kerning、features.fea、其他图层等）原样保存，
+可以无损地转换回 .ufoz（.glif 由 ufoLib 重新序列化，内容与原文件一致，
+XML 的排版细节可能不同）。
+
+GlyphStore 与 ufoz.UfozSource 提供相同的读取接口，ufoz.open_source、
+font_partition.py、glyph_stats.py 与 glyph_diff.py 直接读取 .pgs 中的数组。
+sources/build.py 也接受 .pgs，但 fontmake 只能读取 .ufo，完整编译时仍需把字形
+还原为 .glif，只有按 --unicodes / --glyphs 编译部分字形时才能省去解析 XML 的时间。
+
+文件结构（小端序）:
+    文件头    magic "PGS1"、版本、字形数、段数
+    段目录    (标签, 偏移, 长度)，各段按 8 字节对齐
+    GREC      每个字形一条记录：点/轮廓/组件/码位在各数组中的起始位置与数量、advance
+    PTXY      坐标 (x, y)，全部在 int16 范围内时为 int16，否则为 int32；
+              含非整数坐标的字形另在 XTRA 中保存精确值
+    PTYP      uint8 点类型（0 off-curve、1 move、2 line、3 curve、4 qcurve，0x80 smooth）
+    CEND      uint32 各轮廓的结束位置（字形内的点下标，不含）
+    CBAS/CMAT 组件引用的名称编号与 6 个变换参数 (float64)
+    UNIC      uint32 码位；CMAP 为按码位排序的 (码位, 字形编号)
+    NOFF/NAME 名称表（字形名称在前，之后是字体中不存在的组件名称）
+    XTRA      个别字形的其他数据（锚点、参考线、lib、标识符等，二进制 plist）
+    META/FILE 非字形文件的索引 (JSON) 与原始数据
+
+Usage 使用方法:
+    python glyph_store.py build PlangothicP1-Regular.ufoz -o PlangothicP1-Regular.pgs
+    python glyph_store.py export PlangothicP1-Regular.pgs -o PlangothicP1-Regular.ufoz
+    python glyph_store.py verify PlangothicP1-Regular.ufoz PlangothicP1-Regular.pgs
+    python glyph_store.py info PlangothicP1-Regular.pgs
+
+Library 库接口:
+    from glyph_store import GlyphStore
+
+    with GlyphStore("PlangothicP1-Regular.pgs") as store:
+        coordinates, types, ends = store.outline("uni4E00")   # NumPy 数组视图
+        name = store.glyph_for_codepoint(0x4E00)
+        store.draw(name, pen)
+        glyph_set = store.glyph_set()                         # 与 fontTools 的 glyph set 接口相同
+"""
+
+import sys
+import json
+import mmap
+import time
+import struct
+import zipfile
+import plistlib
+import argparse
+import posixpath
+from types import SimpleNamespace
+from collections.abc import Mapping
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+try:
+    from fontTools.ufoLib.glifLib import readGlyphFromString, writeGlyphToString
+    from fontTools.pens.pointPen import PointToSegmentPen
+except ModuleNotFoundError:
+    readGlyphFromString = None
+
+from ufoz import UfoSource, UfozSource, UfozError, GlyphInfo, DEFAULT_LAYER_DIR
+
+MAGIC = b'PGS1'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII')   # magic, 版本, 保留, 字形数, 段数
+SECTION = struct.Struct('<4sQQ')    # 标签, 偏移, 长度
+ALIGNMENT = 8
+
+RECORD_DTYPE = [
+    ('point_start', '<u4'), ('point_count', '<u4'),
+    ('contour_start', '<u4'), ('contour_count', '<u4'),
+    ('component_start', '<u4'), ('component_count', '<u4'),
+    ('unicode_start', '<u4'), ('unicode_count', '<u4'),
+    ('width', '<f8'), ('height', '<f8'),
+    ('extra_start', '<u8'), ('extra_length', '<u4'), ('reserved', '<u4'),
+]
+
+# 段标签 -> (dtype, 每行元素数)；dtype 为 None 的段是原始字节
+SECTIONS = {
+    'GREC': (RECORD_DTYPE, 1),
+    'PTXY': ('<i4', 2),
+    'PTYP': ('u1', 1),
+    'CEND': ('<u4', 1),
+    'CBAS': ('<u4', 1),
+    'CMAT': ('<f8', 6),
+    'UNIC': ('<u4', 1),
+    'CMAP': ('<u4', 2),
+    'NOFF': ('<u4', 1),
+    'NAME': (None, 1),
+    'XTRA': (None, 1),
+    'META': (None, 1),
+    'FILE': (None, 1),
+}
+
+POINT_TYPES = [None, 'move', 'line', 'curve', 'qcurve']
+POINT_TYPE_CODES = {segment_type: code for code, segment_type in enumerate(POINT_TYPES)}
+SMOOTH = 0x80
+
+# 保存在 XTRA 中的 glif 属性
+GLYPH_ATTRIBUTES = ('note', 'image', 'guidelines', 'anchors', 'lib')
+
+
+class GlyphStoreError(UfozError):
+    """.pgs 文件结构错误"""
+
+
+def _number(value):
+    """整数值的浮点数还原为 int，使重新序列化的 .glif 与原文件一致"""
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+class _RecordingPointPen:
+    """记录一个字形的轮廓与组件，供写入字形库"""
+
+    def __init__(self):
+        self.points = []
+        self.types = []
+        self.ends = []
+        self.components = []
+        self.sequence = []
+        self.identifiers = {}
+        self.point_names = {}
+
+    def beginPath(self, identifier=None, **kwargs):
+        if identifier is not None:
+            self.identifiers[f"c{len(self.ends)}"] = identifier
+        self.sequence.append('c')
+
+    def endPath(self):
+        self.ends.append(len(self.points))
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None, identifier=None, **kwargs):
+        index = len(self.points)
+        if name is not None:
+            self.point_names[str(index)] = name
+        if identifier is not None:
+            self.identifiers[f"p{index}"] = identifier
+        self.points.append(pt)
+        self.types.append(POINT_TYPE_CODES[segmentType] | (SMOOTH if smooth else 0))
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None, **kwargs):
+        if identifier is not None:
+            self.identifiers[f"k{len(self.components)}"] = identifier
+        self.components.append((baseGlyphName, tuple(transformation)))
+        self.sequence.append('k')
+
+
+class _StoreWriter:
+    """逐个追加字形，最后写出 .pgs 文件"""
+
+    def __init__(self, glyph_names):
+        self.glyph_names = list(glyph_names)
+        self.string_index = {name: index for index, name in enumerate(self.glyph_names)}
+        self.strings = list(self.glyph_names)
+        self.records = np.zeros(len(self.glyph_names), dtype=RECORD_DTYPE)
+        self.points, self.types, self.ends = [], [], []
+        self.component_bases, self.component_matrices = [], []
+        self.unicodes, self.cmap = [], []
+        self.extras = bytearray()
+
+    def _string(self, name):
+        if name not in self.string_index:
+            self.string_index[name] = len(self.strings)
+            self.strings.append(name)
+        return self.string_index[name]
+
+    def add(self, index, glyph, pen):
+        record = self.records[index]
+        record['point_start'], record['point_count'] = len(self.points), len(pen.points)
+        record['contour_start'], record['contour_count'] = len(self.ends), len(pen.ends)
+        record['component_start'], record['component_count'] = len(self.component_bases), len(pen.components)
+        record['unicode_start'], record['unicode_count'] = len(self.unicodes), len(glyph.unicodes)
+        record['width'] = getattr(glyph, 'width', 0) or 0
+        record['height'] = getattr(glyph, 'height', 0) or 0
+
+        extra = {}
+        coordinates = [value for point in pen.points for value in point]
+        if any(isinstance(value, float) and not value.is_integer() for value in coordinates):
+            extra['coordinates'] = [float(value) for value in coordinates]
+        self.points.extend((round(x), round(y)) for x, y in pen.points)
+        self.types.extend(pen.types)
+        self.ends.extend(pen.ends)
+
+        for base, transformation in pen.components:
+            self.component_bases.append(self._string(base))
+            self.component_matrices.append(transformation)
+        # 轮廓与组件交错排列时记录原始顺序
+        if pen.sequence != sorted(pen.sequence):
+            extra['sequence'] = ''.join(pen.sequence)
+
+        self.unicodes.extend(glyph.unicodes)
+        self.cmap.extend((codepoint, index) for codepoint in glyph.unicodes)
+
+        if pen.identifiers:
+            extra['identifiers'] = pen.identifiers
+        if pen.point_names:
+            extra['point_names'] = pen.point_names
+        for attribute in GLYPH_ATTRIBUTES:
+            value = getattr(glyph, attribute, None)
+            if value:
+                extra[attribute] = value
+        if extra:
+            data = plistlib.dumps(extra, fmt=plistlib.FMT_BINARY)
+            record['extra_start'], record['extra_length'] = len(self.extras), len(data)
+            self.extras += data
+
+    def write(self, output_path, meta, files):
+        names = [name.encode('utf-8') for name in self.strings]
+        name_offsets = np.zeros(len(names) + 1, dtype='<u4')
+        name_offsets[1:] = np.cumsum([len(name) for name in names])
+        cmap = sorted(self.cmap, key=lambda item: item[0])
+
+        file_data = bytearray()
+        files_index = {}
+        for relative_path, data in files.items():
+            files_index[relative_path] = [len(file_data), len(data)]
+            file_data += data
+
+        points = np.array(self.points, dtype='<i4').reshape(-1, 2)
+        if points.size == 0 or (points.min() >= -0x8000 and points.max() < 0x8000):
+            points = points.astype('<i2')
+        meta = dict(meta, coordinate_type=points.dtype.str)
+
+        sections = {
+            'GREC': self.records.tobytes(),
+            'PTXY': points.tobytes(),
+            'PTYP': np.array(self.types, dtype='u1').tobytes(),
+            'CEND': np.array(self.ends, dtype='<u4').tobytes(),
+            'CBAS': np.array(self.component_bases, dtype='<u4').tobytes(),
+            'CMAT': np.array(self.component_matrices, dtype='<f8').reshape(-1, 6).tobytes(),
+            'UNIC': np.array(self.unicodes, dtype='<u4').tobytes(),
+            'CMAP': np.array(cmap, dtype='<u4').reshape(-1, 2).tobytes(),
+            'NOFF': name_offsets.tobytes(),
+            'NAME': b''.join(names),
+            'XTRA': bytes(self.extras),
+            'META': json.dumps(dict(meta, files=files_index), ensure_ascii=False).encode('utf-8'),
+            'FILE': bytes(file_data),
+        }
+
+        offset = HEADER.size + SECTION.size * len(sections)
+        directory, chunks = [], []
+        for tag, data in sections.items():
+            padding = -offset % ALIGNMENT
+            chunks.append(b'\0' * padding + data)
+            offset += padding
+            directory.append(SECTION.pack(tag.encode('ascii'), offset, len(data)))
+            offset += len(data)
+
+        with open(output_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, len(self.glyph_names), len(sections)))
+            f.write(b''.join(directory))
+            for chunk in chunks:
+                f.write(chunk)
+
+
+def build_store(ufoz_path, output_path):
+    """
+    将 .ufoz 源文件转换为 .pgs 字形库
+
+    Returns:
+        int: 字形数
+    """
+    with UfozSource(ufoz_path) as source:
+        layer_dir = source.layers[0][1]
+        contents = source.contents(layer_dir)
+        glyph_order = source.glyph_order
+        writer = _StoreWriter(glyph_order)
+
+        for index, name in enumerate(glyph_order):
+            glyph = SimpleNamespace(unicodes=[])
+            pen = _RecordingPointPen()
+            readGlyphFromString(source.read_glif(name, layer_dir), glyph, pen)
+            writer.add(index, glyph, pen)
+
+        # 默认图层的 .glif 由数组重建，其余文件（包括默认图层的 contents.plist）原样保存
+        glyph_files = {posixpath.join(layer_dir, filename) for filename in contents.values()}
+        files = {}
+        prefix = source.root + '/'
+        for entry in sorted(source.names):
+            relative_path = entry[len(prefix):]
+            if entry.startswith(prefix) and relative_path and not entry.endswith('/') and \
+                    relative_path not in glyph_files:
+                files[relative_path] = source.read(relative_path)
+
+        writer.write(output_path, {'root': source.root, 'default_layer': layer_dir}, files)
+    return len(glyph_order)
+
+
+class GlyphStore(UfoSource):
+    """以 mmap 方式打开的 .pgs 字形库"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        if np is None:
+            raise RuntimeError("未安装 NumPy，请先运行 pip3 install numpy")
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, _, glyph_count, section_count = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise GlyphStoreError(f"{path} 不是有效的字形库文件")
+        if version != VERSION:
+            self._mmap.close()
+            raise GlyphStoreError(f"不支持的字形库版本: {version}")
+
+        directory = {}
+        for index in range(section_count):
+            tag, offset, length = SECTION.unpack_from(self._mmap, HEADER.size + SECTION.size * index)
+            directory[tag.decode('ascii')] = (offset, length)
+        offset, length = directory['META']
+        meta = json.loads(self._mmap[offset:offset + length])
+
+        self._sections = {}
+        for tag, (offset, length) in directory.items():
+            dtype, width = SECTIONS.get(tag, (None, 1))
+            if tag == 'PTXY':
+                dtype = meta['coordinate_type']
+            if dtype is None:
+                self._sections[tag] = memoryview(self._mmap)[offset:offset + length]
+            else:
+                array = np.frombuffer(self._mmap, dtype=dtype, count=length // np.dtype(dtype).itemsize,
+                                      offset=offset)
+                self._sections[tag] = array.reshape(-1, width) if width > 1 else array
+        self.records = self._sections['GREC']
+
+        offsets = self._sections['NOFF']
+        blob = bytes(self._sections['NAME'])
+        self.strings = [blob[offsets[index]:offsets[index + 1]].decode('utf-8') for index in range(len(offsets) - 1)]
+        self.glyph_names = self.strings[:glyph_count]
+        self._index = {name: index for index, name in enumerate(self.glyph_names)}
+
+        self.root = meta['root']
+        self.default_layer = meta['default_layer']
+        self._files = meta['files']
+        self._glyph_files = None
+        self._names = None
+
+    @property
+    def glyph_files(self):
+        """默认图层中 .glif 的相对路径 -> 字形名称（第一次使用时读取 contents.plist）"""
+        if self._glyph_files is None:
+            self._glyph_files = {
+                posixpath.join(self.default_layer, filename): name
+                for name, filename in self.contents(self.default_layer).items()
+            }
+        return self._glyph_files
+
+    @property
+    def names(self):
+        """存储中所有文件的完整路径，与 UfozSource.names 对应"""
+        if self._names is None:
+            self._names = {self.entry(relative_path) for relative_path in [*self._files, *self.glyph_files]}
+        return self._names
+
+    def exists(self, relative_path):
+        return relative_path in self._files or relative_path in self.glyph_files
+
+    def close(self):
+        self._sections = {}
+        self.records = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # outline() 返回的数组视图仍在使用，最后一个视图释放后 mmap 由垃圾回收关闭
+            pass
+
+    def __len__(self):
+        return len(self.glyph_names)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    @property
+    def glyph_order(self):
+        return list(self.glyph_names)
+
+    def index(self, name):
+        """字形名称 -> 字形编号"""
+        return self._index[name]
+
+    def glyph_for_codepoint(self, codepoint):
+        """返回码位对应的字形名称，不存在时返回 None"""
+        cmap = self._sections['CMAP']
+        position = int(np.searchsorted(cmap[:, 0], codepoint))
+        if position < len(cmap) and cmap[position, 0] == codepoint:
+            return self.glyph_names[cmap[position, 1]]
+        return None
+
+    def unicodes(self, name):
+        record = self.records[self._index[name]]
+        start = record['unicode_start']
+        return [int(codepoint) for codepoint in self._sections['UNIC'][start:start + record['unicode_count']]]
+
+    def components(self, name):
+        """[(组件名称, 6 个变换参数)]"""
+        record = self.records[self._index[name]]
+        start, count = record['component_start'], record['component_count']
+        bases = self._sections['CBAS'][start:start + count]
+        matrices = self._sections['CMAT'][start:start + count]
+        return [(self.strings[base], tuple(_number(value) for value in matrix))
+                for base, matrix in zip(bases, matrices)]
+
+    def outline(self, name):
+        """
+        返回字形轮廓的数组视图（不复制，关闭字形库后仍然可用）
+
+        Returns:
+            (坐标 int32 [点数, 2], 点类型 uint8 [点数], 各轮廓的结束位置 uint32 [轮廓数])
+        """
+        record = self.records[self._index[name]]
+        start, count = record['point_start'], record['point_count']
+        contour_start = record['contour_start']
+        return (self._sections['PTXY'][start:start + count],
+                self._sections['PTYP'][start:start + count],
+                self._sections['CEND'][contour_start:contour_start + record['contour_count']])
+
+    def extra(self, name):
+        """字形的其他数据（锚点、参考线、lib、标识符等）"""
+        record = self.records[self._index[name]]
+        if not record['extra_length']:
+            return {}
+        start = int(record['extra_start'])
+        return plistlib.loads(bytes(self._sections['XTRA'][start:start + int(record['extra_length'])]))
+
+    def draw_points(self, name, point_pen, extra=None):
+        """将字形轮廓与组件绘制到 point pen"""
+        if extra is None:
+            extra = self.extra(name)
+        identifiers = extra.get('identifiers', {})
+        point_names = extra.get('point_names', {})
+        coordinates, types, ends = self.outline(name)
+        if 'coordinates' in extra:
+            exact = extra['coordinates']
+            points = [(_number(exact[2 * index]), _number(exact[2 * index + 1])) for index in range(len(types))]
+        else:
+            points = coordinates.tolist()
+        types = types.tolist()
+        components = self.components(name)
+
+        contour_index = component_index = 0
+        sequence = extra.get('sequence') or 'c' * len(ends) + 'k' * len(components)
+        for kind in sequence:
+            if kind == 'c':
+                start = int(ends[contour_index - 1]) if contour_index else 0
+                end = int(ends[contour_index])
+                point_pen.beginPath(identifier=identifiers.get(f"c{contour_index}"))
+                for index in range(start, end):
+                    code = types[index]
+                    point_pen.addPoint(tuple(points[index]), POINT_TYPES[code & ~SMOOTH], bool(code & SMOOTH),
+                                       point_names.get(str(index)), identifier=identifiers.get(f"p{index}"))
+                point_pen.endPath()
+                contour_index += 1
+            else:
+                base, transformation = components[component_index]
+                point_pen.addComponent(base, transformation, identifier=identifiers.get(f"k{component_index}"))
+                component_index += 1
+
+    def draw(self, name, pen):
+        """将字形绘制到 segment pen"""
+        self.draw_points(name, PointToSegmentPen(pen))
+
+    def glyph_set(self):
+        """名称 -> 可绘制字形的映射，可以代替 TTFont.getGlyphSet() 交给 BasePen 等需要 glyphSet 的 pen"""
+        return _StoreGlyphSet(self)
+
+    def glyph(self, name):
+        """返回带有 width、height、unicodes 等 glif 属性的字形对象"""
+        record = self.records[self._index[name]]
+        glyph = SimpleNamespace(width=_number(record['width']), height=_number(record['height']),
+                                unicodes=self.unicodes(name))
+        extra = self.extra(name)
+        for attribute in GLYPH_ATTRIBUTES:
+            if attribute in extra:
+                setattr(glyph, attribute, extra[attribute])
+        return glyph, extra
+
+    def glif(self, name):
+        """重建字形的 .glif 数据"""
+        glyph, extra = self.glyph(name)
+        return writeGlyphToString(name, glyph, lambda pen: self.draw_points(name, pen, extra)).encode('utf-8')
+
+    def read(self, relative_path):
+        if relative_path in self._files:
+            offset, length = self._files[relative_path]
+            return bytes(self._sections['FILE'][offset:offset + length])
+        if relative_path in self.glyph_files:
+            return self.glif(self.glyph_files[relative_path])
+        raise KeyError(relative_path)
+
+    def unicode_map(self, cache_dir=None):
+        """字形名称 -> 码位列表，直接取自码位数组（不需要磁盘缓存）"""
+        if self._unicode_map is None:
+            unicodes = self._sections['UNIC'].tolist()
+            self._unicode_map = {
+                name: unicodes[start:start + count]
+                for name, start, count in zip(self.glyph_names, self.records['unicode_start'].tolist(),
+                                              self.records['unicode_count'].tolist())
+            }
+        return self._unicode_map
+
+    def read_unicodes(self, name, layer_dir=DEFAULT_LAYER_DIR):
+        if layer_dir != self.default_layer:
+            return super().read_unicodes(name, layer_dir)
+        return self.unicodes(name)
+
+    def glyph_info(self, name, layer_dir=DEFAULT_LAYER_DIR):
+        if layer_dir != self.default_layer:
+            return super().glyph_info(name, layer_dir)
+        record = self.records[self._index[name]]
+        return GlyphInfo(name, self.unicodes(name), int(record['contour_count']), int(record['point_count']),
+                         [base for base, _ in self.components(name)])
+
+    def export_ufoz(self, output_path):
+        """转换回 .ufoz"""
+        with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            for relative_path in sorted(self._files):
+                archive.writestr(self.entry(relative_path), self.read(relative_path))
+            for relative_path in sorted(self.glyph_files):
+                archive.writestr(self.entry(relative_path), self.read(relative_path))
+
+
+class _StoreGlyph:
+    """字形库中的一个字形，接口与 fontTools glyph set 中的字形相同"""
+
+    def __init__(self, store, name):
+        self.store = store
+        self.name = name
+        record = store.records[store.index(name)]
+        self.width = _number(record['width'])
+        self.height = _number(record['height'])
+
+    def draw(self, pen):
+        self.store.draw(self.name, pen)
+
+    def drawPoints(self, point_pen):
+        self.store.draw_points(self.name, point_pen)
+
+
+class _StoreGlyphSet(Mapping):
+    def __init__(self, store):
+        self.store = store
+
+    def __getitem__(self, name):
+        if name not in self.store:
+            raise KeyError(name)
+        return _StoreGlyph(self.store, name)
+
+    def __iter__(self):
+        return iter(self.store.glyph_names)
+
+    def __len__(self):
+        return len(self.store)
+
+    def __contains__(self, name):
+        return name in self.store
+
+
+def _read_glyph(data):
+    """解析 .glif，返回可比较的 (属性, 轮廓) 数据"""
+    glyph = SimpleNamespace(unicodes=[])
+    pen = _RecordingPointPen()
+    readGlyphFromString(data, glyph, pen)
+    attributes = {key: value for key, value in vars(glyph).items() if value not in (None, [], {}, '')}
+    for key in ('width', 'height'):
+        attributes[key] = _number(attributes.get(key, 0))
+    outline = (pen.points, pen.types, pen.ends, pen.components, pen.sequence, pen.identifiers, pen.point_names)
+    return attributes, outline
+
+
+def verify_store(ufoz_path, store_path):
+    """
+    检查字形库与 .ufoz 源文件的内容是否一致
+
+    Returns:
+        list: 不一致的条目（字形名称或文件路径）
+    """
+    mismatches = []
+    with UfozSource(ufoz_path) as source, GlyphStore(store_path) as store:
+        if source.glyph_order != store.glyph_order:
+            mismatches.append('public.glyphOrder')
+        for name in source.glyph_order:
+            if name not in store or _read_glyph(source.read_glif(name, store.default_layer)) != \
+                    _read_glyph(store.read_glif(name, store.default_layer)):
+                mismatches.append(name)
+        for entry in sorted(source.names | store.names):
+            relative_path = entry[len(source.root) + 1:]
+            if entry.endswith('/') or relative_path in store.glyph_files:
+                continue
+            if entry not in source.names or entry not in store.names or \
+                    source.read(relative_path) != store.read(relative_path):
+                mismatches.append(relative_path)
+    return mismatches
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='二进制字形库 (.pgs) 工具')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help='将 .ufoz 转换为 .pgs')
+    build.add_argument('ufoz_file', help='.ufoz 源文件路径')
+    build.add_argument('--output', '-o', required=True, help='.pgs 输出路径')
+
+    export = subparsers.add_parser('export', help='将 .pgs 转换回 .ufoz')
+    export.add_argument('store_file', help='.pgs 字形库路径')
+    export.add_argument('--output', '-o', required=True, help='.ufoz 输出路径')
+
+    verify = subparsers.add_parser('verify', help='检查 .pgs 与 .ufoz 的内容是否一致')
+    verify.add_argument('ufoz_file', help='.ufoz 源文件路径')
+    verify.add_argument('store_file', help='.pgs 字形库路径')
+
+    info = subparsers.add_parser('info', help='显示 .pgs 的内容统计与读取耗时')
+    info.add_argument('store_file', help='.pgs 字形库路径')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if np is None or readGlyphFromString is None:
+        print("错误: 需要 NumPy 与 fontTools，请先运行 pip3 install numpy fonttools")
+        return 1
+
+    start = time.time()
+    try:
+        if args.command == 'build':
+            count = build_store(args.ufoz_file, args.output)
+            print(f"已转换 {count} 个字形（{time.time() - start:.2f} 秒）: {args.output}")
+        elif args.command == 'export':
+            with GlyphStore(args.store_file) as store:
+                store.export_ufoz(args.output)
+            print(f"已导出（{time.time() - start:.2f} 秒）: {args.output}")
+        elif args.command == 'verify':
+            mismatches = verify_store(args.ufoz_file, args.store_file)
+            if mismatches:
+                print(f"有 {len(mismatches)} 处不一致: {', '.join(mismatches[:10])}")
+                return 1
+            else:
+                print(f"内容一致（{time.time() - start:.2f} 秒）")
+        else:
+            with GlyphStore(args.store_file) as store:
+                opened = time.time()
+                points = int(store.records['point_count'].sum())
+                contours = int(store.records['contour_count'].sum())
+                composites = int(np.count_nonzero(store.records['component_count']))
+                encoded = int(np.count_nonzero(store.records['unicode_count']))
+                for name in store.glyph_order:
+                    store.outline(name)
+                print(f"{store.root}: {len(store)} 个字形（已编码 {encoded}，复合 {composites}），"
+                      f"{contours} 个轮廓，{points} 个点")
+                print(f"打开耗时 {(opened - start) * 1000:.1f} 毫秒，"
+                      f"读取全部轮廓 {(time.time() - opened) * 1000:.1f} 毫秒")
+    except (OSError, zipfile.BadZipFile, UfozError) as e:
+        print(f"错误: {e}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
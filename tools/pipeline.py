@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+pipeline.py - 发布流程编排工具
+Release pipeline orchestrator with content-addressed artifacts
+
+将发布流程描述为每个母版（sources/*.ufoz）上的有向无环图：
+
+    compile (build.py 的 fontmake 编译) -> optimize (optimize_glyph.py，可选)
+        -> convert (convert_font.py，每种格式一个分支) / subset (font_subset.py)
+
+每个阶段的输出按其输入内容、参数、工具脚本（包括其导入的本地模块）内容
+与工具链版本计算的哈希保存在产物库中；
+再次运行时输入未改变的阶段直接复用已有产物，只有受影响的阶段重新执行。
+不同母版、不同格式等互不依赖的分支并行执行。
+
+Usage 使用方法:
+    python pipeline.py                                   # 编译 sources/ 中的全部母版
+    python pipeline.py --optimize --formats woff2,woff -j 4
+    python pipeline.py ../sources/PlangothicP1-Regular.ufoz --subset-text-file 常用字.txt -f woff2
+    python pipeline.py --formats woff2 --dry-run         # 只显示需要执行的阶段
+
+Stages 阶段:
+    compile     解压 .ufoz 并用 fontmake 编译为 TTF（参数与 build.py 相同）
+    optimize    使用 FontForge 逐字形优化轮廓（--optimize）
+    convert     使用 FontForge 转换为其他格式（--formats，ttf 仅在 --autohint 时转换）
+    subset      创建子集（--subset-unicodes / --subset-text / --subset-text-file）
+"""
+
+import os
+import ast
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import tempfile
+import subprocess
+from importlib import metadata
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from multiprocessing import cpu_count
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TOOLS_DIR)
+SOURCES_DIR = os.path.join(REPO_DIR, 'sources')
+
+sys.path.insert(0, SOURCES_DIR)
+from build import FONTMAKE_OPTIONS, extract_ufoz  # noqa: E402
+
+# 产物键格式版本，键的组成方式改变时递增
+PIPELINE_VERSION = 2
+DEFAULT_STORE = os.path.join(REPO_DIR, '.pipeline_store')
+DEFAULT_OUTPUT_DIR = os.path.join(REPO_DIR, 'build')
+
+# 各阶段调用的脚本，脚本及其导入的 tools/、sources/ 模块的内容都参与产物键的计算
+STAGE_SCRIPTS = {
+    'compile': [os.path.join(SOURCES_DIR, 'build.py')],
+    'optimize': [os.path.join(TOOLS_DIR, 'optimize_glyph.py')],
+    'convert': [os.path.join(TOOLS_DIR, 'convert_font.py'), os.path.join(TOOLS_DIR, 'ttf_autohint.py')],
+    'subset': [os.path.join(TOOLS_DIR, 'font_subset.py')],
+}
+# 本地模块的查找目录
+MODULE_DIRS = [TOOLS_DIR, SOURCES_DIR]
+
+FONTFORGE = os.environ.get('FONTFORGE', 'fontforge')
+PYTHON = sys.executable
+
+# 各阶段使用的 Python 包与外部程序，其版本也参与产物键的计算
+STAGE_PACKAGES = {
+    'compile': ['fontmake', 'ufo2ft', 'ufoLib2', 'fontTools'],
+    'optimize': [],
+    'convert': ['fontTools'],
+    'subset': ['fontTools', 'brotli'],
+}
+STAGE_COMMANDS = {
+    'compile': [],
+    'optimize': [[FONTFORGE, '-version']],
+    'convert': [[FONTFORGE, '-version'], ['ttfautohint', '--version']],
+    'subset': [],
+}
+
+
+def file_digest(path):
+    """计算文件内容的 SHA-256 摘要"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def local_modules(paths):
+    """
+    脚本及其（递归）导入的本地模块路径
+
+    包括函数内延迟导入的模块；只在 MODULE_DIRS 中查找，第三方库与标准库不计入。
+    """
+    found = []
+    pending = [os.path.abspath(path) for path in paths]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.append(path)
+        with open(path, 'rb') as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                for directory in MODULE_DIRS:
+                    module = os.path.join(directory, name.split('.')[0] + '.py')
+                    if os.path.isfile(module):
+                        pending.append(module)
+                        break
+    return sorted(found)
+
+
+def package_version(name):
+    """已安装的 Python 包版本，未安装时返回 None"""
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+def command_version(command):
+    """外部程序的版本输出，无法运行时返回 None"""
+    try:
+        result = subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, timeout=60)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return (result.stdout + result.stderr).decode('utf-8', 'replace').strip()
+
+
+class ArtifactStore:
+    """内容寻址的产物库：每个产物是一个以产物键命名的目录，包含输出文件与 meta.json"""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def lookup(self, key):
+        """返回产物的元数据，不存在时返回 None"""
+        try:
+            with open(os.path.join(self.path(key), 'meta.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def staging_dir(self):
+        """创建用于生成产物的临时目录（与产物库位于同一文件系统）"""
+        return tempfile.mkdtemp(prefix='.staging-', dir=self.root)
+
+    def commit(self, key, staging_dir, meta):
+        """将临时目录中的输出登记为产物"""
+        with open(os.path.join(staging_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.rename(staging_dir, target)
+        except OSError:
+            # 相同的产物已由其他进程生成
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+class Task:
+    """流程图中的一个阶段实例"""
+
+    def __init__(self, name, stage, inputs, params, outputs):
+        """
+        Args:
+            name: 任务名称（如 PlangothicP1-Regular:convert-woff2）
+            stage: 阶段类型（compile、optimize、convert、subset）
+            inputs: 上游 Task 或源文件路径的列表
+            params: 影响输出的参数
+            outputs: 输出文件名列表
+        """
+        self.name = name
+        self.stage = stage
+        self.inputs = inputs
+        self.params = params
+        self.outputs = outputs
+        self.key = None
+        self.digests = None
+        self.cached = None
+
+    @property
+    def upstream(self):
+        return [item for item in self.inputs if isinstance(item, Task)]
+
+
+class Pipeline:
+    """根据命令行参数构建并执行流程图"""
+
+    def __init__(self, store, jobs=None, dry_run=False):
+        self.store = store
+        self.jobs = jobs or cpu_count()
+        self.dry_run = dry_run
+        self.tasks = []
+        self._file_digests = {}
+        self._script_digests = {}
+
+    def add(self, name, stage, inputs, params, outputs):
+        task = Task(name, stage, inputs, params, outputs)
+        self.tasks.append(task)
+        return task
+
+    def _source_digest(self, path):
+        path = os.path.abspath(path)
+        if path not in self._file_digests:
+            self._file_digests[path] = file_digest(path)
+        return self._file_digests[path]
+
+    def _stage_digest(self, stage):
+        """阶段的工具摘要：脚本与导入的本地模块内容、Python 包与外部程序的版本"""
+        if stage not in self._script_digests:
+            self._script_digests[stage] = {
+                'scripts': {
+                    os.path.relpath(path, REPO_DIR): file_digest(path)
+                    for path in local_modules(STAGE_SCRIPTS[stage])
+                },
+                'packages': {name: package_version(name) for name in STAGE_PACKAGES[stage]},
+                'commands': [
+                    hashlib.sha256((command_version(command) or '').encode('utf-8')).hexdigest()
+                    for command in STAGE_COMMANDS[stage]
+                ],
+            }
+        return self._script_digests[stage]
+
+    def task_key(self, task):
+        """产物键：阶段、参数、工具摘要与全部输入文件的内容哈希"""
+        inputs = []
+        for item in task.inputs:
+            if isinstance(item, Task):
+                inputs.append(sorted(item.digests.items()))
+            else:
+                inputs.append(self._source_digest(item))
+        signature = json.dumps([
+            PIPELINE_VERSION, task.stage, task.params, self._stage_digest(task.stage), inputs,
+        ], sort_keys=True)
+        return hashlib.sha256(signature.encode('utf-8')).hexdigest()
+
+    def input_paths(self, task):
+        """上游产物的第一个输出文件或源文件路径"""
+        paths = []
+        for item in task.inputs:
+            if isinstance(item, Task):
+                paths.append(os.path.join(self.store.path(item.key), item.outputs[0]))
+            else:
+                paths.append(os.path.abspath(item))
+        return paths
+
+    def execute(self, task):
+        """执行单个任务（在工作线程中运行，各阶段的实际工作都在子进程中完成）"""
+        staging = self.store.staging_dir()
+        start = time.time()
+        try:
+            run_stage(task, self.input_paths(task), staging)
+            digests = {}
+            for output in task.outputs:
+                path = os.path.join(staging, output)
+                if not os.path.exists(path):
+                    raise RuntimeError(f"没有生成输出文件 {output}")
+                digests[output] = file_digest(path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        meta = {
+            'task': task.name,
+            'stage': task.stage,
+            'params': task.params,
+            'outputs': digests,
+            'seconds': round(time.time() - start, 3),
+        }
+        self.store.commit(task.key, staging, meta)
+        return digests
+
+    def _resolve(self, task):
+        """计算产物键并检查产物库，命中时返回 True"""
+        task.key = self.task_key(task)
+        meta = self.store.lookup(task.key)
+        if meta is not None:
+            task.digests = meta['outputs']
+            task.cached = True
+            return True
+        task.cached = False
+        return False
+
+    def run(self):
+        """
+        按依赖关系并行执行所有任务
+
+        Returns:
+            bool: 是否全部成功
+        """
+        pending = list(self.tasks)
+        running = {}
+        failed = set()
+        success = True
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while pending or running:
+                progressed = False
+                for task in list(pending):
+                    upstream = task.upstream
+                    if any(item in failed for item in upstream):
+                        pending.remove(task)
+                        failed.add(task)
+                        print(f"  - {task.name}：上游阶段失败，已跳过")
+                        progressed = True
+                        continue
+                    if any(item.digests is None for item in upstream):
+                        continue
+
+                    pending.remove(task)
+                    progressed = True
+                    if self._resolve(task):
+                        print(f"  ✓ {task.name}（已缓存）")
+                    elif self.dry_run:
+                        # 未执行的阶段输出未知，下游阶段无法判断是否命中
+                        task.digests = {}
+                        print(f"  * {task.name}：需要执行")
+                    else:
+                        print(f"  → {task.name}：开始执行")
+                        running[executor.submit(self.execute, task)] = task
+
+                if progressed:
+                    continue
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = running.pop(future)
+                    try:
+                        task.digests = future.result()
+                        print(f"  ✓ {task.name}")
+                    except Exception as e:
+                        failed.add(task)
+                        success = False
+                        print(f"  ✗ {task.name}：{e}")
+
+        return success and not failed
+
+    def export(self, task, output_dir):
+        """
+        将任务的输出复制到输出目录
+
+        不使用硬链接：输出目录中的文件可能被原地改写（如 ttf_autohint.py build/X.ttf），
+        与产物库共用数据会改变已登记的产物而不改变其记录的摘要。
+        内容与产物一致的已有文件不再复制。
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        exported = []
+        for output in task.outputs:
+            source = os.path.join(self.store.path(task.key), output)
+            target = os.path.join(output_dir, output)
+            exported.append(target)
+            if os.path.isfile(target) and not os.path.samefile(source, target) and \
+                    file_digest(target) == task.digests[output]:
+                continue
+            tmp_path = f"{target}.tmp"
+            shutil.copyfile(source, tmp_path)
+            os.replace(tmp_path, target)
+        return exported
+
+
+def run_command(command, cwd=None):
+    """运行外部命令，失败时以其错误输出的最后一行抛出 RuntimeError"""
+    result = subprocess.run(command, cwd=cwd, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        stderr = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+        raise RuntimeError(stderr[-1] if stderr else f"{command[0]} 退出码 {result.returncode}")
+
+
+def run_stage(task, inputs, output_dir):
+    """执行阶段，将 task.outputs 写入 output_dir"""
+    params = task.params
+    output = os.path.join(output_dir, task.outputs[0])
+
+    if task.stage == 'compile':
+        work_dir = tempfile.mkdtemp(prefix='compile-', dir=output_dir)
+        try:
+            ufo_dir = extract_ufoz(inputs[0], work_dir)
+            run_command(['fontmake', '-u', os.path.abspath(ufo_dir), *FONTMAKE_OPTIONS,
+                         '-o', 'ttf', '--output-path', output], cwd=work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    elif task.stage == 'optimize':
+        # optimize_glyph.py 在输入文件旁边生成 *_merge_glyphs 文件
+        source = os.path.join(output_dir, 'input.ttf')
+        shutil.copyfile(inputs[0], source)
+        run_command([FONTFORGE, '-script', STAGE_SCRIPTS['optimize'][0], source, '-s', str(params['simplify'])])
+        os.replace(os.path.join(output_dir, 'input_merge_glyphs.ttf'), output)
+        os.remove(source)
+
+    elif task.stage == 'convert':
+        command = [FONTFORGE, '-script', STAGE_SCRIPTS['convert'][0], inputs[0], '-f', params['format'], '-o', output]
+        if params.get('autohint'):
+            command += ['--autohint', f"--hint-cache={params['hint_cache']}"]
+        run_command(command)
+
+    elif task.stage == 'subset':
+        command = [PYTHON, STAGE_SCRIPTS['subset'][0], inputs[0], '-o', output]
+        if params.get('flavor'):
+            command += ['-f', params['flavor']]
+        if params.get('unicodes'):
+            command += ['-u', params['unicodes']]
+        if params.get('text'):
+            command += ['-t', params['text']]
+        if len(inputs) > 1:
+            command += ['--text-file', *inputs[1:]]
+        if params.get('layout_features'):
+            command += ['--layout-features', params['layout_features']]
+        run_command(command)
+
+    else:
+        raise ValueError(f"未知的阶段: {task.stage}")
+
+
+def build_graph(pipeline, args):
+    """
+    为每个母版添加任务
+
+    Returns:
+        list: 需要导出到输出目录的任务
+    """
+    formats = [fmt.strip() for fmt in args.formats.split(',') if fmt.strip()] if args.formats else []
+    has_subset = args.subset_unicodes or args.subset_text or args.subset_text_file
+    exports = []
+
+    for master in args.masters:
+        name = os.path.splitext(os.path.basename(master))[0]
+        font = pipeline.add(f"{name}:compile", 'compile', [master], {}, [f"{name}.ttf"])
+        if args.optimize:
+            font = pipeline.add(f"{name}:optimize", 'optimize', [font],
+                                {'simplify': args.simplify}, [f"{name}.ttf"])
+        exports.append(font)
+
+        for fmt in formats:
+            if fmt == 'ttf' and not args.autohint:
+                continue
+            params = {'format': fmt}
+            if fmt == 'ttf':
+                params.update(autohint=True, hint_cache=os.path.abspath(args.hint_cache))
+            output = f"{name}_hinted.ttf" if fmt == 'ttf' else f"{name}.{fmt}"
+            exports.append(pipeline.add(f"{name}:convert-{fmt}", 'convert', [font], params, [output]))
+
+        if has_subset:
+            params = {
+                'flavor': args.subset_flavor,
+                'unicodes': args.subset_unicodes,
+                'text': args.subset_text,
+                'layout_features': args.layout_features,
+            }
+            extension = args.subset_flavor or 'ttf'
+            inputs = [font] + list(args.subset_text_file or [])
+            exports.append(pipeline.add(f"{name}:subset", 'subset', inputs, params,
+                                        [f"{name}_subset.{extension}"]))
+    return exports
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='发布流程编排工具')
+    parser.add_argument('masters', nargs='*', help='母版 .ufoz 文件，默认为 sources/ 中的全部 .ufoz')
+    parser.add_argument('--optimize', action='store_true', help='编译后执行 optimize_glyph.py（需要 FontForge）')
+    parser.add_argument('--simplify', type=float, default=0.5, help='optimize_glyph.py 的 simplify 参数（默认：0.5）')
+    parser.add_argument('--formats', help='要转换的格式，逗号分隔，如 woff2,woff（需要 FontForge）')
+    parser.add_argument('--autohint', action='store_true', help='为 ttf 格式执行自动 hinting')
+    parser.add_argument('--hint-cache', default=os.path.join(REPO_DIR, '.hint_cache'), help='hinting 缓存目录')
+    parser.add_argument('--subset-unicodes', help='子集的 Unicode 范围')
+    parser.add_argument('--subset-text', help='子集包含的文本')
+    parser.add_argument('--subset-text-file', nargs='+', help='子集包含的文本文件')
+    parser.add_argument('--subset-flavor', '-f', help='子集的输出格式 (woff, woff2)')
+    parser.add_argument('--layout-features', help='子集保留的 OpenType 特性')
+    parser.add_argument('--jobs', '-j', type=int, help='并行执行的任务数，默认为CPU核心数', default=None)
+    parser.add_argument('--store', default=DEFAULT_STORE, help='产物库目录（默认：.pipeline_store）')
+    parser.add_argument('--output-dir', '-o', default=DEFAULT_OUTPUT_DIR, help='最终输出目录（默认：build）')
+    parser.add_argument('--dry-run', action='store_true', help='只显示需要执行的阶段，不实际执行')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if not args.masters:
+        args.masters = sorted(
+            os.path.join(SOURCES_DIR, name) for name in os.listdir(SOURCES_DIR) if name.endswith('.ufoz')
+        )
+    if not args.masters:
+        print("错误: 未找到 .ufoz 母版文件")
+        return 1
+    missing = [master for master in args.masters if not os.path.exists(master)]
+    if missing:
+        print(f"错误: 母版文件不存在: {', '.join(missing)}")
+        return 1
+    if shutil.which('fontmake') is None:
+        print("错误: 未找到 fontmake，请先运行 pip3 install fontmake")
+        return 1
+    if (args.optimize or args.formats) and shutil.which(FONTFORGE) is None:
+        print("错误: optimize 与 convert 阶段需要 FontForge，请安装后重试")
+        return 1
+    for path in args.subset_text_file or []:
+        if not os.path.isfile(path):
+            print(f"错误: 文本文件 '{path}' 不存在")
+            return 1
+
+    pipeline = Pipeline(ArtifactStore(args.store), args.jobs, args.dry_run)
+    exports = build_graph(pipeline, args)
+    print(f"共 {len(args.masters)} 个母版，{len(pipeline.tasks)} 个阶段，使用 {pipeline.jobs} 个并行任务")
+
+    start = time.time()
+    success = pipeline.run()
+    if args.dry_run:
+        return 0
+
+    executed = sum(1 for task in pipeline.tasks if task.cached is False and task.digests)
+    print(f"流程完成，用时 {time.time() - start:.1f} 秒，执行 {executed} 个阶段，"
+          f"复用 {sum(1 for task in pipeline.tasks if task.cached)} 个")
+    for task in exports:
+        if task.digests:
+            for path in pipeline.export(task, args.output_dir):
+                print(f"  输出: {path}")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+remove_overlaps.py - 并行去除轮廓重叠工具
+Parallel, cached overlap removal for compiled TrueType fonts
+
+fontmake 以 --keep-overlaps 编译，生成的 TTF 中笔画轮廓互相重叠，
+glyf 表更大，渲染器光栅化也更慢。本工具使用 skia-pathops（fontTools 的
+removeOverlaps）合并重叠的轮廓：字形按分片在多个进程中处理，每个字形的结果
+按轮廓哈希缓存，源文件修改后重新构建时只需处理改动过的字形。
+
+只有组件互相重叠的复合字形才会被分解；去除重叠后轮廓不变的字形保持原样。
+处理后的字形不含 hinting 指令，如需 hinting 请在之后运行 ttf_autohint.py。
+
+Usage 使用方法:
+    python remove_overlaps.py "PlangothicP1-Regular.ttf" -o "PlangothicP1-Regular_merged.ttf"
+    python remove_overlaps.py "PlangothicP1-Regular.ttf" -j 8 --cache-dir .overlap_cache
+
+Arguments 参数:
+    input_font          Input TTF file path 输入 TTF 字体文件路径
+    -o, --output        Output file path (optional) 输出文件路径（可选）
+    -j, --jobs          Number of worker processes 并行进程数
+    --shard-size        Glyphs per shard 每个分片的字形数
+    --cache-dir         Overlap removal cache directory 缓存目录
+    --no-cache          Disable the cache 禁用缓存
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import logging
+from multiprocessing import Pool, cpu_count
+from typing import Dict, List, Optional, Tuple
+
+from font_loader import MappedFont, load_font
+from glyph_cache import GlyphCache, glyph_outline_hash
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(levelname)s: %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+try:
+    import fontTools
+    from fontTools.ttLib.tables._g_l_y_f import Glyph
+    from fontTools.ttLib.removeOverlaps import removeTTGlyphOverlaps, RemoveOverlapsError
+    import pathops
+except ModuleNotFoundError:
+    logger.warning("未安装 `fontTools` 或 `skia-pathops`，功能无法使用")
+    pathops = None
+
+# 常量定义
+DEFAULT_SHARD_SIZE = 2000
+DEFAULT_CACHE_DIR = ".overlap_cache"
+# 缓存条目格式版本，格式改变时递增
+CACHE_VERSION = 2
+# 缓存条目的首字节：字形未改变 / 字形已修改（其后为编译后的字形数据，可能为空）
+UNCHANGED = b"U"
+MODIFIED = b"M"
+
+
+def _remove_shard(task: Tuple[str, List[str]]) -> Tuple[Dict[str, Optional[bytes]], List[str]]:
+    """
+    在子进程中去除单个分片中字形的重叠
+
+    Returns:
+        (字形名 -> 处理后的字形数据，轮廓未改变时为 None, 处理失败的字形)
+        重叠的轮廓完全抵消时字形变为空字形，数据为空字节串
+    """
+    input_path, shard_glyphs = task
+
+    font = load_font(input_path)
+    glyf = font['glyf']
+    hmtx = font['hmtx']
+    glyph_set = font.getGlyphSet()
+
+    # 先处理简单字形，复合字形按组件深度从浅到深处理
+    def depth(name):
+        glyph = glyf[name]
+        return glyph.getCompositeMaxpValues(glyf).maxComponentDepth if glyph.isComposite() else 0
+
+    results = {}
+    failed = []
+    for name in sorted(shard_glyphs, key=depth):
+        try:
+            modified = removeTTGlyphOverlaps(name, glyph_set, glyf, hmtx, removeHinting=False)
+        except RemoveOverlapsError:
+            failed.append(name)
+            modified = False
+        # 去除重叠后的字形总是简单字形，编译结果与字形顺序无关，可以跨字体缓存
+        results[name] = glyf[name].compile(glyf) if modified else None
+
+    font.close()
+    return results, failed
+
+
+class OverlapRemover:
+    """并行去除轮廓重叠，封装分片、缓存与合并逻辑"""
+
+    def __init__(self, processes: Optional[int] = None,
+                 shard_size: int = DEFAULT_SHARD_SIZE,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR):
+        """
+        初始化去重叠处理器
+
+        Args:
+            processes: 并行进程数（默认：CPU 核心数）
+            shard_size: 每个分片的字形数
+            cache_dir: 缓存目录，为 None 时禁用缓存
+        """
+        self.processes = processes or cpu_count()
+        self.shard_size = max(1, shard_size)
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def _namespace() -> str:
+        """根据 fontTools 与 skia-pathops 版本计算缓存命名空间"""
+        signature = json.dumps([CACHE_VERSION, fontTools.version, pathops.__version__])
+        return "overlaps-" + hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
+
+    def remove_overlaps(self, input_path: str, output_path: str) -> bool:
+        """
+        去除整个字体的轮廓重叠
+
+        Returns:
+            bool: 是否成功
+        """
+        if pathops is None:
+            logger.error("fontTools 或 skia-pathops 模块未加载，无法去除重叠")
+            return False
+
+        if not os.path.exists(input_path):
+            logger.error(f"未找到字体文件：{input_path}")
+            return False
+
+        start_time = time.time()
+        # 输出文件可能覆盖输入文件，先记录原始大小
+        input_sizes = (os.path.getsize(input_path), glyf_size(input_path))
+        logger.info(f"正在加载字体：{input_path}")
+        # 输出文件可能就是输入文件，不能使用完全惰性的加载方式
+        font = load_font(input_path, lazy=None)
+
+        if 'glyf' not in font:
+            logger.error("只支持 TrueType 轮廓（glyf）字体")
+            return False
+
+        cache = GlyphCache(self.cache_dir, self._namespace()) if self.cache_dir else None
+
+        glyf = font['glyf']
+        glyph_order = font.getGlyphOrder()
+
+        # 计算每个字形的轮廓哈希（去重叠的结果与度量无关）
+        memo = {}
+        keys = {name: glyph_outline_hash(glyf, name, None, memo) for name in glyph_order}
+
+        results: Dict[str, Optional[bytes]] = {}
+        if cache:
+            for name in glyph_order:
+                entry = cache.get(keys[name])
+                if entry is not None:
+                    results[name] = entry[1:] if entry[:1] == MODIFIED else None
+
+        missing = [name for name in glyph_order if name not in results]
+        logger.info(f"共 {len(glyph_order)} 个字形，缓存命中 {len(glyph_order) - len(missing)} 个，"
+                    f"需要处理 {len(missing)} 个")
+
+        if missing:
+            fresh_results, failed = self._remove_glyphs(input_path, missing)
+            results.update(fresh_results)
+            if failed:
+                logger.warning(f"{len(failed)} 个字形去除重叠失败，保持原样：{' '.join(failed[:10])}")
+            if cache:
+                failed = set(failed)
+                for name, data in fresh_results.items():
+                    if name not in failed:
+                        cache.put(keys[name], UNCHANGED if data is None else MODIFIED + data)
+
+        modified = self._apply_results(font, results)
+
+        logger.info("正在保存字体...")
+        font.save(output_path)
+        font.close()
+
+        self._show_stats(input_sizes, output_path, start_time, modified)
+        return True
+
+    def _remove_glyphs(self, input_path: str, glyph_names: List[str]) -> Tuple[Dict[str, Optional[bytes]], List[str]]:
+        """将字形分片并行去除重叠"""
+        shards = [
+            glyph_names[i:i + self.shard_size]
+            for i in range(0, len(glyph_names), self.shard_size)
+        ]
+        num_processes = min(len(shards), self.processes)
+        logger.info(f"分为 {len(shards)} 个分片，使用 {num_processes} 个进程")
+
+        tasks = [(input_path, shard) for shard in shards]
+        results: Dict[str, Optional[bytes]] = {}
+        failed: List[str] = []
+
+        with Pool(processes=num_processes) as pool:
+            for index, (shard_results, shard_failed) in enumerate(pool.imap(_remove_shard, tasks)):
+                results.update(shard_results)
+                failed.extend(shard_failed)
+                logger.info(f"分片进度：{index + 1}/{len(shards)}")
+
+        return results, failed
+
+    @staticmethod
+    def _apply_results(font, results: Dict[str, Optional[bytes]]) -> int:
+        """将去除重叠后的字形写回字体，并使左边距与 xMin 一致，返回修改的字形数"""
+        glyf = font['glyf']
+        hmtx = font['hmtx']
+        modified = 0
+        for name, data in results.items():
+            if data is None:
+                continue
+            glyph = Glyph(data)
+            glyph.expand(glyf)
+            glyf[name] = glyph
+            # 空字形没有边界框，左边距为 0
+            x_min = getattr(glyph, 'xMin', 0)
+            width, lsb = hmtx[name]
+            if lsb != x_min:
+                hmtx[name] = (width, x_min)
+            modified += 1
+        return modified
+
+    @staticmethod
+    def _show_stats(input_sizes: Tuple[int, int], output_path: str, start_time: float, modified: int) -> None:
+        """显示文件大小、glyf 表大小与耗时的变化"""
+        input_size, input_glyf = (size / 1024 for size in input_sizes)  # KB
+        output_size = os.path.getsize(output_path) / 1024  # KB
+        output_glyf = glyf_size(output_path) / 1024  # KB
+
+        logger.info("\n去除重叠完成：")
+        logger.info(f"处理时间：{time.time() - start_time:.2f} 秒")
+        logger.info(f"修改字形：{modified} 个")
+        logger.info(f"源文件：{input_size:.2f} KB（glyf 表 {input_glyf:.2f} KB）")
+        logger.info(f"去除重叠后：{output_size:.2f} KB（glyf 表 {output_glyf:.2f} KB）")
+        logger.info(f"大小变化：{((output_size/input_size)-1)*100:+.1f}%，"
+                    f"glyf 表 {((output_glyf/input_glyf)-1)*100:+.1f}%")
+        logger.info(f"✓ 字体已保存为 {output_path}")
+
+
+def glyf_size(path: str) -> int:
+    """返回字体 glyf 表的字节数"""
+    with MappedFont(path) as mapped:
+        return mapped.tables['glyf'][1]
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='并行去除轮廓重叠工具')
+    parser.add_argument('input_font', help='输入 TTF 字体文件路径')
+    parser.add_argument('-o', '--output', help='输出文件路径（默认：覆盖输入文件）')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='并行进程数（默认：CPU 核心数）')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f'每个分片的字形数（默认：{DEFAULT_SHARD_SIZE}）')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'缓存目录（默认：{DEFAULT_CACHE_DIR}）')
+    parser.add_argument('--no-cache', action='store_true', help='禁用缓存')
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    """主函数"""
+    args = parse_arguments()
+
+    remover = OverlapRemover(
+        processes=args.jobs,
+        shard_size=args.shard_size,
+        cache_dir=None if args.no_cache else args.cache_dir,
+    )
+
+    success = remover.remove_overlaps(args.input_font, args.output or args.input_font)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
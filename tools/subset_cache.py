@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+subset_cache.py - 子集化结果缓存
+Content-addressed on-disk cache for subset outputs
+
+以源字体内容哈希、规范化码位集合、OpenType 特性、输出格式与 notdef 选项
+计算缓存键，相同的子集化请求直接复制已有结果（不使用硬链接，之后原地改写
+输出文件的工具不会破坏缓存）。
+缓存总大小超过上限时按最近使用时间淘汰旧文件。
+
+Usage 使用方法:
+    from subset_cache import SubsetCache, subset_cache_key
+
+    cache = SubsetCache(".subset_cache", max_bytes=2 * 1024 ** 3)
+    key = subset_cache_key(font_digest, unicodes, flavor="woff2")
+    if not cache.fetch(key, "out.woff2"):
+        ...  # 生成子集
+        cache.store_file(key, "out.woff2")
+"""
+
+import os
+import json
+import shutil
+import struct
+import hashlib
+import threading
+
+# 缓存键格式版本，键的组成方式改变时递增
+CACHE_KEY_VERSION = 2
+
+
+def subset_cache_key(font_digest, unicodes, flavor=None, layout_features=None,
+                     notdef_outline=True, notdef_glyph=True, retain_gids=False):
+    """
+    计算子集化请求的缓存键
+
+    Args:
+        font_digest: 源字体内容的 SHA-256 摘要
+        unicodes: 码位集合（会被去重并排序）
+        flavor: 输出格式
+        layout_features: 要保留的 OpenType 特性（字符串或列表）
+        notdef_outline, notdef_glyph: notdef 相关选项
+        retain_gids: 是否保留字形编号
+
+    Returns:
+        str: 十六进制 SHA-256 缓存键
+    """
+    if isinstance(layout_features, str):
+        layout_features = [f.strip() for f in layout_features.split(',') if f.strip()]
+    codepoints = sorted(set(unicodes))
+
+    key_fields = [
+        CACHE_KEY_VERSION,
+        font_digest,
+        flavor or '',
+        sorted(layout_features) if layout_features else None,
+        bool(notdef_outline),
+        bool(notdef_glyph),
+    ]
+    if retain_gids:
+        key_fields.append('retain-gids')
+
+    h = hashlib.sha256()
+    h.update(json.dumps(key_fields).encode('utf-8'))
+    h.update(struct.pack(f'<{len(codepoints)}I', *codepoints))
+    return h.hexdigest()
+
+
+class SubsetCache:
+    """内容寻址的磁盘缓存，按字节数限制容量，以文件修改时间记录最近使用时间"""
+
+    def __init__(self, cache_dir, max_bytes=2 * 1024 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存容量上限（字节）
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self.size = sum(size for _, size, _ in self._entries())
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _entries(self):
+        """遍历缓存文件，返回 (路径, 大小, 修改时间) 元组"""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.tmp'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def _touch(self, path):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def get(self, key):
+        """读取缓存内容，不存在时返回 None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        self._touch(path)
+        return data
+
+    def fetch(self, key, output_path):
+        """
+        将缓存结果复制到输出路径
+
+        不使用硬链接：输出文件之后可能被原地改写（如 ttf_autohint.py 默认覆盖输入文件），
+        与缓存共用数据会使之后的每次命中都得到被改写的内容。
+
+        Returns:
+            bool: 是否命中缓存
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return False
+
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        tmp_path = f"{output_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, output_path)
+        except FileNotFoundError:
+            # 缓存文件恰好被其他进程淘汰
+            return False
+        self._touch(path)
+        return True
+
+    def put(self, key, data):
+        """写入缓存内容"""
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+        self._store(key, write)
+
+    def store_file(self, key, source_path):
+        """将已生成的文件存入缓存"""
+        self._store(key, lambda tmp_path: shutil.copyfile(source_path, tmp_path))
+
+    def _store(self, key, write):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        write(tmp_path)
+        size = os.path.getsize(tmp_path)
+        if size > self.max_bytes:
+            os.remove(tmp_path)
+            return
+
+        with self._lock:
+            if os.path.exists(path):
+                self.size -= os.path.getsize(path)
+            os.replace(tmp_path, path)
+            self.size += size
+            if self.size > self.max_bytes:
+                self.trim()
+
+    def trim(self):
+        """按最近使用时间从旧到新删除文件，直到总大小回到上限以内"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        # 重新统计实际大小（其他进程可能同时写入了缓存）
+        self.size = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if self.size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.size -= size
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,512 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+subset_server.py - 本地按需子集化 HTTP 服务
+On-demand font subsetting server with LRU cache
+
+常驻内存加载遍黑体字体，按请求的文本或码位实时生成子集字体。
+结果按规范化后的码位集合哈希缓存在内存与磁盘两级 LRU 缓存中，
+子集化任务在工作进程池中并发执行。
+
+Usage 使用方法:
+    python subset_server.py PlangothicP1-Regular.ttf PlangothicP2-Regular.ttf --port 8765 -j 4
+
+Endpoints 接口:
+    GET  /subset?font=PlangothicP2-Regular&text=𠀀𠀁&flavor=woff2
+    GET  /subset?font=PlangothicP2-Regular&unicodes=20000-200FF
+    POST /subset   JSON: {"font": "...", "text": "...", "unicodes": "...", "flavor": "woff2"}
+    GET  /fonts    已加载的字体列表
+    GET  /metrics  延迟与缓存命中统计
+
+Arguments 参数:
+    fonts               Font files to serve 要加载的字体文件
+    --host, --port      Listen address 监听地址
+    -j, --jobs          Worker processes 工作进程数
+    --memory-cache      In-memory cache size in MB 内存缓存大小（MB）
+    --cache-dir         On-disk cache directory 磁盘缓存目录
+    --disk-cache        On-disk cache size in MB 磁盘缓存大小（MB）
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import cpu_count
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from font_subset import FontSubsetter, parse_unicodes, text_to_unicodes
+from subset_cache import SubsetCache, subset_cache_key
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+# 常量定义
+CONTENT_TYPES = {
+    'woff2': 'font/woff2',
+    'woff': 'font/woff',
+    'ttf': 'font/ttf',
+    'otf': 'font/otf',
+}
+DEFAULT_FLAVOR = 'woff2'
+# 不压缩的输出格式与对应的轮廓表；子集化不转换轮廓格式
+SFNT_FORMATS = {
+    'ttf': 'glyf',
+    'otf': 'CFF ',
+}
+MAX_CODEPOINTS = 50000
+MAX_BODY_SIZE = 4 * 1024 * 1024
+
+# 工作进程持有的子集化器（字体名称 -> FontSubsetter）
+_worker_subsetters: Dict[str, FontSubsetter] = {}
+
+
+def _init_worker(font_files: Dict[str, str]) -> None:
+    """工作进程初始化：每个进程只加载一次所有字体"""
+    for name, path in font_files.items():
+        _worker_subsetters[name] = FontSubsetter(path)
+
+
+def _subset_in_worker(font_name: str, codepoints: List[int], flavor: str) -> bytes:
+    """在工作进程中执行子集化（ttf、otf 输出不压缩的 sfnt）"""
+    return _worker_subsetters[font_name].subset_bytes(codepoints, None if flavor in SFNT_FORMATS else flavor)
+
+
+def normalize_codepoints(codepoints: Iterable[int]) -> Tuple[int, ...]:
+    """规范化码位集合（去重并排序）"""
+    return tuple(sorted(set(codepoints)))
+
+
+class MemoryLRUCache:
+    """按字节数限制容量的内存 LRU 缓存"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._items: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._items:
+                self.size -= len(self._items.pop(key))
+            self._items[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self.size -= len(evicted)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class SubsetMetrics:
+    """请求延迟与缓存命中统计"""
+
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counts = {'memory': 0, 'disk': 0, 'miss': 0, 'not_modified': 0, 'error': 0}
+        self.latencies = {source: deque(maxlen=window) for source in ('memory', 'disk', 'miss')}
+
+    def record(self, source: str, latency: float) -> None:
+        with self._lock:
+            self.counts[source] += 1
+            if source in self.latencies:
+                self.latencies[source].append(latency)
+
+    @staticmethod
+    def _summary(values: List[float]) -> Dict[str, float]:
+        if not values:
+            return {}
+        values = sorted(values)
+
+        def percentile(p: float) -> float:
+            return values[min(len(values) - 1, int(p * len(values)))] * 1000
+
+        return {
+            'count': len(values),
+            'mean_ms': sum(values) / len(values) * 1000,
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+        }
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            hits = self.counts['memory'] + self.counts['disk']
+            total = hits + self.counts['miss']
+            all_latencies = [v for values in self.latencies.values() for v in values]
+            return {
+                'uptime_seconds': time.time() - self.started,
+                'requests': dict(self.counts),
+                'hit_rate': hits / total if total else 0.0,
+                'latency': {
+                    'all': self._summary(all_latencies),
+                    **{source: self._summary(list(values)) for source, values in self.latencies.items()}
+                },
+            }
+
+
+class SubsetService:
+    """子集化服务，管理字体、缓存与工作进程池"""
+
+    def __init__(self, font_paths: List[str], processes: Optional[int] = None,
+                 memory_cache_bytes: int = 256 * 1024 * 1024,
+                 cache_dir: Optional[str] = None,
+                 disk_cache_bytes: int = 2 * 1024 * 1024 * 1024):
+        """
+        初始化子集化服务
+
+        Args:
+            font_paths: 要加载的字体文件
+            processes: 工作进程数（默认：CPU 核心数）
+            memory_cache_bytes: 内存缓存容量（字节）
+            cache_dir: 磁盘缓存目录，为 None 时禁用磁盘缓存
+            disk_cache_bytes: 磁盘缓存容量（字节）
+        """
+        self.font_files: Dict[str, str] = {}
+        self.font_digests: Dict[str, str] = {}
+        self.font_cmaps: Dict[str, set] = {}
+        self.font_formats: Dict[str, str] = {}
+
+        for path in font_paths:
+            name = Path(path).stem
+            subsetter = FontSubsetter(path)
+            self.font_files[name] = os.path.abspath(path)
+            self.font_digests[name] = subsetter.digest
+            self.font_cmaps[name] = set(subsetter.cmap)
+            font = subsetter.open_font()
+            self.font_formats[name] = 'otf' if 'CFF ' in font or 'CFF2' in font else 'ttf'
+            font.close()
+            logger.info(f"已加载字体 {name}：{len(subsetter.cmap)} 个码位")
+
+        self.memory_cache = MemoryLRUCache(memory_cache_bytes)
+        self.disk_cache = SubsetCache(cache_dir, disk_cache_bytes) if cache_dir else None
+        self.metrics = SubsetMetrics()
+
+        self.processes = processes or cpu_count()
+        self.executor = self._create_executor()
+
+        # 正在生成中的子集，相同请求并发到达时共享同一个任务
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            initializer=_init_worker,
+            initargs=(self.font_files,)
+        )
+
+    def _restart_executor(self, broken: ProcessPoolExecutor) -> None:
+        """工作进程意外退出（如因内存不足被终止）后进程池不可再用，重新创建"""
+        with self._pending_lock:
+            if self.executor is not broken:
+                # 其他请求已经重新创建了进程池
+                return
+            logger.warning("工作进程意外退出，正在重新创建进程池")
+            self.executor = self._create_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def cache_key(self, font_name: str, codepoints: Iterable[int], flavor: str) -> Tuple[str, Tuple[int, ...]]:
+        """
+        计算请求的缓存键（也用作 ETag），不执行子集化
+
+        Returns:
+            (缓存键, 规范化的码位)
+        """
+        # 字体中不存在的码位不影响结果，过滤后可提高缓存命中率
+        normalized = normalize_codepoints(cp for cp in codepoints if cp in self.font_cmaps[font_name])
+        return subset_cache_key(self.font_digests[font_name], normalized, flavor), normalized
+
+    def subset(self, font_name: str, codepoints: Iterable[int],
+               flavor: str) -> Tuple[bytes, str, str]:
+        """
+        获取子集字体
+
+        Args:
+            font_name: 字体名称
+            codepoints: 要保留的码位
+            flavor: 输出格式（woff2、woff、ttf 或 otf）
+
+        Returns:
+            (字体数据, 缓存键, 数据来源：memory、disk 或 miss)
+
+        Raises:
+            KeyError: 未加载该字体
+            ValueError: 无法输出请求的格式（ttf 与 otf 之间不能转换轮廓）
+        """
+        start_time = time.perf_counter()
+        if font_name not in self.font_files:
+            raise KeyError(font_name)
+        error = self.check_flavor(font_name, flavor)
+        if error:
+            raise ValueError(error)
+
+        key, normalized = self.cache_key(font_name, codepoints, flavor)
+
+        data = self.memory_cache.get(key)
+        source = 'memory'
+        if data is None and self.disk_cache:
+            data = self.disk_cache.get(key)
+            source = 'disk'
+            if data is not None:
+                self.memory_cache.put(key, data)
+
+        if data is None:
+            source = 'miss'
+            with self._pending_lock:
+                pending = self._pending.get(key)
+                if pending is None:
+                    executor = self.executor
+                    try:
+                        future = executor.submit(_subset_in_worker, font_name, list(normalized), flavor)
+                    except BrokenProcessPool as e:
+                        future = Future()
+                        future.set_exception(e)
+                    pending = self._pending[key] = (future, executor)
+            future, executor = pending
+            try:
+                data = future.result()
+            except BrokenProcessPool:
+                self._restart_executor(executor)
+                raise
+            finally:
+                with self._pending_lock:
+                    self._pending.pop(key, None)
+            self.memory_cache.put(key, data)
+            if self.disk_cache:
+                self.disk_cache.put(key, data)
+
+        self.metrics.record(source, time.perf_counter() - start_time)
+        return data, key, source
+
+    def check_flavor(self, font_name: str, flavor: str) -> Optional[str]:
+        """检查能否以请求的格式输出，不能时返回错误信息"""
+        source_format = self.font_formats[font_name]
+        if flavor in SFNT_FORMATS and flavor != source_format:
+            return f"字体 {font_name} 的轮廓为 {SFNT_FORMATS[source_format].strip()} 格式，只能输出 {source_format}"
+        return None
+
+    def metrics_snapshot(self) -> Dict:
+        snapshot = self.metrics.snapshot()
+        snapshot['memory_cache'] = {
+            'entries': len(self.memory_cache),
+            'bytes': self.memory_cache.size,
+            'max_bytes': self.memory_cache.max_bytes,
+        }
+        if self.disk_cache:
+            snapshot['disk_cache'] = {
+                'bytes': self.disk_cache.size,
+                'max_bytes': self.disk_cache.max_bytes,
+            }
+        snapshot['workers'] = self.processes
+        return snapshot
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class SubsetRequestHandler(BaseHTTPRequestHandler):
+    """HTTP 请求处理器"""
+
+    service: SubsetService = None
+    server_version = "PlangothicSubset/1.0"
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == '/subset':
+            params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            self._handle_subset(params)
+        elif url.path == '/fonts':
+            self._send_json(200, {
+                name: {'codepoints': len(cmap)} for name, cmap in self.service.font_cmaps.items()
+            })
+        elif url.path == '/metrics':
+            self._send_json(200, self.service.metrics_snapshot())
+        else:
+            self._send_json(404, {'error': '未知路径'})
+
+    def do_POST(self) -> None:
+        url = urlparse(self.path)
+        if url.path != '/subset':
+            self._send_json(404, {'error': '未知路径'})
+            return
+
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self._send_json(400, {'error': '无效的 Content-Length'})
+            return
+        if length > MAX_BODY_SIZE:
+            self._send_json(413, {'error': '请求体过大'})
+            return
+        try:
+            params = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': '请求体不是有效的 JSON'})
+            return
+        if not isinstance(params, dict):
+            self._send_json(400, {'error': '请求体必须是 JSON 对象'})
+            return
+        self._handle_subset(params)
+
+    def _handle_subset(self, params: Dict) -> None:
+        font_name = params.get('font')
+        if not font_name and len(self.service.font_files) == 1:
+            font_name = next(iter(self.service.font_files))
+        if not isinstance(font_name, str):
+            self._send_json(400, {'error': '请指定 font 参数'})
+            return
+        flavor = params.get('flavor') or DEFAULT_FLAVOR
+        if not isinstance(flavor, str) or flavor not in CONTENT_TYPES:
+            self._send_json(400, {'error': f'不支持的输出格式：{flavor}'})
+            return
+
+        # POST 的 JSON 可能包含任意类型的值，类型错误与格式错误一样返回 400
+        try:
+            codepoints = set()
+            if params.get('text'):
+                if not isinstance(params['text'], str):
+                    raise ValueError('text 必须是字符串')
+                codepoints |= text_to_unicodes(params['text'])
+            if params.get('unicodes'):
+                codepoints |= parse_unicodes(params['unicodes'])
+        except (ValueError, TypeError, AttributeError) as e:
+            self._send_json(400, {'error': f'无效的码位参数：{e}'})
+            return
+
+        if not codepoints:
+            self._send_json(400, {'error': '请指定 text 或 unicodes 参数'})
+            return
+        if len(codepoints) > MAX_CODEPOINTS:
+            self._send_json(413, {'error': f'码位数量超过上限 {MAX_CODEPOINTS}'})
+            return
+
+        if font_name not in self.service.font_files:
+            self._send_json(404, {'error': f'未加载字体：{font_name}'})
+            return
+        error = self.service.check_flavor(font_name, flavor)
+        if error:
+            self._send_json(400, {'error': error})
+            return
+
+        # 缓存键只取决于请求本身，客户端已有相同结果时不执行子集化
+        key, _ = self.service.cache_key(font_name, codepoints, flavor)
+        etag = f'"{key[:32]}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.service.metrics.record('not_modified', 0)
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        try:
+            data, key, source = self.service.subset(font_name, codepoints, flavor)
+        except Exception as e:
+            self.service.metrics.record('error', 0)
+            logger.error(f"子集化失败：{e}")
+            self._send_json(500, {'error': f'子集化失败：{e}'})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPES[flavor])
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'public, max-age=31536000, immutable')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('ETag', etag)
+        self.send_header('X-Cache', source)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status: int, payload: Dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False, indent=2).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.info(f"{self.address_string()} - {format % args}")
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='本地按需子集化 HTTP 服务')
+    parser.add_argument('fonts', nargs='+', help='要加载的字体文件')
+    parser.add_argument('--host', default='127.0.0.1', help='监听地址（默认：127.0.0.1）')
+    parser.add_argument('--port', type=int, default=8765, help='监听端口（默认：8765）')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='工作进程数（默认：CPU 核心数）')
+    parser.add_argument('--memory-cache', type=int, default=256, help='内存缓存大小，单位 MB（默认：256）')
+    parser.add_argument('--cache-dir', default='.subset_cache', help='磁盘缓存目录（默认：.subset_cache）')
+    parser.add_argument('--disk-cache', type=int, default=2048, help='磁盘缓存大小，单位 MB（默认：2048）')
+    parser.add_argument('--no-disk-cache', action='store_true', help='禁用磁盘缓存')
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    """主函数"""
+    args = parse_arguments()
+
+    for path in args.fonts:
+        if not os.path.exists(path):
+            logger.error(f"未找到字体文件：{path}")
+            return 1
+
+    try:
+        service = SubsetService(
+            args.fonts,
+            processes=args.jobs,
+            memory_cache_bytes=args.memory_cache * 1024 * 1024,
+            cache_dir=None if args.no_disk_cache else args.cache_dir,
+            disk_cache_bytes=args.disk_cache * 1024 * 1024
+        )
+    except Exception as e:
+        logger.error(f"加载字体失败：{e}")
+        return 1
+
+    SubsetRequestHandler.service = service
+    server = ThreadingHTTPServer((args.host, args.port), SubsetRequestHandler)
+    logger.info(f"子集化服务已启动：http://{args.host}:{args.port}/")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("正在停止服务...")
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+synthetic_font.py - 合成测试字体生成工具
+Synthetic CJK-like font generator
+
+生成指定字形数量的合成字体，每个字形由若干笔画（横、竖、撇、捺、点、竖钩）
+组成，笔画之间互相重叠，轮廓复杂度接近遍黑体的汉字源文件。输出 UFO 3 ZIP
+(.ufoz，与 sources/ 中的源文件格式相同) 或 TTF，供基准测试离线使用。
+相同的参数与随机种子总是生成相同的字体。
+
+Usage 使用方法:
+    python synthetic_font.py -n 5000 -o Synthetic.ufoz
+    python synthetic_font.py -n 20000 --strokes 16 -o Synthetic.ttf
+
+Library 库接口:
+    from synthetic_font import build_ttf, build_ufoz
+
+    build_ttf("Synthetic.ttf", glyph_count=5000, strokes=12)
+"""
+
+import os
+import random
+import argparse
+from types import SimpleNamespace
+
+try:
+    from fontTools.fontBuilder import FontBuilder
+    from fontTools.pens.cu2quPen import Cu2QuPen
+    from fontTools.pens.pointPen import SegmentToPointPen
+    from fontTools.pens.ttGlyphPen import TTGlyphPen
+    from fontTools.ufoLib import UFOFileStructure, UFOWriter
+except ModuleNotFoundError:
+    FontBuilder = None
+
+UNITS_PER_EM = 1000
+ASCENDER = 880
+DESCENDER = -120
+ADVANCE_WIDTH = 1000
+FAMILY_NAME = 'Plangothic Synthetic'
+
+# 依次使用的码位区间
+CODEPOINT_RANGES = [
+    (0x4E00, 0x9FFF),
+    (0x3400, 0x4DBF),
+    (0x20000, 0x2A6DF),
+    (0x2A700, 0x2EBEF),
+    (0x30000, 0x323AF),
+]
+
+DEFAULT_STROKES = 12
+
+# 字身框内可以放置笔画的范围
+BOX = (60, -60, 940, 820)
+
+
+def glyph_codepoints(glyph_count):
+    """返回前 glyph_count 个字形使用的码位"""
+    codepoints = []
+    for start, end in CODEPOINT_RANGES:
+        for codepoint in range(start, end + 1):
+            if len(codepoints) == glyph_count:
+                return codepoints
+            codepoints.append(codepoint)
+    if len(codepoints) < glyph_count:
+        raise ValueError(f"最多支持 {len(codepoints)} 个字形")
+    return codepoints
+
+
+def _horizontal(rng, x0, y0, x1, y1):
+    width = rng.randint(40, 70)
+    left, right = sorted(rng.sample(range(x0, x1), 2))
+    y = rng.randint(y0, y1 - width)
+    rise = rng.randint(0, 20)
+    return [
+        ('moveTo', (left, y)),
+        ('lineTo', (right, y + rise)),
+        ('curveTo', ((right + 30, y + rise + width // 3), (right + 10, y + rise + width), (right - 20, y + rise + width))),
+        ('lineTo', (left, y + width)),
+    ]
+
+
+def _vertical(rng, x0, y0, x1, y1):
+    width = rng.randint(50, 80)
+    bottom, top = sorted(rng.sample(range(y0, y1), 2))
+    x = rng.randint(x0, x1 - width)
+    points = [('moveTo', (x, bottom)), ('lineTo', (x + width, bottom))]
+    if rng.random() < 0.3:
+        # 竖钩
+        points[1:1] = [
+            ('lineTo', (x + width, bottom + 60)),
+            ('curveTo', ((x + width - 30, bottom + 30), (x - 40, bottom + 20), (x - 70, bottom + 40))),
+            ('lineTo', (x - 60, bottom - 10)),
+        ]
+    points += [('lineTo', (x + width, top)), ('lineTo', (x, top))]
+    return points
+
+
+def _falling(rng, x0, y0, x1, y1, direction):
+    width = rng.randint(45, 75)
+    top_x = rng.randint(x0 + 100, x1 - 100)
+    top_y = rng.randint((y0 + y1) // 2, y1)
+    length = rng.randint(200, 500)
+    end_x = top_x - direction * length * 3 // 4
+    end_y = max(y0, top_y - length)
+    return [
+        ('moveTo', (top_x, top_y)),
+        ('curveTo', ((top_x, top_y - length // 3), (end_x + direction * length // 4, end_y + 40), (end_x, end_y))),
+        ('lineTo', (end_x + direction * width // 2, end_y - width // 3)),
+        ('curveTo', ((end_x + direction * length // 3, end_y + 20), (top_x + direction * width, top_y - length // 3),
+                     (top_x + direction * width, top_y))),
+    ]
+
+
+def _dot(rng, x0, y0, x1, y1):
+    size = rng.randint(60, 110)
+    x = rng.randint(x0, x1 - size)
+    y = rng.randint(y0, y1 - size)
+    return [
+        ('moveTo', (x, y + size)),
+        ('curveTo', ((x + size // 3, y + size), (x + size, y + size // 2), (x + size, y))),
+        ('curveTo', ((x + size // 2, y - 10), (x - 10, y + size // 3), (x, y + size))),
+    ]
+
+
+STROKES = [
+    (_horizontal, 4),
+    (_vertical, 3),
+    (lambda rng, *box: _falling(rng, *box, 1), 1),
+    (lambda rng, *box: _falling(rng, *box, -1), 1),
+    (_dot, 1),
+]
+
+
+def glyph_strokes(seed, index, strokes=DEFAULT_STROKES):
+    """生成一个字形的笔画轮廓（确定性的，只取决于种子与字形序号）"""
+    rng = random.Random(seed * 1000003 + index)
+    count = max(1, round(strokes * rng.uniform(0.5, 1.5)))
+    functions = [function for function, _ in STROKES]
+    weights = [weight for _, weight in STROKES]
+
+    # 左右或上下结构：部分笔画集中在字身的一侧
+    x0, y0, x1, y1 = BOX
+    split = rng.choice((None, 'x', 'y'))
+    contours = []
+    for stroke in range(count):
+        box = [x0, y0, x1, y1]
+        if split == 'x':
+            box[0 if stroke % 2 else 2] = (x0 + x1) // 2 + (-40 if stroke % 2 else 40)
+        elif split == 'y':
+            box[1 if stroke % 2 else 3] = (y0 + y1) // 2 + (-40 if stroke % 2 else 40)
+        contours.append(rng.choices(functions, weights)[0](rng, *box))
+    return contours
+
+
+def draw_strokes(pen, contours):
+    """将笔画轮廓绘制到 segment pen"""
+    for contour in contours:
+        for operator, args in contour:
+            if operator == 'curveTo':
+                pen.curveTo(*args)
+            else:
+                getattr(pen, operator)(args)
+        pen.closePath()
+
+
+def _notdef(pen):
+    for points in (((50, -120), (50, 880), (950, 880), (950, -120)),
+                   ((100, -70), (900, -70), (900, 830), (100, 830))):
+        pen.moveTo(points[0])
+        for point in points[1:]:
+            pen.lineTo(point)
+        pen.closePath()
+
+
+def build_ttf(output_path, glyph_count, strokes=DEFAULT_STROKES, seed=0):
+    """生成合成 TrueType 字体"""
+    codepoints = glyph_codepoints(glyph_count)
+    glyph_order = ['.notdef', 'space'] + [f"uni{codepoint:04X}" for codepoint in codepoints]
+    cmap = {0x20: 'space'}
+    cmap.update((codepoint, f"uni{codepoint:04X}") for codepoint in codepoints)
+
+    glyphs = {}
+    pen = TTGlyphPen(None)
+    _notdef(pen)
+    glyphs['.notdef'] = pen.glyph()
+    glyphs['space'] = TTGlyphPen(None).glyph()
+    for index, codepoint in enumerate(codepoints):
+        pen = TTGlyphPen(None)
+        draw_strokes(Cu2QuPen(pen, 1.0), glyph_strokes(seed, index, strokes))
+        glyphs[f"uni{codepoint:04X}"] = pen.glyph()
+
+    builder = FontBuilder(UNITS_PER_EM, isTTF=True)
+    builder.setupGlyphOrder(glyph_order)
+    builder.setupCharacterMap(cmap)
+    builder.setupGlyf(glyphs)
+    metrics = {}
+    for name in glyph_order:
+        glyph = glyphs[name]
+        metrics[name] = (ADVANCE_WIDTH if name != 'space' else ADVANCE_WIDTH // 2, getattr(glyph, 'xMin', 0))
+    builder.setupHorizontalMetrics(metrics)
+    builder.setupHorizontalHeader(ascent=ASCENDER, descent=DESCENDER)
+    builder.setupNameTable({'familyName': FAMILY_NAME, 'styleName': 'Regular'})
+    builder.setupOS2(sTypoAscender=ASCENDER, sTypoDescender=DESCENDER, usWinAscent=ASCENDER, usWinDescent=-DESCENDER)
+    builder.setupPost()
+    builder.save(output_path)
+
+
+def build_ufoz(output_path, glyph_count, strokes=DEFAULT_STROKES, seed=0):
+    """生成合成 UFO 3 ZIP 源文件（三次曲线轮廓）"""
+    codepoints = glyph_codepoints(glyph_count)
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    writer = UFOWriter(output_path, structure=UFOFileStructure.ZIP)
+    try:
+        writer.writeInfo(SimpleNamespace(
+            familyName=FAMILY_NAME, styleName='Regular', unitsPerEm=UNITS_PER_EM,
+            ascender=ASCENDER, descender=DESCENDER, capHeight=780, xHeight=500,
+            versionMajor=1, versionMinor=0,
+        ))
+        glyph_set = writer.getGlyphSet()
+
+        def write(name, unicodes, width, draw):
+            glyph = SimpleNamespace(width=width, unicodes=unicodes)
+            glyph_set.writeGlyph(name, glyph, lambda point_pen: draw(SegmentToPointPen(point_pen)))
+
+        write('.notdef', [], ADVANCE_WIDTH, _notdef)
+        write('space', [0x20], ADVANCE_WIDTH // 2, lambda pen: None)
+        for index, codepoint in enumerate(codepoints):
+            contours = glyph_strokes(seed, index, strokes)
+            write(f"uni{codepoint:04X}", [codepoint], ADVANCE_WIDTH,
+                  lambda pen, contours=contours: draw_strokes(pen, contours))
+
+        glyph_set.writeContents()
+        writer.writeLayerContents()
+        writer.writeLib({'public.glyphOrder': ['.notdef', 'space'] + [f"uni{cp:04X}" for cp in codepoints]})
+    finally:
+        writer.close()
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='合成测试字体生成工具')
+    parser.add_argument('--glyphs', '-n', type=int, required=True, help='汉字字形数量')
+    parser.add_argument('--strokes', type=int, default=DEFAULT_STROKES, help=f'每个字形的平均笔画数（默认：{DEFAULT_STROKES}）')
+    parser.add_argument('--seed', type=int, default=0, help='随机种子（默认：0）')
+    parser.add_argument('--output', '-o', required=True, help='输出文件路径（.ufoz 或 .ttf）')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if FontBuilder is None:
+        print("错误: 未安装 fontTools，请先运行 pip3 install fonttools")
+        return
+
+    extension = os.path.splitext(args.output)[1].lower()
+    if extension == '.ufoz':
+        build_ufoz(args.output, args.glyphs, args.strokes, args.seed)
+    elif extension == '.ttf':
+        build_ttf(args.output, args.glyphs, args.strokes, args.seed)
+    else:
+        print("错误: 输出文件必须是 .ufoz 或 .ttf")
+        return
+    print(f"合成字体生成完成! 输出文件: {args.output} ({os.path.getsize(args.output) / 1024:.2f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+ttf_autohint.py - 并行 TrueType 自动 hinting 工具
+Parallel, cached TrueType autohinting
+
+将字体按字形分片，并行调用 ttfautohint 为每个分片生成 hinting 程序，
+再合并回原字体。每个字形的 hinting 程序按轮廓哈希缓存，字形修改后重新
+hinting 时只需处理改动过的字形。
+
+所有分片都以完整字体作为 ttfautohint 的参考字体（-R），保证各分片得到
+相同的蓝区（blue zones）与全局表（fpgm、prep、cvt）。
+
+Usage 使用方法:
+    python ttf_autohint.py "PlangothicP1-Regular.ttf" -o "PlangothicP1-Regular_hinted.ttf"
+    python ttf_autohint.py "PlangothicP1-Regular.ttf" -j 8 --cache-dir .hint_cache
+
+Arguments 参数:
+    input_font          Input TTF file path 输入 TTF 字体文件路径
+    -o, --output        Output file path (optional) 输出文件路径（可选）
+    -j, --jobs          Number of worker processes 并行进程数
+    --shard-size        Glyphs per shard 每个分片的字形数
+    --cache-dir         Hinting cache directory 缓存目录
+    --default-script    ttfautohint default script 默认书写系统（默认：latn）
+    --fallback-script   ttfautohint fallback script 后备书写系统（默认：none）
+    --symbol            Force ttfautohint symbol mode 强制使用符号字体模式
+    --ttfautohint       ttfautohint executable ttfautohint 可执行文件
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import hashlib
+import argparse
+import logging
+import tempfile
+import subprocess
+from multiprocessing import Pool, cpu_count
+from typing import Dict, List, Optional, Tuple, Any, Set
+
+from font_loader import load_font
+from glyph_cache import GlyphCache, glyph_outline_hash
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(levelname)s: %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+try:
+    from fontTools.ttLib import TTFont, newTable
+    from fontTools.ttLib.tables import ttProgram
+    from fontTools.ttLib.tables._g_l_y_f import Glyph
+except ModuleNotFoundError:
+    logger.warning("未安装 `fontTools`，功能无法使用")
+    TTFont = None
+
+# 常量定义
+DEFAULT_SHARD_SIZE = 2000
+DEFAULT_CACHE_DIR = ".hint_cache"
+
+# ttfautohint 生成的全局表
+GLOBAL_TABLES = ('fpgm', 'prep', 'cvt ', 'gasp')
+
+# 需要在各分片之间取最大值的 maxp 字段
+MAXP_FIELDS = (
+    'maxZones', 'maxTwilightPoints', 'maxStorage', 'maxFunctionDefs',
+    'maxInstructionDefs', 'maxStackElements', 'maxSizeOfInstructions'
+)
+
+
+def component_closure(glyf_table, glyph_names: List[str]) -> Set[str]:
+    """返回字形及其所有（递归）组件字形的集合"""
+    result = set()
+    stack = list(glyph_names)
+    while stack:
+        name = stack.pop()
+        if name in result:
+            continue
+        result.add(name)
+        glyph = glyf_table[name]
+        if glyph.isComposite():
+            stack.extend(c.glyphName for c in glyph.components)
+    return result
+
+
+def _hint_shard(task: Tuple[str, List[str], List[str]]) -> Tuple[Dict[str, bytes], Dict[str, Any]]:
+    """
+    在子进程中为单个分片执行 hinting
+
+    分片字体保留原有字形编号，只将分片以外的字形置空，
+    然后以完整字体为参考调用 ttfautohint。
+
+    Returns:
+        (字形名 -> hinting 字节码, 全局表数据)
+    """
+    input_path, shard_glyphs, command = task
+
+    font = load_font(input_path)
+    glyf = font['glyf']
+    keep = component_closure(glyf, shard_glyphs)
+    keep.add(font.getGlyphOrder()[0])
+
+    for name in font.getGlyphOrder():
+        if name not in keep:
+            glyf[name] = Glyph()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        shard_path = os.path.join(tmp_dir, "shard.ttf")
+        hinted_path = os.path.join(tmp_dir, "shard_hinted.ttf")
+        font.save(shard_path)
+        font.close()
+
+        subprocess.run(command + [shard_path, hinted_path], check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        hinted = TTFont(hinted_path)
+
+        programs = {}
+        hinted_glyf = hinted['glyf']
+        for name in shard_glyphs:
+            glyph = hinted_glyf[name]
+            if hasattr(glyph, 'program'):
+                programs[name] = glyph.program.getBytecode()
+            else:
+                programs[name] = b""
+
+        global_tables = {
+            tag: base64.b64encode(hinted.getTableData(tag)).decode("ascii")
+            for tag in GLOBAL_TABLES if tag in hinted
+        }
+        maxp = {field: getattr(hinted['maxp'], field) for field in MAXP_FIELDS}
+        head_flags = hinted['head'].flags
+        hinted.close()
+
+    return programs, {"tables": global_tables, "maxp": maxp, "head_flags": head_flags}
+
+
+class ParallelAutohinter:
+    """并行自动 hinting 器，封装分片、缓存与合并逻辑"""
+
+    def __init__(self, ttfautohint: str = 'ttfautohint',
+                 processes: Optional[int] = None,
+                 shard_size: int = DEFAULT_SHARD_SIZE,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 default_script: str = 'latn',
+                 fallback_script: str = 'none',
+                 symbol: Optional[bool] = None,
+                 extra_args: Optional[List[str]] = None):
+        """
+        初始化自动 hinting 器
+
+        Args:
+            ttfautohint: ttfautohint 可执行文件
+            processes: 并行进程数（默认：CPU 核心数）
+            shard_size: 每个分片的字形数
+            cache_dir: 缓存目录，为 None 时禁用缓存
+            default_script: ttfautohint 默认书写系统
+            fallback_script: ttfautohint 后备书写系统
+            symbol: 是否使用符号字体模式，为 None 时在字体缺少拉丁字母 `o` 时自动启用
+            extra_args: 传递给 ttfautohint 的其他参数
+        """
+        self.ttfautohint = ttfautohint
+        self.processes = processes or cpu_count()
+        self.shard_size = max(1, shard_size)
+        self.cache_dir = cache_dir
+        self.default_script = default_script
+        self.fallback_script = fallback_script
+        self.symbol = symbol
+        self.extra_args = list(extra_args or [])
+
+    def _build_command(self, reference_path: str, symbol: bool) -> List[str]:
+        """构建 ttfautohint 命令（不含输入输出文件）"""
+        command = [
+            self.ttfautohint,
+            "--no-info",
+            f"--default-script={self.default_script}",
+            f"--fallback-script={self.fallback_script}",
+            f"--reference={reference_path}",
+        ]
+        # 纯 CJK 字体没有用于推导标准笔画宽度的拉丁字母，需要使用符号字体模式
+        if symbol:
+            command.append("--symbol")
+        return command + self.extra_args
+
+    def _namespace(self, symbol: bool, font_name: str) -> str:
+        """
+        根据 ttfautohint 版本、参数与字体名称计算缓存命名空间
+
+        全局表由参考字体（即整个字体）决定，不同字体（如 P1 与 P2）使用各自的命名空间，
+        交替 hinting 时不会互相清空缓存。
+        """
+        try:
+            result = subprocess.run([self.ttfautohint, "--version"], check=True,
+                                    capture_output=True, text=True)
+            version = result.stdout.splitlines()[0] if result.stdout else ""
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise RuntimeError(f"无法运行 ttfautohint：{e}")
+
+        signature = json.dumps([
+            version, self.default_script, self.fallback_script, symbol, self.extra_args, font_name
+        ])
+        return "ttfautohint-" + hashlib.sha256(signature.encode("utf-8")).hexdigest()[:16]
+
+    def hint_font(self, input_path: str, output_path: str) -> bool:
+        """
+        为整个字体执行 hinting
+
+        Returns:
+            bool: 是否成功
+        """
+        if TTFont is None:
+            logger.error("fontTools 模块未加载，无法进行 hinting")
+            return False
+
+        if not os.path.exists(input_path):
+            logger.error(f"未找到字体文件：{input_path}")
+            return False
+
+        start_time = time.time()
+        logger.info(f"正在加载字体：{input_path}")
+        # 输出文件可能就是输入文件，不能使用完全惰性的加载方式
+        font = load_font(input_path, lazy=None)
+
+        if 'glyf' not in font:
+            logger.error("只有 TrueType 轮廓（glyf）字体可以进行 hinting")
+            return False
+
+        symbol = self.symbol
+        if symbol is None:
+            # 没有 cmap 或 Unicode 子表时 getBestCmap 不可用或返回 None
+            cmap = font.getBestCmap() if 'cmap' in font else None
+            symbol = ord('o') not in (cmap or {})
+
+        font_name = font['name'].getDebugName(6) or os.path.splitext(os.path.basename(input_path))[0]
+        try:
+            cache = GlyphCache(self.cache_dir, self._namespace(symbol, font_name)) if self.cache_dir else None
+        except RuntimeError as e:
+            logger.error(str(e))
+            return False
+
+        glyf = font['glyf']
+        hmtx = font['hmtx']
+        glyph_order = font.getGlyphOrder()
+
+        # 计算每个字形的轮廓哈希
+        memo = {}
+        keys = {
+            name: glyph_outline_hash(glyf, name, hmtx[name], memo)
+            for name in glyph_order
+        }
+
+        # 参考字体（整个字体的轮廓与度量）的哈希，用于判断缓存的全局表是否属于当前字体
+        reference = hashlib.sha256("\n".join(keys[name] for name in glyph_order).encode("ascii")).hexdigest()
+
+        programs: Dict[str, bytes] = {}
+        global_data = None
+        meta = cache.read_meta() if cache else {}
+        if cache:
+            global_data = meta.get("globals")
+            if global_data:
+                for name in glyph_order:
+                    data = cache.get(keys[name])
+                    if data is not None:
+                        programs[name] = data
+
+        missing = [name for name in glyph_order if name not in programs]
+        cached_count = len(glyph_order) - len(missing)
+        logger.info(f"共 {len(glyph_order)} 个字形，缓存命中 {cached_count} 个，"
+                    f"需要 hinting {len(missing)} 个")
+        if global_data and not missing and meta.get("reference") != reference:
+            # 所有字形都命中缓存，但缓存的全局表来自其他版本的字体：
+            # 重新 hinting 一个字形，以当前字体为参考生成全局表并与缓存比较
+            logger.info("参考字体已改变，重新生成全局 hinting 表进行校验...")
+            missing = glyph_order[:1]
+
+        if missing:
+            try:
+                fresh_programs, fresh_globals = self._hint_glyphs(input_path, missing, symbol)
+            except subprocess.CalledProcessError as e:
+                stderr = e.stderr.decode("utf-8", "replace").strip() if e.stderr else ""
+                logger.error(f"ttfautohint 执行失败：{stderr or e}")
+                return False
+
+            if global_data:
+                if global_data["tables"] != fresh_globals["tables"]:
+                    # 全局表改变后，缓存的字形程序引用的 cvt/函数不再可靠，需全部重做
+                    logger.info("全局 hinting 表已改变，缓存失效，重新 hinting 全部字形...")
+                    cache.clear()
+                    font.close()
+                    return self.hint_font(input_path, output_path)
+                for field, value in fresh_globals["maxp"].items():
+                    global_data["maxp"][field] = max(global_data["maxp"][field], value)
+            else:
+                global_data = fresh_globals
+
+            programs.update(fresh_programs)
+
+            if cache:
+                for name, data in fresh_programs.items():
+                    cache.put(keys[name], data)
+                cache.write_meta({"globals": global_data, "reference": reference})
+
+        self._apply_hinting(font, programs, global_data)
+
+        logger.info("正在保存字体...")
+        font.save(output_path)
+        font.close()
+
+        self._show_stats(input_path, output_path, start_time)
+        return True
+
+    def _hint_glyphs(self, input_path: str, glyph_names: List[str],
+                     symbol: bool) -> Tuple[Dict[str, bytes], Dict[str, Any]]:
+        """将字形分片并行 hinting，返回字形程序与全局表数据"""
+        command = self._build_command(os.path.abspath(input_path), symbol)
+        shards = [
+            glyph_names[i:i + self.shard_size]
+            for i in range(0, len(glyph_names), self.shard_size)
+        ]
+        num_processes = min(len(shards), self.processes)
+        logger.info(f"分为 {len(shards)} 个分片，使用 {num_processes} 个进程")
+
+        tasks = [(input_path, shard, command) for shard in shards]
+        programs: Dict[str, bytes] = {}
+        global_data = None
+        consistent = True
+
+        with Pool(processes=num_processes) as pool:
+            for index, (shard_programs, shard_globals) in enumerate(pool.imap(_hint_shard, tasks)):
+                programs.update(shard_programs)
+                if global_data is None:
+                    global_data = shard_globals
+                else:
+                    if shard_globals["tables"] != global_data["tables"]:
+                        logger.warning(f"分片 {index + 1} 的全局 hinting 表与其他分片不一致")
+                        consistent = False
+                    for field, value in shard_globals["maxp"].items():
+                        global_data["maxp"][field] = max(global_data["maxp"][field], value)
+                logger.info(f"分片进度：{index + 1}/{len(shards)}")
+
+        if not consistent:
+            # 字形程序引用各自分片的 cvt 与函数，不能混用；ttfautohint 无法指定全局表，
+            # 只能在一次运行中 hinting 全部字形，使所有字形程序使用同一套全局表
+            logger.warning(f"改为在单个进程中重新 hinting 全部 {len(glyph_names)} 个字形...")
+            return _hint_shard((input_path, glyph_names, command))
+
+        return programs, global_data
+
+    @staticmethod
+    def _apply_hinting(font, programs: Dict[str, bytes], global_data: Dict[str, Any]) -> None:
+        """将 hinting 程序与全局表写回字体"""
+        glyf = font['glyf']
+        for name, bytecode in programs.items():
+            glyph = glyf[name]
+            if glyph.numberOfContours == 0:
+                continue
+            program = ttProgram.Program()
+            program.fromBytecode(bytecode)
+            glyph.program = program
+
+        for tag, data in global_data["tables"].items():
+            table = newTable(tag)
+            table.decompile(base64.b64decode(data), font)
+            font[tag] = table
+
+        maxp = font['maxp']
+        for field, value in global_data["maxp"].items():
+            setattr(maxp, field, value)
+        font['head'].flags = global_data["head_flags"]
+
+    @staticmethod
+    def _show_stats(input_path: str, output_path: str, start_time: float) -> None:
+        """显示 hinting 统计信息"""
+        input_size = os.path.getsize(input_path) / 1024  # KB
+        output_size = os.path.getsize(output_path) / 1024  # KB
+
+        logger.info("\nhinting 完成：")
+        logger.info(f"处理时间：{time.time() - start_time:.2f} 秒")
+        logger.info(f"源文件：{input_size:.2f} KB")
+        logger.info(f"hinting 后：{output_size:.2f} KB")
+        logger.info(f"大小变化：{((output_size/input_size)-1)*100:+.1f}%")
+        logger.info(f"✓ 字体已保存为 {output_path}")
+
+
+def parse_arguments() -> argparse.Namespace:
+    """解析命令行参数"""
+    parser = argparse.ArgumentParser(description='并行 TrueType 自动 hinting 工具')
+    parser.add_argument('input_font', help='输入 TTF 字体文件路径')
+    parser.add_argument('-o', '--output', help='输出文件路径（默认：覆盖输入文件）')
+    parser.add_argument('-j', '--jobs', type=int, default=None, help='并行进程数（默认：CPU 核心数）')
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE,
+                        help=f'每个分片的字形数（默认：{DEFAULT_SHARD_SIZE}）')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                        help=f'hinting 缓存目录（默认：{DEFAULT_CACHE_DIR}）')
+    parser.add_argument('--no-cache', action='store_true', help='禁用 hinting 缓存')
+    parser.add_argument('--default-script', default='latn', help='ttfautohint 默认书写系统（默认：latn）')
+    parser.add_argument('--fallback-script', default='none', help='ttfautohint 后备书写系统（默认：none）')
+    parser.add_argument('--symbol', action='store_true', default=None,
+                        help='强制使用符号字体模式（默认：字体缺少拉丁字母 o 时自动启用）')
+    parser.add_argument('--ttfautohint', default='ttfautohint', help='ttfautohint 可执行文件（默认：ttfautohint）')
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    """主函数"""
+    args = parse_arguments()
+
+    hinter = ParallelAutohinter(
+        ttfautohint=args.ttfautohint,
+        processes=args.jobs,
+        shard_size=args.shard_size,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        default_script=args.default_script,
+        fallback_script=args.fallback_script,
+        symbol=args.symbol
+    )
+
+    success = hinter.hint_font(args.input_font, args.output or args.input_font)
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+ufoz.py - UFO 3 ZIP 源文件读取与按字形提取
+Read and selectively extract .ufoz sources
+
+直接从 .ufoz 压缩包中读取 plist 与 .glif 条目，不需要先解压整个 .ufo 目录。
+select_glyphs 按码位范围或字形名称选择字形：码位来自每个源文件的字形 -> 码位映射
+（unicode_map），.pgs 直接读取其中的码位表；.ufoz 只在第一次使用时读取每个 .glif
+开头的 <unicode> 元素，结果按各 .glif 条目的 CRC 缓存在磁盘上（.unicode_cache），
+源文件未改变时不再读取任何 .glif。
+extract_glyphs 只解压选中的字形（及其引用的组件），并同步过滤
+contents.plist、lib.plist 中的字形顺序、groups.plist、kerning.plist 与
+features.fea（见 feature_filter.py），得到一个可以直接交给 fontmake 编译的较小的 .ufo。
+
+Usage 使用方法:
+    python ufoz.py PlangothicP1-Regular.ufoz
+    python ufoz.py PlangothicP1-Regular.ufoz --glyphs uni4E00 uni4E01 -o test_build
+    python ufoz.py PlangothicP2-Regular.ufoz --unicodes 323B0-3347F -o test_build
+
+Library 库接口:
+    from ufoz import UfozSource, extract_glyphs, select_glyphs, parse_unicode_ranges
+
+    with UfozSource("PlangothicP1-Regular.ufoz") as source:
+        info = source.glyph_info("uni4E00")   # GlyphInfo(name, unicodes, contours, points, components)
+
+        names = select_glyphs(source, parse_unicode_ranges("4E00-4EFF"), ["*.vert"], cache_dir=".unicode_cache")
+
+    extract_glyphs("PlangothicP1-Regular.ufoz", ["uni4E00"], "test_build")
+"""
+
+import os
+import re
+import json
+import hashlib
+import posixpath
+import plistlib
+import zipfile
+import argparse
+import xml.etree.ElementTree as ElementTree
+from fnmatch import fnmatchcase
+from collections import namedtuple
+
+from glyph_cache import GlyphCache
+
+DEFAULT_LAYER_DIR = 'glyphs'
+
+# lib.plist 中以字形名称为键或元素的条目
+GLYPH_LIST_KEYS = ('public.glyphOrder', 'public.skipExportGlyphs')
+GLYPH_DICT_KEYS = ('public.postscriptNames', 'public.openTypeCategories')
+
+# 读取 .glif 开头部分时每次读取的字节数
+GLIF_HEADER_SIZE = 1024
+UNICODE_PATTERN = re.compile(rb'<unicode\s+hex=["\']([0-9A-Fa-f]+)["\']')
+# 字形 -> 码位映射缓存的目录与格式版本
+DEFAULT_UNICODE_CACHE = '.unicode_cache'
+UNICODE_CACHE_VERSION = 1
+
+GlyphInfo = namedtuple('GlyphInfo', 'name unicodes contours points components')
+
+
+class UfozError(Exception):
+    """.ufoz 文件结构错误"""
+
+
+class UfoSource:
+    """
+    只读的 UFO 源，按 .ufo 内的相对路径读取条目
+
+    子类提供 root、names（"<root>/<相对路径>" 形式的条目名称集合）与 read()；
+    .ufoz 压缩包见 UfozSource，二进制字形库 (.pgs) 见 glyph_store.GlyphStore。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._contents = {}
+        self._unicode_map = None
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def entry(self, relative_path):
+        """返回 .ufo 内相对路径对应的压缩包条目名称"""
+        return posixpath.join(self.root, relative_path)
+
+    def exists(self, relative_path):
+        return self.entry(relative_path) in self.names
+
+    def read(self, relative_path):
+        raise NotImplementedError
+
+    def read_plist(self, relative_path, default=None):
+        if not self.exists(relative_path):
+            return default
+        return plistlib.loads(self.read(relative_path))
+
+    @property
+    def layers(self):
+        """[(图层名称, 目录名称)]，第一个为默认图层"""
+        return self.read_plist('layercontents.plist', [['public.default', DEFAULT_LAYER_DIR]])
+
+    def contents(self, layer_dir=DEFAULT_LAYER_DIR):
+        """图层中字形名称 -> .glif 文件名"""
+        if layer_dir not in self._contents:
+            self._contents[layer_dir] = self.read_plist(posixpath.join(layer_dir, 'contents.plist'), {})
+        return self._contents[layer_dir]
+
+    @property
+    def glyph_order(self):
+        """默认图层中的所有字形，按 lib.plist 中的 public.glyphOrder 排列"""
+        contents = self.contents()
+        lib = self.read_plist('lib.plist', {})
+        order = [name for name in lib.get('public.glyphOrder', []) if name in contents]
+        listed = set(order)
+        return order + sorted(name for name in contents if name not in listed)
+
+    def read_glif(self, name, layer_dir=DEFAULT_LAYER_DIR):
+        return self.read(posixpath.join(layer_dir, self.contents(layer_dir)[name]))
+
+    def unicode_map(self, cache_dir=None):
+        """默认图层中 字形名称 -> 码位列表（每个源对象只读取一次）"""
+        if self._unicode_map is None:
+            self._unicode_map = {name: self.read_unicodes(name) for name in self.contents()}
+        return self._unicode_map
+
+    def read_unicodes(self, name, layer_dir=DEFAULT_LAYER_DIR):
+        """返回 .glif 中 <unicode> 元素的码位"""
+        data = self.read_glif(name, layer_dir)
+        end = data.find(b'<outline')
+        return [int(value, 16) for value in UNICODE_PATTERN.findall(data if end < 0 else data[:end])]
+
+    def glyph_info(self, name, layer_dir=DEFAULT_LAYER_DIR):
+        """解析 .glif，返回码位、轮廓数、点数与引用的组件"""
+        element = ElementTree.fromstring(self.read_glif(name, layer_dir))
+        unicodes = [int(item.get('hex'), 16) for item in element.iter('unicode')]
+        contours = points = 0
+        components = []
+        for item in element.iter():
+            if item.tag == 'contour':
+                contours += 1
+            elif item.tag == 'point':
+                points += 1
+            elif item.tag == 'component':
+                components.append(item.get('base'))
+        return GlyphInfo(name, unicodes, contours, points, components)
+
+    def iter_glyph_info(self, names=None):
+        for name in (self.glyph_order if names is None else names):
+            yield self.glyph_info(name)
+
+
+class UfozSource(UfoSource):
+    """只读打开的 .ufoz 源文件，按需读取其中的条目"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.zip = zipfile.ZipFile(path, 'r')
+        self.names = set(self.zip.namelist())
+
+        roots = {name.replace('\\', '/').split('/')[0] for name in self.names}
+        roots = sorted(root for root in roots if root.endswith('.ufo'))
+        if not roots:
+            self.zip.close()
+            raise UfozError(f"在 {path} 中未找到.ufo目录")
+        self.root = roots[0]
+
+    def close(self):
+        self.zip.close()
+
+    def read(self, relative_path):
+        return self.zip.read(self.entry(relative_path))
+
+    def unicode_map(self, cache_dir=None):
+        """
+        默认图层中 字形名称 -> 码位列表
+
+        指定 cache_dir 时按 contents.plist 与各 .glif 条目的名称、CRC 与大小（均在压缩包的
+        中央目录中，不需要解压）缓存在磁盘上，源文件未改变时不读取任何 .glif。
+        """
+        if self._unicode_map is not None or cache_dir is None:
+            return super().unicode_map()
+
+        contents = self.contents()
+        h = hashlib.sha256(str(UNICODE_CACHE_VERSION).encode('ascii'))
+        for relative_path in [posixpath.join(DEFAULT_LAYER_DIR, 'contents.plist'),
+                              *(posixpath.join(DEFAULT_LAYER_DIR, filename) for filename in contents.values())]:
+            if not self.exists(relative_path):
+                continue
+            info = self.zip.getinfo(self.entry(relative_path))
+            h.update(f"{info.filename}\0{info.CRC}\0{info.file_size}\n".encode('utf-8'))
+        key = h.hexdigest()
+
+        cache = GlyphCache(cache_dir, f"unicodes-v{UNICODE_CACHE_VERSION}")
+        data = cache.get(key)
+        if data is not None:
+            self._unicode_map = json.loads(data)
+        else:
+            cache.put(key, json.dumps(super().unicode_map(), ensure_ascii=False).encode('utf-8'))
+        return self._unicode_map
+
+    def read_unicodes(self, name, layer_dir=DEFAULT_LAYER_DIR):
+        """只解压 .glif 中 <outline> 之前的部分，返回其中 <unicode> 元素的码位"""
+        entry = self.entry(posixpath.join(layer_dir, self.contents(layer_dir)[name]))
+        data = b''
+        with self.zip.open(entry) as f:
+            while True:
+                chunk = f.read(GLIF_HEADER_SIZE)
+                data += chunk
+                end = data.find(b'<outline')
+                if end >= 0 or not chunk:
+                    break
+        return [int(value, 16) for value in UNICODE_PATTERN.findall(data if end < 0 else data[:end])]
+
+
+def open_source(path):
+    """按扩展名打开 .ufoz 源文件或 .pgs 二进制字形库"""
+    if path.lower().endswith('.pgs'):
+        from glyph_store import GlyphStore
+        return GlyphStore(path)
+    return UfozSource(path)
+
+
+def component_closure(names, components_of):
+    """
+    返回字形集合及其直接或间接引用的所有组件
+
+    Args:
+        names: 字形名称集合
+        components_of: 字形名称 -> 组件名称列表 的函数
+    """
+    closure = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name in closure:
+            continue
+        closure.add(name)
+        pending.extend(components_of(name))
+    return closure
+
+
+def source_components(source):
+    """返回按需解析组件引用的函数（结果缓存）"""
+    cache = {}
+    contents = source.contents()
+
+    def components_of(name):
+        if name not in cache:
+            cache[name] = source.glyph_info(name).components if name in contents else []
+        return cache[name]
+
+    return components_of
+
+
+def _filter_groups(groups, selected):
+    filtered = {}
+    for group, members in groups.items():
+        members = [member for member in members if member in selected]
+        if members:
+            filtered[group] = members
+    return filtered
+
+
+def _filter_kerning(kerning, selected, groups):
+    def kept(side):
+        return side in groups if side.startswith('public.kern') else side in selected
+
+    filtered = {}
+    for first, pairs in kerning.items():
+        if not kept(first):
+            continue
+        pairs = {second: value for second, value in pairs.items() if kept(second)}
+        if pairs:
+            filtered[first] = pairs
+    return filtered
+
+
+def extract_glyphs(ufoz_path, glyph_names, target_dir='.', with_components=True, fontinfo=None,
+                   drop_features=False, log=print):
+    """
+    只提取选中的字形，生成一个较小的 .ufo 目录
+
+    Args:
+        ufoz_path: .ufoz 源文件或 .pgs 二进制字形库路径
+        glyph_names: 要保留的字形名称
+        target_dir: 输出目录
+        with_components: 是否自动加入选中字形引用的组件
+        fontinfo: 覆盖 fontinfo.plist 中的字段（例如分区字体的 familyName）
+        drop_features: features.fea 无法解析时省略它（默认抛出 UfozError）
+        log: 输出警告信息的函数
+
+    Returns:
+        (解压后的 .ufo 路径, 实际保留的字形名称集合)
+    """
+    with open_source(ufoz_path) as source:
+        contents = source.contents()
+        missing = [name for name in glyph_names if name not in contents]
+        if missing:
+            log(f"警告: {ufoz_path} 中缺少 {len(missing)} 个字形（例如 {missing[0]}），已跳过")
+        selected = {name for name in glyph_names if name in contents}
+        if with_components:
+            selected = component_closure(selected, source_components(source))
+            selected &= set(contents)
+        if '.notdef' in contents:
+            selected.add('.notdef')
+
+        ufo_dir = os.path.join(target_dir, source.root)
+        os.makedirs(ufo_dir, exist_ok=True)
+
+        def write(relative_path, data):
+            path = os.path.join(ufo_dir, *relative_path.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+
+        def write_plist(relative_path, value):
+            write(relative_path, plistlib.dumps(value))
+
+        # 各图层只保留选中的字形
+        layer_dirs = set()
+        for _, layer_dir in source.layers:
+            layer_dirs.add(layer_dir)
+            layer_contents = {name: filename for name, filename in source.contents(layer_dir).items()
+                              if name in selected}
+            write_plist(posixpath.join(layer_dir, 'contents.plist'), layer_contents)
+            if source.exists(posixpath.join(layer_dir, 'layerinfo.plist')):
+                write(posixpath.join(layer_dir, 'layerinfo.plist'),
+                      source.read(posixpath.join(layer_dir, 'layerinfo.plist')))
+            for filename in layer_contents.values():
+                write(posixpath.join(layer_dir, filename), source.read(posixpath.join(layer_dir, filename)))
+
+        lib = source.read_plist('lib.plist')
+        if lib is not None:
+            for key in GLYPH_LIST_KEYS:
+                if key in lib:
+                    lib[key] = [name for name in lib[key] if name in selected]
+            for key in GLYPH_DICT_KEYS:
+                if key in lib:
+                    lib[key] = {name: value for name, value in lib[key].items() if name in selected}
+            write_plist('lib.plist', lib)
+
+        groups = _filter_groups(source.read_plist('groups.plist', {}), selected)
+        if groups:
+            write_plist('groups.plist', groups)
+        kerning = _filter_kerning(source.read_plist('kerning.plist', {}), selected, groups)
+        if kerning:
+            write_plist('kerning.plist', kerning)
+
+        if fontinfo:
+            info = source.read_plist('fontinfo.plist', {})
+            info.update(fontinfo)
+            write_plist('fontinfo.plist', info)
+
+        # 特性文件在其他文件（可能被 include）写出后按字形过滤；选中全部字形时原样保留
+        handled = {'lib.plist', 'groups.plist', 'kerning.plist', 'layercontents.plist'}
+        partial_features = source.exists('features.fea') and selected != set(contents)
+        if partial_features:
+            handled.add('features.fea')
+        if fontinfo:
+            handled.add('fontinfo.plist')
+        for entry in sorted(source.names):
+            relative_path = entry[len(source.root) + 1:]
+            if not entry.startswith(source.root + '/') or not relative_path or entry.endswith('/'):
+                continue
+            if relative_path in handled or relative_path.split('/')[0] in layer_dirs:
+                continue
+            write(relative_path, source.read(relative_path))
+        write_plist('layercontents.plist', source.layers)
+
+        if partial_features:
+            features = _filter_features(source, ufo_dir, contents, selected, drop_features, log)
+            if features is not None:
+                write('features.fea', features.encode('utf-8'))
+
+    return ufo_dir, selected
+
+
+def _filter_features(source, ufo_dir, glyph_names, selected, drop_features, log):
+    """只保留 features.fea 中引用的字形都被选中的规则，无法解析且 drop_features 时返回 None"""
+    from feature_filter import FeatureFilterError, parse_features, filter_features
+
+    text = source.read('features.fea').decode('utf-8')
+    try:
+        # 与 ufo2ft 一致，include 路径相对于 .ufo 所在目录
+        doc = parse_features(text, glyph_names, os.path.dirname(os.path.abspath(ufo_dir)))
+    except FeatureFilterError as e:
+        if not drop_features:
+            raise UfozError(f"无法解析 {source.path} 中的 features.fea，不能按字形过滤: {e}") from e
+        log(f"警告: 已省略 {source.path} 中的 features.fea（无法解析: {e}）")
+        return None
+    text, dropped = filter_features(doc, selected)
+    if dropped:
+        log(f"features.fea: 删除了 {dropped} 条引用未选中字形的语句")
+    return text
+
+
+def parse_unicode_ranges(text):
+    """解析 "4E00-9FFF,U+20000" 形式的码位范围，返回 [(起始, 结束)]"""
+    ranges = []
+    for part in text.replace(' ', '').upper().split(','):
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        start = int(start.removeprefix('U+'), 16)
+        end = int(end.removeprefix('U+'), 16) if end else start
+        if end < start:
+            raise ValueError(f"无效的码位范围: {part}")
+        ranges.append((start, end))
+    return ranges
+
+
+def select_glyphs(source, ranges=(), patterns=(), cache_dir=None):
+    """
+    选择码位落在 ranges 内或名称匹配 patterns（支持 * ? 通配符）的字形
+
+    码位取自 source.unicode_map(cache_dir)，一个字形的所有码位都参与匹配。
+
+    Returns:
+        list: 按字形顺序排列的字形名称
+    """
+    def in_ranges(codepoints):
+        return any(start <= codepoint <= end for codepoint in codepoints for start, end in ranges)
+
+    unicodes = source.unicode_map(cache_dir) if ranges else {}
+    return [
+        name for name in source.glyph_order
+        if any(fnmatchcase(name, pattern) for pattern in patterns) or in_ranges(unicodes.get(name, ()))
+    ]
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description='UFO 3 ZIP 源文件读取与按字形提取工具')
+    parser.add_argument('ufoz_file', help='.ufoz 源文件或 .pgs 二进制字形库路径')
+    parser.add_argument('--unicodes', '-u', help='要提取的码位范围，例如 "4E00-4EFF,20000"')
+    parser.add_argument('--glyphs', '-g', nargs='+', default=[], help='要提取的字形名称（支持 * ? 通配符）')
+    parser.add_argument('--output', '-o', default='.', help='提取输出目录（默认：当前目录）')
+    parser.add_argument('--cache-dir', default=DEFAULT_UNICODE_CACHE,
+                        help=f'字形码位缓存目录（默认：{DEFAULT_UNICODE_CACHE}）')
+    parser.add_argument('--no-cache', action='store_true', help='不使用字形码位缓存')
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    try:
+        with open_source(args.ufoz_file) as source:
+            if not args.unicodes and not args.glyphs:
+                glyphs = list(source.iter_glyph_info())
+                layers = ', '.join(name for name, _ in source.layers)
+                print(f"{source.root}: {len(glyphs)} 个字形，图层: {layers}")
+                print(f"  已编码字形: {sum(1 for glyph in glyphs if glyph.unicodes)}")
+                print(f"  复合字形: {sum(1 for glyph in glyphs if glyph.components)}")
+                print(f"  轮廓点数: {sum(glyph.points for glyph in glyphs)}")
+                return
+            names = select_glyphs(source, parse_unicode_ranges(args.unicodes or ''), args.glyphs,
+                                  None if args.no_cache else args.cache_dir)
+    except (OSError, zipfile.BadZipFile, UfozError, ValueError) as e:
+        print(f"错误: {e}")
+        return
+
+    if not names:
+        print("没有匹配的字形")
+        return
+    ufo_dir, selected = extract_glyphs(args.ufoz_file, names, args.output, drop_features=True)
+    print(f"已提取 {len(names)} 个字形（含组件共 {len(selected)} 个）: {ufo_dir}")
+
+
+if __name__ == "__main__":
+    main()
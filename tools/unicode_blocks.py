@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+unicode_blocks.py - Unicode 区块数据
+遍黑体相关 Unicode 区块的范围表，供分片、统计与分区等工具共用
+
+Usage 使用方法:
+    from unicode_blocks import block_of, group_by_block
+
+    block_of(0x20000)                  # 'CJK Unified Ideographs Extension B'
+    group_by_block([0x4E00, 0x20000])  # {'CJK Unified Ideographs': [...], ...}
+"""
+
+import bisect
+from collections import OrderedDict
+
+# (起始码位, 结束码位, 区块名称)，按起始码位排序
+BLOCKS = [
+    (0x0000, 0x007F, 'Basic Latin'),
+    (0x0080, 0x00FF, 'Latin-1 Supplement'),
+    (0x0100, 0x024F, 'Latin Extended'),
+    (0x0250, 0x02FF, 'IPA Extensions and Spacing Modifier Letters'),
+    (0x0300, 0x036F, 'Combining Diacritical Marks'),
+    (0x0370, 0x03FF, 'Greek and Coptic'),
+    (0x0400, 0x04FF, 'Cyrillic'),
+    (0x1100, 0x11FF, 'Hangul Jamo'),
+    (0x2000, 0x206F, 'General Punctuation'),
+    (0x2070, 0x209F, 'Superscripts and Subscripts'),
+    (0x20A0, 0x20CF, 'Currency Symbols'),
+    (0x2100, 0x214F, 'Letterlike Symbols'),
+    (0x2150, 0x218F, 'Number Forms'),
+    (0x2190, 0x21FF, 'Arrows'),
+    (0x2200, 0x22FF, 'Mathematical Operators'),
+    (0x2300, 0x23FF, 'Miscellaneous Technical'),
+    (0x2460, 0x24FF, 'Enclosed Alphanumerics'),
+    (0x2500, 0x257F, 'Box Drawing'),
+    (0x2580, 0x259F, 'Block Elements'),
+    (0x25A0, 0x25FF, 'Geometric Shapes'),
+    (0x2600, 0x26FF, 'Miscellaneous Symbols'),
+    (0x2E80, 0x2EFF, 'CJK Radicals Supplement'),
+    (0x2F00, 0x2FDF, 'Kangxi Radicals'),
+    (0x2FF0, 0x2FFF, 'Ideographic Description Characters'),
+    (0x3000, 0x303F, 'CJK Symbols and Punctuation'),
+    (0x3040, 0x309F, 'Hiragana'),
+    (0x30A0, 0x30FF, 'Katakana'),
+    (0x3100, 0x312F, 'Bopomofo'),
+    (0x3130, 0x318F, 'Hangul Compatibility Jamo'),
+    (0x3190, 0x319F, 'Kanbun'),
+    (0x31A0, 0x31BF, 'Bopomofo Extended'),
+    (0x31C0, 0x31EF, 'CJK Strokes'),
+    (0x31F0, 0x31FF, 'Katakana Phonetic Extensions'),
+    (0x3200, 0x32FF, 'Enclosed CJK Letters and Months'),
+    (0x3300, 0x33FF, 'CJK Compatibility'),
+    (0x3400, 0x4DBF, 'CJK Unified Ideographs Extension A'),
+    (0x4DC0, 0x4DFF, 'Yijing Hexagram Symbols'),
+    (0x4E00, 0x9FFF, 'CJK Unified Ideographs'),
+    (0xAC00, 0xD7AF, 'Hangul Syllables'),
+    (0xE000, 0xF8FF, 'Private Use Area'),
+    (0xF900, 0xFAFF, 'CJK Compatibility Ideographs'),
+    (0xFE00, 0xFE0F, 'Variation Selectors'),
+    (0xFE10, 0xFE1F, 'Vertical Forms'),
+    (0xFE30, 0xFE4F, 'CJK Compatibility Forms'),
+    (0xFE50, 0xFE6F, 'Small Form Variants'),
+    (0xFF00, 0xFFEF, 'Halfwidth and Fullwidth Forms'),
+    (0x16FE0, 0x16FFF, 'Ideographic Symbols and Punctuation'),
+    (0x17000, 0x187FF, 'Tangut'),
+    (0x1B000, 0x1B0FF, 'Kana Supplement'),
+    (0x1B100, 0x1B12F, 'Kana Extended-A'),
+    (0x1D300, 0x1D35F, 'Tai Xuan Jing Symbols'),
+    (0x1D360, 0x1D37F, 'Counting Rod Numerals'),
+    (0x1F100, 0x1F1FF, 'Enclosed Alphanumeric Supplement'),
+    (0x1F200, 0x1F2FF, 'Enclosed Ideographic Supplement'),
+    (0x20000, 0x2A6DF, 'CJK Unified Ideographs Extension B'),
+    (0x2A700, 0x2B73F, 'CJK Unified Ideographs Extension C'),
+    (0x2B740, 0x2B81F, 'CJK Unified Ideographs Extension D'),
+    (0x2B820, 0x2CEAF, 'CJK Unified Ideographs Extension E'),
+    (0x2CEB0, 0x2EBEF, 'CJK Unified Ideographs Extension F'),
+    (0x2EBF0, 0x2EE5F, 'CJK Unified Ideographs Extension I'),
+    (0x2F800, 0x2FA1F, 'CJK Compatibility Ideographs Supplement'),
+    (0x30000, 0x3134F, 'CJK Unified Ideographs Extension G'),
+    (0x31350, 0x323AF, 'CJK Unified Ideographs Extension H'),
+    (0x323B0, 0x3347F, 'CJK Unified Ideographs Extension J'),
+    (0xE0100, 0xE01EF, 'Variation Selectors Supplement'),
+    (0xF0000, 0xFFFFF, 'Supplementary Private Use Area-A'),
+    (0x100000, 0x10FFFF, 'Supplementary Private Use Area-B'),
+]
+
+# 未收录在上表中的码位所属的区块名称
+OTHER_BLOCK = 'Other'
+
+_STARTS = [start for start, _, _ in BLOCKS]
+
+
+def block_of(codepoint):
+    """返回码位所属的区块名称"""
+    index = bisect.bisect_right(_STARTS, codepoint) - 1
+    if index >= 0:
+        start, end, name = BLOCKS[index]
+        if start <= codepoint <= end:
+            return name
+    return OTHER_BLOCK
+
+
+def block_range(name):
+    """返回区块的 (起始码位, 结束码位)，未知区块返回 None"""
+    for start, end, block_name in BLOCKS:
+        if block_name == name:
+            return start, end
+    return None
+
+
+def block_slug(name):
+    """将区块名称转换为可用于文件名的短标识"""
+    return '-'.join(name.lower().replace('-', ' ').split())
+
+
+def group_by_block(codepoints):
+    """
+    将码位按区块分组
+
+    Returns:
+        OrderedDict: 区块名称 -> 排序后的码位列表，按区块起始码位排序
+    """
+    groups = {}
+    for codepoint in sorted(codepoints):
+        groups.setdefault(block_of(codepoint), []).append(codepoint)
+    return OrderedDict(groups)